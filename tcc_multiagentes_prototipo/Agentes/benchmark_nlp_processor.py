@@ -0,0 +1,190 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+from datetime import datetime
+
+try:
+    from .nlp_processor import StatusTextProcessor, METRIC_KEYS, KEYWORD_FLAGS, convert_value
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from nlp_processor import StatusTextProcessor, METRIC_KEYS, KEYWORD_FLAGS, convert_value
+
+# Frases usadas para montar relatórios de status sintéticos
+SAMPLE_SENTENCES = [
+    "Status do PROJ-{project}: O projeto está {completion}% concluído.",
+    "O SPI atual é {spi} e o CPI: {cpi}.",
+    "Temos um atraso de {delay} dias nas entregas da fase de testes.",
+    "O orçamento total: R$ {budget} e o custo atual: R$ {cost}.",
+    "A equipe concluiu a revisão dos requisitos com as partes interessadas.",
+    "Foi aprovada uma mudança de escopo para incluir o módulo de relatórios.",
+    "Foi identificado um novo risco relacionado ao fornecedor de infraestrutura.",
+    "Há uma ameaça de indisponibilidade da equipe no próximo mês.",
+    "As atividades de integração seguem conforme o planejado.",
+    "Gerente: João Silva. Data do relatório: 10/07/2025."
+]
+
+def generate_status_texts(num_documents, seed=42):
+    """
+    Gera relatórios de status sintéticos com métricas e palavras-chave variadas.
+    
+    Args:
+        num_documents: Número de relatórios
+        seed: Semente do gerador aleatório
+        
+    Returns:
+        Lista de textos
+    """
+    rng = random.Random(seed)
+    texts = []
+    for i in range(num_documents):
+        values = {
+            "project": f"{i:03d}",
+            "completion": rng.randint(5, 100),
+            "spi": f"{rng.uniform(0.6, 1.2):.2f}",
+            "cpi": f"{rng.uniform(0.6, 1.2):.2f}".replace(".", ","),
+            "delay": rng.randint(1, 60),
+            "budget": f"{rng.randint(100, 900)}.000,00",
+            "cost": f"{rng.randint(50, 900)}.000,00"
+        }
+        sentences = [SAMPLE_SENTENCES[0]] + rng.sample(SAMPLE_SENTENCES[1:], rng.randint(3, len(SAMPLE_SENTENCES) - 1))
+        texts.append(" ".join(sentence.format(**values) for sentence in sentences) * rng.randint(1, 4))
+    return texts
+
+def legacy_extract_with_regex(patterns, text, pattern_key):
+    """
+    Extração anterior de um único padrão, com re.search sobre o padrão não compilado.
+    
+    Args:
+        patterns: Padrões do processador (StatusTextProcessor.patterns)
+        text: Texto do relatório
+        pattern_key: Chave do padrão
+        
+    Returns:
+        Valor convertido ou None se o padrão não for encontrado
+    """
+    match = re.search(patterns[pattern_key], text, re.IGNORECASE)
+    if match:
+        return convert_value(pattern_key, match.group(1))
+    return None
+
+def legacy_extract_metrics(processor, text):
+    """
+    Extração anterior ao extrator pré-compilado: uma busca com padrão não
+    compilado por métrica e palavras-chave procuradas como substrings.
+    
+    Args:
+        processor: Instância de StatusTextProcessor
+        text: Texto do relatório
+        
+    Returns:
+        Dicionário de métricas
+    """
+    metrics = {key: legacy_extract_with_regex(processor.patterns, text, key) for key in METRIC_KEYS}
+    metrics["scope_change_detected"] = any(keyword in text.lower() for keyword in processor.patterns["scope_change_keywords"])
+    metrics["risk_detected"] = any(keyword in text.lower() for keyword in processor.patterns["risk_keywords"])
+    return {k: v for k, v in metrics.items() if v is not None}
+
+def time_extractor(extract, texts, repeats=5):
+    """
+    Mede o tempo de extração sobre todos os textos.
+    
+    Args:
+        extract: Função que recebe um texto e retorna as métricas
+        texts: Lista de textos
+        repeats: Número de passagens; vale a mais rápida
+        
+    Returns:
+        Tempo da passagem mais rápida em segundos
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in texts:
+            extract(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_extraction_benchmark(num_documents=1000, repeats=5, seed=42):
+    """
+    Compara a extração anterior com o extrator pré-compilado.
+    
+    Além do tempo, conta os documentos em que as métricas numéricas ou as
+    flags de palavras-chave diferem entre as duas implementações (as flags
+    podem diferir porque as palavras-chave agora são tratadas como regex).
+    
+    Args:
+        num_documents: Número de relatórios sintéticos
+        repeats: Número de passagens por implementação
+        seed: Semente do gerador aleatório
+        
+    Returns:
+        Dicionário com o relatório do benchmark
+    """
+    processor = StatusTextProcessor(use_spacy=False)
+    texts = generate_status_texts(num_documents, seed)
+    
+    legacy_seconds = time_extractor(lambda text: legacy_extract_metrics(processor, text), texts, repeats)
+    compiled_seconds = time_extractor(processor.extract_metrics, texts, repeats)
+    
+    metric_mismatches = 0
+    flag_differences = 0
+    for text in texts:
+        legacy = legacy_extract_metrics(processor, text)
+        current = processor.extract_metrics(text)
+        if any(legacy.get(key) != current.get(key) for key in METRIC_KEYS):
+            metric_mismatches += 1
+        if any(legacy[flag] != current[flag] for flag in KEYWORD_FLAGS.values()):
+            flag_differences += 1
+    
+    def summary(seconds):
+        return {
+            "seconds": seconds,
+            "docs_per_second": num_documents / seconds,
+            "us_per_doc": seconds / num_documents * 1e6
+        }
+    
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "num_documents": num_documents,
+        "avg_chars": sum(len(text) for text in texts) / num_documents,
+        "repeats": repeats,
+        "legacy": summary(legacy_seconds),
+        "compiled": summary(compiled_seconds),
+        "speedup": legacy_seconds / compiled_seconds,
+        "metric_mismatches": metric_mismatches,
+        "keyword_flag_differences": flag_differences
+    }
+
+if __name__ == "__main__":
+    # Configurar argumentos de linha de comando
+    parser = argparse.ArgumentParser(description='Micro-benchmark da extração de métricas dos relatórios de status')
+    parser.add_argument('--documents', type=int, default=1000, help='Número de relatórios sintéticos')
+    parser.add_argument('--repeats', type=int, default=5, help='Passagens por implementação')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador aleatório')
+    parser.add_argument('--output', help='Arquivo JSON de saída (opcional)')
+    
+    args = parser.parse_args()
+    
+    report = run_extraction_benchmark(num_documents=args.documents, repeats=args.repeats, seed=args.seed)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Resultados salvos em {args.output}")
+    
+    for name in ("legacy", "compiled"):
+        result = report[name]
+        print(f"- {name:8s} {result['docs_per_second']:10.0f} docs/s {result['us_per_doc']:8.1f} us/doc")
+    print(f"Aceleração: {report['speedup']:.2f}x")
+    print(f"Documentos com métricas diferentes: {report['metric_mismatches']}; "
+          f"com flags de palavras-chave diferentes: {report['keyword_flag_differences']}")
@@ -1,20 +1,97 @@
-import spacy
 import re
+import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
 
-# Carregar o modelo de linguagem spaCy (menor para protótipo)
+# Modelo de linguagem spaCy (menor para protótipo)
 # Certifique-se de ter baixado: python -m spacy download pt_core_news_sm
-try:
-    nlp = spacy.load("pt_core_news_sm")
-except OSError:
-    print("Modelo pt_core_news_sm não encontrado. Baixe-o com: python -m spacy download pt_core_news_sm")
-    # Tentar carregar um modelo maior como fallback ou instruir o usuário
-    # nlp = spacy.load("pt_core_news_lg") # Alternativa maior
-    exit()
+DEFAULT_SPACY_MODEL = "pt_core_news_sm"
+
+# Versão da extração, incluída na chave do cache de resultados; incrementar quando
+# os padrões ou a estrutura do resultado mudarem
+PARSER_VERSION = "1"
+
+# Modelos spaCy carregados sob demanda, no máximo uma vez por processo
+# (None registra que o modelo não pôde ser carregado)
+_nlp_models: Dict[str, Any] = {}
+_nlp_lock = threading.Lock()
+
+def get_nlp(model_name: str = DEFAULT_SPACY_MODEL):
+    with _nlp_lock:
+        if model_name not in _nlp_models:
+            try:
+                import spacy
+                _nlp_models[model_name] = spacy.load(model_name)
+            except ImportError:
+                print("spaCy não instalado. Usando apenas extração por regex.")
+                _nlp_models[model_name] = None
+            except OSError:
+                print(f"Modelo {model_name} não encontrado. Baixe-o com: python -m spacy download {model_name}")
+                print("Usando apenas extração por regex.")
+                # Alternativa maior: pt_core_news_lg
+                _nlp_models[model_name] = None
+        return _nlp_models[model_name]
+
+# Componentes do pipeline que produzem doc.ents; os demais são desativados no processamento
+ENTITY_COMPONENTS = ("ner", "entity_ruler")
+
+MONEY_KEYS = ("budget", "actual_cost")
+NUMERIC_KEYS = ("completion_percentage", "spi", "cpi", "delay_days")
+METRIC_KEYS = ("completion_percentage", "spi", "cpi", "budget", "actual_cost", "delay_days")
+
+# Listas de palavras-chave e a flag correspondente nas métricas
+KEYWORD_FLAGS = {
+    "scope_change_keywords": "scope_change_detected",
+    "risk_keywords": "risk_detected"
+}
+
+def convert_value(pattern_key: str, raw: str) -> Any:
+    if pattern_key in MONEY_KEYS:
+        # Limpar e converter valor monetário
+        return float(raw.replace(".", "").replace(",", "."))
+    elif pattern_key in NUMERIC_KEYS:
+        return float(raw.replace(",", "."))
+    return raw
+
+def _lowercase_pattern(pattern: str) -> str:
+    # Converte os literais do padrão para minúsculas, preservando escapes como \d e \s
+    return re.sub(r"\\.|[^\\]+", lambda m: m.group() if m.group().startswith("\\") else m.group().lower(), pattern)
+
+class StatusExtractor:
+    # Extrai todas as métricas e flags de palavras-chave de um texto com padrões
+    # pré-compilados. O texto é convertido para minúsculas uma única vez e os padrões,
+    # também em minúsculas, são buscados sem re.IGNORECASE, o que mantém a busca
+    # rápida por prefixo literal do módulo re. Cada lista de palavras-chave vira uma
+    # única regex (as palavras-chave são tratadas como regex, não como substrings).
+    def __init__(self, patterns: Dict[str, Any]):
+        self.compiled: Dict[str, Any] = {}
+        self.keyword_keys = set()
+        for key, pattern in patterns.items():
+            if isinstance(pattern, list):
+                pattern = "|".join(f"(?:{keyword})" for keyword in pattern)
+                self.keyword_keys.add(key)
+            self.compiled[key] = re.compile(_lowercase_pattern(pattern))
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        # Primeira ocorrência de cada padrão; chaves não encontradas ficam de fora
+        lowered = text.lower()
+        found: Dict[str, Any] = {}
+        for key, regex in self.compiled.items():
+            match = regex.search(lowered)
+            if match:
+                found[key] = True if key in self.keyword_keys else convert_value(key, match.group(1))
+        return found
 
 class StatusTextProcessor:
-    def __init__(self):
+    def __init__(self, use_spacy: bool = True, model_name: str = DEFAULT_SPACY_MODEL, result_cache=None):
+        # use_spacy=False ativa o modo rápido: apenas regex, sem carregar o spaCy
+        # (sem entidades, data do relatório e gerente)
+        self.use_spacy = use_spacy
+        self.model_name = model_name
+        # Cache persistente opcional (ex.: ResultCache), com make_key, get e put;
+        # arquivos com conteúdo já processado não passam de novo pelo spaCy
+        self.result_cache = result_cache
+
         # Padrões regex para extrair informações comuns
         self.patterns = {
             "project_id": r"PROJ[ -]?(\d+)",
@@ -27,18 +104,22 @@ class StatusTextProcessor:
             "scope_change_keywords": ["mudan[cç]a de escopo", "altera[cç][aã]o de escopo", "escopo alterado"],
             "risk_keywords": ["risco identificado", "novo risco", "amea[cç]a", "problema potencial"]
         }
+        self.extractor = StatusExtractor(self.patterns)
 
-    def _extract_with_regex(self, text: str, pattern_key: str) -> Optional[Any]:
-        match = re.search(self.patterns[pattern_key], text, re.IGNORECASE)
-        if match:
-            if pattern_key in ["budget", "actual_cost"]:
-                # Limpar e converter valor monetário
-                value_str = match.group(1).replace(".", "").replace(",", ".")
-                return float(value_str)
-            elif pattern_key in ["completion_percentage", "spi", "cpi", "delay_days"]:
-                return float(match.group(1).replace(",", "."))
-            return match.group(1)
-        return None
+    def extract_metrics(self, text: str) -> Dict[str, Any]:
+        return self._metrics_from(self.extractor.extract(text))
+
+    def _metrics_from(self, found: Dict[str, Any]) -> Dict[str, Any]:
+        # Métricas ausentes no texto não entram no dicionário
+        metrics = {key: found[key] for key in METRIC_KEYS if key in found}
+        for keywords_key, flag in KEYWORD_FLAGS.items():
+            metrics[flag] = keywords_key in found
+        return metrics
+
+    @property
+    def nlp(self):
+        # O modelo só é carregado no primeiro processamento que precisar dele
+        return get_nlp(self.model_name) if self.use_spacy else None
 
     def _extract_entities(self, doc) -> Dict[str, list]:
         entities = {
@@ -47,6 +128,8 @@ class StatusTextProcessor:
             "persons": [],
             "locations": []
         }
+        if doc is None:
+            return entities
         for ent in doc.ents:
             if ent.label_ == "DATE":
                 entities["dates"].append(ent.text)
@@ -58,43 +141,98 @@ class StatusTextProcessor:
                 entities["locations"].append(ent.text)
         return entities
 
+    def _unused_components(self, nlp) -> List[str]:
+        # Manter apenas o reconhecimento de entidades e os componentes que ele escuta (ex.: tok2vec)
+        needed = {name for name in nlp.pipe_names if name in ENTITY_COMPONENTS}
+        for name in nlp.pipe_names:
+            listeners = getattr(nlp.get_pipe(name), "listening_components", [])
+            if needed & set(listeners):
+                needed.add(name)
+        return [name for name in nlp.pipe_names if name not in needed]
+
+    def _cache_key(self, text: str) -> str:
+        mode = self.model_name if self.use_spacy else "regex"
+        return self.result_cache.make_key("status_text_processor", PARSER_VERSION, mode, text)
+
+    def _read_status_files(self, paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        # Lê os arquivos sob demanda. Arquivos com erro ou já presentes no cache seguem
+        # com texto vazio e o erro ou o resultado armazenado no contexto
+        for file_path in paths:
+            context = {"file_path": file_path, "error": None, "cached": None, "cache_key": None}
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                context["error"] = f"Arquivo não encontrado: {file_path}"
+                yield "", context
+                continue
+            except Exception as e:
+                context["error"] = f"Erro ao ler arquivo {file_path}: {e}"
+                yield "", context
+                continue
+
+            if self.result_cache is not None:
+                context["cache_key"] = self._cache_key(text)
+                context["cached"] = self.result_cache.get(context["cache_key"])
+                if context["cached"] is not None:
+                    yield "", context
+                    continue
+            yield text, context
+
+    def _finish_result(self, text: str, doc, context: Dict[str, Any]) -> Dict[str, Any]:
+        if context["error"] is not None:
+            return {"error": context["error"], "status": "error"}
+        if context["cached"] is not None:
+            # O mesmo conteúdo pode estar em outro arquivo
+            result = context["cached"]
+            result["project_info"]["file_path"] = context["file_path"]
+            return result
+        result = self._build_result(context["file_path"], text, doc)
+        if context["cache_key"] is not None:
+            self.result_cache.put(context["cache_key"], result)
+        return result
+
     def process_status_file(self, file_path: str) -> Dict[str, Any]:
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-        except FileNotFoundError:
-            return {"error": f"Arquivo não encontrado: {file_path}", "status": "error"}
-        except Exception as e:
-            return {"error": f"Erro ao ler arquivo {file_path}: {e}", "status": "error"}
+        return next(self.process_status_files([file_path], batch_size=1))
+
+    def process_status_files(self, paths: Iterable[str], batch_size: int = 64,
+                             n_process: int = 1) -> Iterator[Dict[str, Any]]:
+        # Processa os arquivos em lotes com nlp.pipe, executando apenas os componentes
+        # necessários para doc.ents; os resultados seguem a ordem de paths
+        nlp = self.nlp
+        if nlp is None:
+            # Modo rápido: somente regex
+            for text, context in self._read_status_files(paths):
+                yield self._finish_result(text, None, context)
+            return
 
-        doc = nlp(text)
+        docs = nlp.pipe(
+            self._read_status_files(paths),
+            as_tuples=True,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=self._unused_components(nlp)
+        )
+        for doc, context in docs:
+            yield self._finish_result(doc.text, doc, context)
 
+    def _build_result(self, file_path: str, text: str, doc) -> Dict[str, Any]:
         # Tentativa de extrair data e gerente
-        dates = [ent.text for ent in doc.ents if ent.label_ == "DATE"]
-        persons = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
+        entities = self._extract_entities(doc)
+        dates = entities["dates"]
+        persons = entities["persons"]
 
+        found = self.extractor.extract(text)
         extracted_info = {
             "file_path": file_path,
-            "project_id": self._extract_with_regex(text, "project_id"),
+            "project_id": found.get("project_id"),
             "report_date": dates[0] if dates else None,
             "manager": persons[0] if persons else None,
             "raw_text": text,
-            "entities": self._extract_entities(doc)
-        }
-
-        metrics = {
-            "completion_percentage": self._extract_with_regex(text, "completion_percentage"),
-            "spi": self._extract_with_regex(text, "spi"),
-            "cpi": self._extract_with_regex(text, "cpi"),
-            "budget": self._extract_with_regex(text, "budget"),
-            "actual_cost": self._extract_with_regex(text, "actual_cost"),
-            "delay_days": self._extract_with_regex(text, "delay_days"),
-            "scope_change_detected": any(keyword in text.lower() for keyword in self.patterns["scope_change_keywords"]),
-            "risk_detected": any(keyword in text.lower() for keyword in self.patterns["risk_keywords"])
+            "entities": entities
         }
 
-        # Remover chaves com valores None para limpeza
-        metrics = {k: v for k, v in metrics.items() if v is not None}
+        metrics = self._metrics_from(found)
 
         return {
             "project_info": extracted_info,
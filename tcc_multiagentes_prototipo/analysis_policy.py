@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import uuid
+from collections import defaultdict
+
+# Níveis de análise, do mais barato ao mais caro:
+# - static: apenas as recomendações por regras fixas (sem RAG e sem LLM)
+# - rag: regras fixas e orientações do PMBOK recuperadas pelo RAG (sem LLM)
+# - llm: regras fixas e recomendações do LLM com prompt aumentado pelo RAG
+ANALYSIS_TIERS = ("static", "rag", "llm")
+
+# Nível padrão por faixa de saúde (status de _evaluate_schedule_health/_evaluate_cost_health)
+DEFAULT_TIERS_BY_HEALTH = {
+    "excellent": "static",
+    "good": "static",
+    "warning": "rag",
+    "critical": "llm",
+    "severe": "llm",
+    "unknown": "static"
+}
+
+class AnalysisPolicy:
+    """
+    Política de níveis de análise: decide, para cada projeto, se as recomendações usam
+    apenas regras fixas, também o RAG, ou o LLM completo.
+    
+    O nível parte da faixa de saúde do projeto (tiers_by_health) e é ajustado pela
+    variação do índice (SPI/CPI) desde a última execução e pelo orçamento de chamadas
+    ao LLM da execução:
+    - índice praticamente inalterado (variação menor que change_threshold): o nível
+      llm é reduzido para rag;
+    - piora de pelo menos change_threshold: o nível sobe um degrau;
+    - orçamento de chamadas ao LLM esgotado: o nível llm é reduzido para rag.
+    
+    O último índice de cada projeto fica em um banco SQLite (state_path), para comparar
+    com a execução seguinte. As chamadas ao LLM da execução também são contadas no
+    banco, com o identificador da instância (run_id): as cópias da política enviadas aos
+    processos de um pool compartilham o mesmo orçamento quando state_path é um arquivo.
+    Com state_path=":memory:" o banco não é compartilhado entre processos, e a análise
+    de portfólio usa um pool de threads quando há orçamento.
+    """
+    
+    def __init__(self, tiers_by_health=None, llm_budget=None, change_threshold=0.05,
+                 state_path=":memory:"):
+        """
+        Inicializa a política.
+        
+        Args:
+            tiers_by_health: Nível por faixa de saúde (padrão: DEFAULT_TIERS_BY_HEALTH)
+            llm_budget: Número máximo de análises com LLM na execução (None: sem limite)
+            change_threshold: Variação mínima do índice considerada significativa
+            state_path: Caminho do SQLite com o último índice de cada projeto
+                (":memory:" compara apenas dentro da mesma execução)
+        """
+        self.tiers_by_health = dict(DEFAULT_TIERS_BY_HEALTH)
+        if tiers_by_health:
+            self.tiers_by_health.update(tiers_by_health)
+        for tier in self.tiers_by_health.values():
+            if tier not in ANALYSIS_TIERS:
+                raise ValueError(f"Nível de análise inválido: {tier}")
+        
+        self.llm_budget = llm_budget
+        self.change_threshold = change_threshold
+        self.state_path = state_path
+        # Identifica a execução no banco; copiado para os processos do pool
+        self.run_id = uuid.uuid4().hex
+        self._open()
+    
+    def _open(self):
+        """
+        Abre o banco de estado e zera os contadores da execução.
+        """
+        if self.state_path != ":memory:" and os.path.dirname(self.state_path):
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        
+        self._lock = threading.Lock()
+        # Vários processos do pool podem gravar no mesmo banco: aguardar o bloqueio
+        self._conn = sqlite3.connect(self.state_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS project_metrics ("
+            "domain TEXT NOT NULL, project TEXT NOT NULL, metric REAL NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (domain, project))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_budget_usage (run_id TEXT PRIMARY KEY, calls INTEGER NOT NULL)"
+        )
+        self._conn.execute("INSERT OR IGNORE INTO llm_budget_usage (run_id, calls) VALUES (?, 0)", (self.run_id,))
+        self._conn.commit()
+        
+        self.tier_counts = {tier: 0 for tier in ANALYSIS_TIERS}
+    
+    def __getstate__(self):
+        # A conexão não é serializável; cada processo abre a sua (ex.: pool de portfólio)
+        return {
+            "tiers_by_health": self.tiers_by_health,
+            "llm_budget": self.llm_budget,
+            "change_threshold": self.change_threshold,
+            "state_path": self.state_path,
+            "run_id": self.run_id
+        }
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+    
+    def signature(self):
+        """
+        Identifica a configuração da política (usada na chave do cache de resultados).
+        
+        Returns:
+            Texto JSON com a configuração
+        """
+        # O run_id muda a cada execução e não altera a decisão
+        state = self.__getstate__()
+        del state["run_id"]
+        return json.dumps(state, sort_keys=True)
+    
+    def _reserve_llm_call(self):
+        """
+        Reserva uma chamada ao LLM no orçamento da execução, de forma atômica no banco
+        (chamado com self._lock).
+        
+        Returns:
+            True se a chamada couber no orçamento
+        """
+        cursor = self._conn.execute(
+            "UPDATE llm_budget_usage SET calls = calls + 1 WHERE run_id = ? AND (? IS NULL OR calls < ?)",
+            (self.run_id, self.llm_budget, self.llm_budget)
+        )
+        self._conn.commit()
+        return cursor.rowcount == 1
+    
+    def _llm_calls_used(self):
+        """
+        Retorna o número de chamadas ao LLM da execução, somando todos os processos
+        (chamado com self._lock).
+        
+        Returns:
+            Número de chamadas
+        """
+        row = self._conn.execute("SELECT calls FROM llm_budget_usage WHERE run_id = ?", (self.run_id,)).fetchone()
+        return row[0] if row else 0
+    
+    def decide(self, domain, project, metric, health_status, llm_available=True):
+        """
+        Escolhe o nível de análise de um projeto e registra o seu índice atual.
+        
+        Args:
+            domain: Domínio da análise (cronograma ou custos)
+            project: Identificador do projeto
+            metric: Índice atual (SPI ou CPI) ou None
+            health_status: Faixa de saúde (excellent, good, warning, critical, severe ou unknown)
+            llm_available: Se o agente tem uma interface LLM
+            
+        Returns:
+            Dicionário com o nível escolhido (tier), o nível da faixa de saúde (base_tier),
+            os motivos dos ajustes, o índice anterior, a variação e o uso do orçamento
+        """
+        base_tier = self.tiers_by_health.get(health_status, "static")
+        tier = base_tier
+        reasons = [f"faixa de saúde {health_status}: {base_tier}"]
+        
+        with self._lock:
+            previous = None
+            if metric is not None:
+                row = self._conn.execute(
+                    "SELECT metric FROM project_metrics WHERE domain = ? AND project = ?", (domain, project)
+                ).fetchone()
+                previous = row[0] if row else None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO project_metrics (domain, project, metric, updated_at) VALUES (?, ?, ?, ?)",
+                    (domain, project, metric, time.time())
+                )
+                self._conn.commit()
+            
+            # Variação desde a última execução
+            change = metric - previous if previous is not None else None
+            if change is not None:
+                if abs(change) < self.change_threshold and tier == "llm":
+                    tier = "rag"
+                    reasons.append(f"sem mudança significativa desde a última execução ({change:+.2f})")
+                elif change <= -self.change_threshold and tier != "llm":
+                    tier = ANALYSIS_TIERS[ANALYSIS_TIERS.index(tier) + 1]
+                    reasons.append(f"piora desde a última execução ({change:+.2f})")
+            
+            # Disponibilidade e orçamento do LLM
+            budget_limited = False
+            if tier == "llm" and not llm_available:
+                tier = "rag"
+                reasons.append("sem interface LLM")
+            elif tier == "llm" and not self._reserve_llm_call():
+                tier = "rag"
+                budget_limited = True
+                reasons.append(f"orçamento de chamadas ao LLM esgotado ({self.llm_budget})")
+            
+            self.tier_counts[tier] += 1
+            llm_calls = self._llm_calls_used()
+        
+        return {
+            "tier": tier,
+            "base_tier": base_tier,
+            "reasons": reasons,
+            "metric": metric,
+            "previous_metric": previous,
+            "change": change,
+            "budget_limited": budget_limited,
+            "llm_available": llm_available,
+            "llm_calls_used": llm_calls,
+            "llm_budget": self.llm_budget
+        }
+    
+    def stats(self):
+        """
+        Retorna as decisões tomadas pela instância na execução.
+        
+        Returns:
+            Dicionário com o número de decisões por nível na instância e o uso do
+            orçamento de LLM na execução (todos os processos)
+        """
+        with self._lock:
+            return {
+                "tiers": dict(self.tier_counts),
+                "llm_calls_used": self._llm_calls_used(),
+                "llm_budget": self.llm_budget
+            }
+    
+    def close(self):
+        """
+        Fecha a conexão com o banco de estado.
+        """
+        with self._lock:
+            self._conn.close()
+
+class TieredAnalysisMixin:
+    """
+    Escolha do nível de análise e recomendações do nível rag, comuns aos agentes.
+    
+    Os agentes que usam o mixin definem analysis_domain (cronograma ou custos),
+    metric_name (SPI ou CPI) e rag_query_template, e têm os atributos analysis_policy,
+    llm_interface e rag_system.
+    
+    O template da consulta do nível rag é formatado com metric_name, metric (o índice),
+    health (a descrição da faixa de saúde) e os campos de status do relatório (campos
+    ausentes ficam vazios).
+    """
+    
+    analysis_domain = None
+    metric_name = None
+    rag_query_template = "{metric_name} {metric:.2f}: {health}"
+    
+    def _choose_analysis_tier(self, metric, health, project_info, file_path):
+        """
+        Escolhe o nível de análise do projeto (static, rag ou llm).
+        
+        Args:
+            metric: Índice do projeto (SPI ou CPI) ou None
+            health: Avaliação da saúde do projeto no domínio do agente
+            project_info: Informações do projeto
+            file_path: Caminho do arquivo de status (identifica projetos sem id e nome)
+            
+        Returns:
+            Dicionário com o nível escolhido (tier) e os motivos da decisão
+        """
+        if self.analysis_policy is None:
+            return {
+                "tier": "llm" if self.llm_interface else "static",
+                "reasons": ["sem política de análise"],
+                "metric": metric,
+                "llm_available": self.llm_interface is not None
+            }
+        
+        project = project_info.get('id') or project_info.get('nome') or os.path.basename(file_path)
+        return self.analysis_policy.decide(
+            self.analysis_domain, project, metric, health["status"], llm_available=self.llm_interface is not None
+        )
+    
+    def _knowledge_recommendations(self, metric, health, status, top_k=2):
+        """
+        Gera recomendações do nível rag a partir dos trechos do PMBOK mais relevantes
+        para o projeto, sem chamada ao LLM.
+        
+        Args:
+            metric: Índice do projeto (SPI ou CPI)
+            health: Avaliação da saúde do projeto no domínio do agente
+            status: Campos de status do relatório
+            top_k: Número de trechos consultados
+            
+        Returns:
+            Lista de recomendações
+        """
+        fields = defaultdict(str, status)
+        fields.update(metric_name=self.metric_name, metric=metric, health=health.get("description", ""))
+        query = self.rag_query_template.format_map(fields)
+        
+        recommendations = []
+        for document in self.rag_system.query(query, top_k=top_k):
+            # Primeira frase do trecho, que resume a orientação
+            summary = document["content"].split(". ")[0].strip().rstrip(".")
+            recommendations.append(f"Aplicar as orientações do PMBOK sobre {document.get('title', 'o tema')}: {summary}")
+        
+        return recommendations
+
+def summarize_tiers(results):
+    """
+    Resume os níveis de análise registrados em resultados dos agentes (campo analysis_tier),
+    para medir a economia de custo e de latência da política.
+    
+    Args:
+        results: Resultados de analyze_schedule_file/analyze_cost_file (ex.: de analyze_directory)
+        
+    Returns:
+        Dicionário com o número de projetos e o tempo total e médio das recomendações
+        por nível, e o número de chamadas ao LLM evitadas em relação a usar sempre o LLM
+    """
+    summary = {tier: {"projects": 0, "seconds": 0.0} for tier in ANALYSIS_TIERS}
+    llm_calls_avoided = 0
+    for result in results:
+        decision = result.get("analysis_tier")
+        if not decision:
+            continue
+        tier_summary = summary[decision["tier"]]
+        tier_summary["projects"] += 1
+        tier_summary["seconds"] += decision.get("seconds", 0.0)
+        # Sem a política, todo projeto com índice conhecido e LLM disponível chamaria o LLM
+        if decision["tier"] != "llm" and decision.get("metric") is not None and decision.get("llm_available"):
+            llm_calls_avoided += 1
+    
+    for tier_summary in summary.values():
+        tier_summary["avg_seconds"] = (
+            tier_summary["seconds"] / tier_summary["projects"] if tier_summary["projects"] else None
+        )
+    summary["llm_calls_avoided"] = llm_calls_avoided
+    return summary
@@ -0,0 +1,387 @@
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+from datetime import datetime
+
+import numpy as np
+import faiss
+
+try:
+    import resource
+except ImportError:
+    # Windows: sem getrusage
+    resource = None
+
+try:
+    from .rag_system_pmbok import (
+        PMBOKRAGSystem, ALL_DOMAINS, INDEX_TYPES, RETRIEVAL_MODES, QUANTIZATION_TYPES
+    )
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from rag_system_pmbok import (
+        PMBOKRAGSystem, ALL_DOMAINS, INDEX_TYPES, RETRIEVAL_MODES, QUANTIZATION_TYPES
+    )
+
+# Conjunto rotulado de consultas por domínio: consulta -> ids dos documentos relevantes
+# da base de conhecimento padrão do PMBOK
+LABELED_QUERIES = {
+    "cronograma": [
+        {"query": "O projeto está com SPI de 0.85, indicando atraso no cronograma. Quais ações devem ser tomadas?",
+         "relevant": ["cronograma_006", "cronograma_007"]},
+        {"query": "Como identificar o caminho crítico e a folga das atividades?",
+         "relevant": ["cronograma_002"]},
+        {"query": "Quais técnicas encurtam o cronograma sem reduzir o escopo, como fast tracking e crashing?",
+         "relevant": ["cronograma_004", "cronograma_007"]},
+        {"query": "Como ajustar as datas das atividades quando os recursos são limitados?",
+         "relevant": ["cronograma_003"]},
+        {"query": "Como usar valor planejado e valor agregado para medir o progresso do cronograma?",
+         "relevant": ["cronograma_005"]}
+    ],
+    "custos": [
+        {"query": "O projeto está com CPI de 0.92, indicando desvio no orçamento. Quais ações devem ser tomadas?",
+         "relevant": ["custos_006", "custos_008"]},
+        {"query": "Como calcular a estimativa no término (EAC) e a variação no término (VAC)?",
+         "relevant": ["custos_007"]},
+        {"query": "Qual a diferença entre estimativa análoga, paramétrica e bottom-up?",
+         "relevant": ["custos_003"]},
+        {"query": "Como definir as reservas de contingência e de gerenciamento no orçamento?",
+         "relevant": ["custos_004"]},
+        {"query": "Quais são os custos diretos e indiretos de um projeto?",
+         "relevant": ["custos_002"]}
+    ],
+    "escopo": [
+        {"query": "O projeto teve uma mudança de escopo que impacta o cronograma em 15 dias. Como gerenciar essa mudança?",
+         "relevant": ["escopo_007", "escopo_008", "escopo_009"]},
+        {"query": "Como decompor o trabalho em pacotes na estrutura analítica do projeto?",
+         "relevant": ["escopo_003"]},
+        {"query": "Como obter a aceitação formal das entregas concluídas?",
+         "relevant": ["escopo_004"]},
+        {"query": "Como documentar e gerenciar os requisitos das partes interessadas?",
+         "relevant": ["escopo_006"]},
+        {"query": "Quais passos seguir para avaliar e aprovar uma solicitação de mudança?",
+         "relevant": ["escopo_009"]}
+    ],
+    "riscos": [
+        {"query": "O projeto tem 3 riscos de nível alto. Como priorizar as ações de mitigação?",
+         "relevant": ["riscos_003", "riscos_005"]},
+        {"query": "Como avaliar a probabilidade e o impacto dos riscos identificados?",
+         "relevant": ["riscos_003"]},
+        {"query": "Como fazer uma análise numérica do efeito combinado dos riscos, como simulação de Monte Carlo?",
+         "relevant": ["riscos_004"]},
+        {"query": "O que deve constar no registro de riscos?",
+         "relevant": ["riscos_008"]},
+        {"query": "Quais categorias de riscos técnicos, externos e organizacionais considerar?",
+         "relevant": ["riscos_009"]}
+    ]
+}
+
+def percentile_ms(latencies, q):
+    """
+    Calcula um percentil das latências.
+    
+    Args:
+        latencies: Lista de latências em segundos
+        q: Percentil (0-100)
+        
+    Returns:
+        Latência em milissegundos
+    """
+    return float(np.percentile(latencies, q) * 1000) if latencies else None
+
+def ranked_doc_ids(results):
+    """
+    Converte os trechos retornados em ids de documentos, sem repetição e na ordem.
+    
+    Args:
+        results: Lista de resultados de query_batch para uma consulta
+        
+    Returns:
+        Lista de ids de documentos
+    """
+    doc_ids = []
+    for result in results:
+        doc_id = result["document"]["id"]
+        if doc_id not in doc_ids:
+            doc_ids.append(doc_id)
+    return doc_ids
+
+def evaluate_queries(rag_system, labeled_queries, top_k=3, repeats=3):
+    """
+    Mede a qualidade e a latência da recuperação sobre o conjunto rotulado.
+    
+    Cada consulta é executada repeats vezes, uma a uma; a qualidade é calculada
+    na primeira execução e a latência considera todas.
+    
+    Args:
+        rag_system: Instância de PMBOKRAGSystem com todos os domínios
+        labeled_queries: Dicionário domínio -> lista de {"query", "relevant"}
+        top_k: Número de trechos recuperados por consulta
+        repeats: Número de execuções de cada consulta
+        
+    Returns:
+        Dicionário com recall@k, MRR e percentis de latência, no total e por domínio
+    """
+    latencies = []
+    per_domain = {}
+    all_recalls = []
+    all_reciprocal_ranks = []
+    
+    for domain, queries in labeled_queries.items():
+        recalls = []
+        reciprocal_ranks = []
+        for item in queries:
+            for repeat in range(repeats):
+                start = time.perf_counter()
+                results = rag_system.query_batch([item["query"]], top_k=top_k, domain=domain)[0]
+                latencies.append(time.perf_counter() - start)
+                if repeat == 0:
+                    doc_ids = ranked_doc_ids(results)
+            
+            relevant = set(item["relevant"])
+            recalls.append(len(relevant & set(doc_ids)) / len(relevant))
+            rank = next((position for position, doc_id in enumerate(doc_ids, 1) if doc_id in relevant), None)
+            reciprocal_ranks.append(1 / rank if rank else 0.0)
+        
+        per_domain[domain] = {
+            f"recall@{top_k}": float(np.mean(recalls)),
+            "mrr": float(np.mean(reciprocal_ranks)),
+            "num_queries": len(queries)
+        }
+        all_recalls.extend(recalls)
+        all_reciprocal_ranks.extend(reciprocal_ranks)
+    
+    return {
+        f"recall@{top_k}": float(np.mean(all_recalls)) if all_recalls else None,
+        "mrr": float(np.mean(all_reciprocal_ranks)) if all_reciprocal_ranks else None,
+        "latency_ms": {
+            "p50": percentile_ms(latencies, 50),
+            "p95": percentile_ms(latencies, 95),
+            "p99": percentile_ms(latencies, 99),
+            "mean": float(np.mean(latencies) * 1000) if latencies else None
+        },
+        "num_queries": len(all_recalls),
+        "num_executions": len(latencies),
+        "domains": per_domain
+    }
+
+def process_memory():
+    """
+    Mede a memória residente do processo atual.
+    
+    No Linux, lê de /proc/self/status a memória residente total (VmRSS) e a parte
+    anônima (RssAnon), que exclui as páginas de arquivos mapeados em memória, como um
+    índice aberto com mmap. Nos demais sistemas, usa o pico de memória residente de
+    resource.getrusage (rss_anon_bytes fica None).
+    
+    Returns:
+        Dicionário com rss_bytes e rss_anon_bytes (None se indisponível)
+    """
+    memory = {"rss_bytes": None, "rss_anon_bytes": None}
+    try:
+        with open("/proc/self/status", 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss_bytes"] = int(line.split()[1]) * 1024
+                elif line.startswith("RssAnon:"):
+                    memory["rss_anon_bytes"] = int(line.split()[1]) * 1024
+    except OSError:
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss é dado em bytes no macOS e em KB nos demais sistemas
+            memory["rss_bytes"] = peak if sys.platform == "darwin" else peak * 1024
+    return memory
+
+def measure_memory(rag_system, baseline=None):
+    """
+    Mede a memória ocupada pelo índice do sistema RAG.
+    
+    O tamanho serializado do índice e dos embeddings mede o custo em disco/RAM do índice
+    isolado; a variação da memória residente do processo (em relação a baseline, medido
+    antes da construção) mede o custo real, que difere principalmente com mmap, em que
+    os vetores ficam em páginas de arquivo compartilhadas e não em memória anônima.
+    
+    Args:
+        rag_system: Instância de PMBOKRAGSystem
+        baseline: Memória do processo antes da construção (resultado de process_memory)
+        
+    Returns:
+        Dicionário com o tamanho do índice FAISS serializado e dos embeddings, em bytes,
+        e a variação da memória residente total e anônima do processo
+    """
+    index_bytes = 0
+    if rag_system.index is not None:
+        index_bytes = int(faiss.serialize_index(rag_system.index).nbytes)
+    embeddings_bytes = int(rag_system.embeddings.nbytes) if rag_system.embeddings is not None else 0
+    
+    memory = {
+        "index_bytes": index_bytes,
+        "embeddings_bytes": embeddings_bytes,
+        "total_bytes": index_bytes + embeddings_bytes,
+        "rss_delta_bytes": None,
+        "rss_anon_delta_bytes": None
+    }
+    if baseline is not None:
+        current = process_memory()
+        for key in ("rss_bytes", "rss_anon_bytes"):
+            if current[key] is not None and baseline[key] is not None:
+                memory[key.replace("_bytes", "_delta_bytes")] = current[key] - baseline[key]
+    return memory
+
+def run_benchmark(knowledge_dir=None, index_types=INDEX_TYPES, cache_sizes=(0, 256),
+                  retrieval_modes=("dense", "hybrid"), labeled_queries=None, top_k=3, repeats=3,
+                  model_name="all-MiniLM-L6-v2", quantizations=(None,) + tuple(QUANTIZATION_TYPES),
+                  mmap_modes=(False, True)):
+    """
+    Executa o benchmark para todas as combinações de índice, quantização, mmap, cache
+    e modo de recuperação.
+    
+    Os índices são construídos em uma cópia da base de conhecimento, para que o tempo
+    de construção inclua a codificação. Sem mmap, não há persistência; com mmap, o índice
+    é salvo e reaberto mapeado em memória (arquivos anteriores são removidos antes de
+    cada construção). A quantização não se aplica ao ivfpq, que já é comprimido, e
+    essas combinações são omitidas.
+    
+    Args:
+        knowledge_dir: Diretório com a base de conhecimento (opcional; por padrão
+            usa a base padrão do PMBOK em um diretório temporário)
+        index_types: Tipos de índice avaliados
+        cache_sizes: Tamanhos de cache avaliados (0 desativa o cache)
+        retrieval_modes: Modos de recuperação avaliados
+        labeled_queries: Conjunto rotulado (opcional; por padrão LABELED_QUERIES)
+        top_k: Número de trechos recuperados por consulta
+        repeats: Número de execuções de cada consulta
+        model_name: Nome do modelo de embeddings
+        quantizations: Quantizações avaliadas (None mantém float32)
+        mmap_modes: Modos de abertura do índice avaliados (True abre com mmap)
+        
+    Returns:
+        Dicionário com o ambiente, os parâmetros e os resultados de cada combinação
+    """
+    labeled_queries = labeled_queries or LABELED_QUERIES
+    work_dir = tempfile.mkdtemp(prefix="rag_benchmark_")
+    if knowledge_dir:
+        shutil.copytree(knowledge_dir, work_dir, dirs_exist_ok=True)
+    
+    results = []
+    effective_model = model_name
+    try:
+        variants = [
+            (index_type, quantization, mmap)
+            for index_type in index_types
+            for quantization in quantizations
+            for mmap in mmap_modes
+            if not (index_type == "ivfpq" and quantization is not None)
+        ]
+        for index_type, quantization, mmap in variants:
+            for retrieval_mode in retrieval_modes:
+                for cache_size in cache_sizes:
+                    # Liberar o sistema anterior antes de medir a memória de base
+                    rag_system = None
+                    gc.collect()
+                    baseline = process_memory()
+                    
+                    start = time.perf_counter()
+                    rag_system = PMBOKRAGSystem(
+                        domain=ALL_DOMAINS, model_name=model_name, knowledge_dir=work_dir,
+                        persist_index=mmap, index_type=index_type, cache_size=cache_size,
+                        retrieval_mode=retrieval_mode, quantization=quantization, mmap=mmap
+                    )
+                    build_seconds = time.perf_counter() - start
+                    effective_model = rag_system.model_name
+                    
+                    metrics = evaluate_queries(rag_system, labeled_queries, top_k, repeats)
+                    results.append({
+                        "index_type": index_type,
+                        "quantization": quantization,
+                        "mmap": rag_system.index_mmapped,
+                        "retrieval_mode": rag_system.retrieval_mode,
+                        "cache_size": cache_size,
+                        "build_seconds": build_seconds,
+                        "num_chunks": len(rag_system.chunks),
+                        "memory": measure_memory(rag_system, baseline),
+                        "cache": rag_system.cache_stats(),
+                        **metrics
+                    })
+                    
+                    # O próximo sistema com mmap deve construir o índice, não reabrir este
+                    if mmap:
+                        for path in rag_system._index_paths():
+                            if os.path.exists(path):
+                                os.remove(path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "faiss": getattr(faiss, "__version__", None),
+            "model_name": effective_model
+        },
+        "settings": {
+            "top_k": top_k,
+            "repeats": repeats,
+            "index_types": list(index_types),
+            "quantizations": list(quantizations),
+            "mmap_modes": list(mmap_modes),
+            "cache_sizes": list(cache_sizes),
+            "retrieval_modes": list(retrieval_modes),
+            "num_queries": sum(len(queries) for queries in labeled_queries.values())
+        },
+        "results": results
+    }
+
+if __name__ == "__main__":
+    # Configurar argumentos de linha de comando
+    parser = argparse.ArgumentParser(description='Benchmark de qualidade e latência do sistema RAG do PMBOK')
+    parser.add_argument('--knowledge-dir', help='Diretório com a base de conhecimento (padrão: base padrão do PMBOK)')
+    parser.add_argument('--queries', help='Arquivo JSON com o conjunto rotulado (domínio -> [{"query", "relevant"}])')
+    parser.add_argument('--index-types', nargs='+', choices=INDEX_TYPES, default=list(INDEX_TYPES),
+                        help='Tipos de índice avaliados')
+    parser.add_argument('--cache-sizes', nargs='+', type=int, default=[0, 256], help='Tamanhos de cache avaliados')
+    parser.add_argument('--modes', nargs='+', choices=RETRIEVAL_MODES, default=['dense', 'hybrid'],
+                        help='Modos de recuperação avaliados')
+    parser.add_argument('--quantizations', nargs='+', choices=['none'] + list(QUANTIZATION_TYPES),
+                        default=['none'] + list(QUANTIZATION_TYPES), help='Quantizações avaliadas (none: float32)')
+    parser.add_argument('--mmap-modes', nargs='+', choices=['off', 'on'], default=['off', 'on'],
+                        help='Abertura do índice avaliada (on: mapeado em memória)')
+    parser.add_argument('--top-k', type=int, default=3, help='Trechos recuperados por consulta')
+    parser.add_argument('--repeats', type=int, default=3, help='Execuções de cada consulta')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help='Modelo de embeddings')
+    parser.add_argument('--output', default='rag_benchmark.json', help='Arquivo JSON de saída')
+    
+    args = parser.parse_args()
+    
+    labeled_queries = None
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            labeled_queries = json.load(f)
+    
+    report = run_benchmark(
+        knowledge_dir=args.knowledge_dir, index_types=args.index_types, cache_sizes=args.cache_sizes,
+        retrieval_modes=args.modes, labeled_queries=labeled_queries, top_k=args.top_k,
+        repeats=args.repeats, model_name=args.model,
+        quantizations=[None if q == 'none' else q for q in args.quantizations],
+        mmap_modes=[mode == 'on' for mode in args.mmap_modes]
+    )
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    recall_key = f"recall@{args.top_k}"
+    for result in report["results"]:
+        memory = result['memory']
+        print(f"- {result['index_type']:5s} {result['quantization'] or 'float32':7s} "
+              f"mmap={'on ' if result['mmap'] else 'off'} {result['retrieval_mode']:7s} cache={result['cache_size']:<4d} "
+              f"{recall_key}={result[recall_key]:.2f} MRR={result['mrr']:.2f} "
+              f"p50={result['latency_ms']['p50']:.2f} ms p99={result['latency_ms']['p99']:.2f} ms "
+              f"build={result['build_seconds']:.2f} s índice={memory['total_bytes']} bytes "
+              f"ΔRSS={memory['rss_delta_bytes']} ΔRSS anônima={memory['rss_anon_delta_bytes']} bytes")
+    print(f"\nResultados salvos em {args.output}")
@@ -0,0 +1,459 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import tempfile
+import argparse
+from datetime import datetime
+
+try:
+    from .status_parser import parse_status_report, REPORT_TYPES
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from status_parser import parse_status_report, REPORT_TYPES
+
+def legacy_extract_project_info(content):
+    """
+    Parser anterior das informações do projeto (duplicado em ScheduleAgent e CostAgent),
+    mantido como referência para o benchmark.
+    
+    Args:
+        content: Conteúdo do arquivo de status
+        
+    Returns:
+        Dicionário com informações do projeto
+    """
+    lines = content.split('\n')
+    project_info = {}
+    
+    # Extrair informações básicas
+    for line in lines[:10]:  # Verificar apenas as primeiras linhas
+        if "Projeto:" in line:
+            parts = line.split("Projeto:")[1].strip().split("(")
+            if len(parts) > 1:
+                project_info["nome"] = parts[0].strip()
+                project_info["id"] = parts[1].replace(")", "").strip()
+            else:
+                project_info["nome"] = parts[0].strip()
+        elif "Data:" in line:
+            project_info["data_relatorio"] = line.split("Data:")[1].strip()
+        elif "Gerente:" in line:
+            project_info["gerente"] = line.split("Gerente:")[1].strip()
+    
+    return project_info
+
+def legacy_extract_schedule_status(content):
+    """
+    Parser anterior do status do cronograma (ScheduleAgent), mantido como referência.
+    
+    Args:
+        content: Conteúdo do arquivo de status
+        
+    Returns:
+        Dicionário com status do cronograma
+    """
+    lines = content.split('\n')
+    schedule_status = {}
+    
+    # Extrair informações de status
+    for i, line in enumerate(lines):
+        if "Status atual:" in line:
+            schedule_status["status"] = line.split("Status atual:")[1].strip()
+        elif "Percentual de conclusão:" in line:
+            try:
+                percentual = line.split("Percentual de conclusão:")[1].strip()
+                schedule_status["percentual_conclusao"] = float(percentual.replace("%", ""))
+            except:
+                pass
+        elif "Data de início:" in line:
+            schedule_status["data_inicio"] = line.split("Data de início:")[1].strip()
+        elif "Data de término planejada:" in line:
+            schedule_status["data_termino_planejada"] = line.split("Data de término planejada:")[1].strip()
+        elif "Data de término real/prevista:" in line:
+            schedule_status["data_termino_real"] = line.split("Data de término real/prevista:")[1].strip()
+        elif "Atraso atual:" in line:
+            try:
+                atraso = line.split("Atraso atual:")[1].strip()
+                schedule_status["atraso_dias"] = int(atraso.split(" dias")[0])
+            except:
+                pass
+        elif "Motivo do atraso:" in line:
+            schedule_status["motivo_atraso"] = line.split("Motivo do atraso:")[1].strip()
+        elif "Índice de Desempenho de Cronograma (SPI):" in line:
+            try:
+                spi = line.split("Índice de Desempenho de Cronograma (SPI):")[1].strip()
+                schedule_status["spi"] = float(spi)
+            except:
+                pass
+        elif "Valor Planejado (PV):" in line:
+            try:
+                pv = line.split("Valor Planejado (PV):")[1].strip()
+                schedule_status["valor_planejado"] = float(pv.replace("R$", "").strip())
+            except:
+                pass
+        elif "Valor Agregado (EV):" in line:
+            try:
+                ev = line.split("Valor Agregado (EV):")[1].strip()
+                schedule_status["valor_agregado"] = float(ev.replace("R$", "").strip())
+            except:
+                pass
+    
+    # Extrair tarefas críticas e atrasadas
+    tarefas_criticas = []
+    tarefas_atrasadas = []
+    
+    in_critical_section = False
+    in_delayed_section = False
+    
+    for line in lines:
+        if "Tarefas críticas:" in line:
+            in_critical_section = True
+            in_delayed_section = False
+            continue
+        elif "Tarefas atrasadas:" in line:
+            in_critical_section = False
+            in_delayed_section = True
+            continue
+        elif line.strip() == "" or line.startswith("RELATÓRIO"):
+            in_critical_section = False
+            in_delayed_section = False
+            continue
+        
+        if in_critical_section and line.strip().startswith("-"):
+            tarefas_criticas.append(line.strip()[2:].strip())
+        elif in_delayed_section and line.strip().startswith("-"):
+            tarefas_atrasadas.append(line.strip()[2:].strip())
+    
+    schedule_status["tarefas_criticas"] = tarefas_criticas
+    schedule_status["tarefas_atrasadas"] = tarefas_atrasadas
+    
+    return schedule_status
+
+def legacy_extract_cost_status(content):
+    """
+    Parser anterior do status dos custos (CostAgent), mantido como referência.
+    
+    Args:
+        content: Conteúdo do arquivo de status
+        
+    Returns:
+        Dicionário com status dos custos
+    """
+    lines = content.split('\n')
+    cost_status = {}
+    
+    # Extrair informações de status
+    for i, line in enumerate(lines):
+        if "Orçamento inicial:" in line:
+            try:
+                orcamento = line.split("Orçamento inicial:")[1].strip()
+                cost_status["orcamento_inicial"] = float(orcamento.replace("R$", "").strip())
+            except:
+                pass
+        elif "Custo real atual:" in line:
+            try:
+                custo = line.split("Custo real atual:")[1].strip()
+                cost_status["custo_real"] = float(custo.replace("R$", "").strip())
+            except:
+                pass
+        elif "Desvio orçamentário:" in line:
+            try:
+                desvio = line.split("Desvio orçamentário:")[1].strip()
+                cost_status["desvio_orcamento"] = float(desvio.replace("%", "").strip())
+            except:
+                pass
+        elif "Índice de Desempenho de Custo (CPI):" in line:
+            try:
+                cpi = line.split("Índice de Desempenho de Custo (CPI):")[1].strip()
+                cost_status["cpi"] = float(cpi)
+            except:
+                pass
+        elif "Valor Agregado (EV):" in line:
+            try:
+                ev = line.split("Valor Agregado (EV):")[1].strip()
+                cost_status["valor_agregado"] = float(ev.replace("R$", "").strip())
+            except:
+                pass
+        elif "Estimativa para conclusão:" in line:
+            try:
+                etc = line.split("Estimativa para conclusão:")[1].strip()
+                cost_status["estimativa_conclusao"] = float(etc.replace("R$", "").strip())
+            except:
+                pass
+        elif "Estimativa no término (EAC):" in line:
+            try:
+                eac = line.split("Estimativa no término (EAC):")[1].strip()
+                cost_status["estimativa_termino"] = float(eac.replace("R$", "").strip())
+            except:
+                pass
+        elif "Variação no término (VAC):" in line:
+            try:
+                vac = line.split("Variação no término (VAC):")[1].strip()
+                cost_status["variacao_termino"] = float(vac.replace("R$", "").strip())
+            except:
+                pass
+    
+    # Extrair categorias de custos
+    categorias_custos = {}
+    in_categories_section = False
+    
+    for line in lines:
+        if "Detalhamento por categoria:" in line:
+            in_categories_section = True
+            continue
+        elif line.strip() == "" or line.startswith("RELATÓRIO"):
+            in_categories_section = False
+            continue
+        
+        if in_categories_section and line.strip().startswith("-"):
+            try:
+                parts = line.strip()[2:].split(":")
+                if len(parts) >= 2:
+                    categoria = parts[0].strip()
+                    valor_parts = parts[1].strip().split("(")
+                    valor = float(valor_parts[0].replace("R$", "").strip())
+                    
+                    if len(valor_parts) > 1:
+                        percentual = float(valor_parts[1].replace("%)", "").strip())
+                        categorias_custos[categoria] = {"valor": valor, "percentual": percentual}
+                    else:
+                        categorias_custos[categoria] = {"valor": valor}
+            except:
+                pass
+    
+    cost_status["categorias_custos"] = categorias_custos
+    
+    return cost_status
+
+def write_status_files(status_dir, num_projects=250, seed=42):
+    """
+    Gera arquivos de status sintéticos dos quatro tipos, no formato de gerar_dataset_expandido.
+    
+    Args:
+        status_dir: Diretório de saída
+        num_projects: Número de projetos (um arquivo de cada tipo por projeto)
+        seed: Semente do gerador aleatório
+        
+    Returns:
+        Dicionário tipo de relatório -> lista de caminhos
+    """
+    rng = random.Random(seed)
+    os.makedirs(status_dir, exist_ok=True)
+    paths = {report_type: [] for report_type in REPORT_TYPES}
+    
+    for i in range(1, num_projects + 1):
+        project_id = f"PROJ-{i:04d}"
+        header = (f"Projeto: Sistema de Gestão {i} ({project_id})\n"
+                  f"Data: 15/04/2025\nGerente: Gerente {i % 17}\n\n")
+        spi = rng.uniform(0.6, 1.2)
+        cpi = rng.uniform(0.6, 1.2)
+        custo_real = rng.uniform(1e5, 1e6)
+        contents = {
+            "cronograma": (
+                f"RELATÓRIO DE STATUS DE CRONOGRAMA\n{header}"
+                f"Status atual: {'Atrasado' if spi < 0.95 else 'No prazo'}\n"
+                f"Percentual de conclusão: {rng.uniform(5, 100):.1f}%\n"
+                f"Data de início: 10/01/2025\nData de término planejada: 30/06/2025\n"
+                f"Data de término real/prevista: 15/07/2025\n"
+                f"Atraso atual: {rng.randint(0, 60)} dias\nMotivo do atraso: Problemas técnicos\n"
+                f"Índice de Desempenho de Cronograma (SPI): {spi:.2f}\n"
+                f"Valor Planejado (PV): R$ {rng.uniform(1e5, 1e6):.2f}\n"
+                f"Valor Agregado (EV): R$ {rng.uniform(1e5, 1e6):.2f}\n\n"
+                "Tarefas críticas:\n" + "".join(f"- Tarefa {j}\n" for j in range(rng.randint(1, 6))) +
+                "\nTarefas atrasadas:\n" + "".join(f"- Tarefa {j}\n" for j in range(rng.randint(0, 4)))
+            ),
+            "custos": (
+                f"RELATÓRIO DE STATUS DE CUSTOS\n{header}"
+                f"Orçamento inicial: R$ {rng.uniform(1e5, 1e6):.2f}\n"
+                f"Custo real atual: R$ {custo_real:.2f}\n"
+                f"Desvio orçamentário: {rng.uniform(-20, 20):.2f}%\n"
+                f"Índice de Desempenho de Custo (CPI): {cpi:.2f}\n"
+                f"Valor Agregado (EV): R$ {custo_real * cpi:.2f}\n"
+                f"Estimativa para conclusão: R$ {rng.uniform(1e5, 1e6):.2f}\n"
+                f"Estimativa no término (EAC): R$ {rng.uniform(1e5, 1e6):.2f}\n"
+                f"Variação no término (VAC): R$ {rng.uniform(-1e5, 1e5):.2f}\n\n"
+                "Detalhamento por categoria:\n" +
+                "".join(f"- {categoria}: R$ {custo_real * share:.2f} ({share * 100:.1f}%)\n"
+                        for categoria, share in (("Pessoal", 0.5), ("Equipamentos", 0.15), ("Software", 0.1),
+                                                 ("Serviços", 0.2), ("Outros", 0.05)))
+            ),
+            "escopo": (
+                f"RELATÓRIO DE STATUS DE ESCOPO\n{header}"
+                f"Escopo original: Sistema para gestão {i}\nHouve mudança de escopo: {rng.choice(['Sim', 'Não'])}\n"
+                f"Descrição das mudanças: Novos requisitos de segurança\n"
+                f"Impacto no cronograma: {rng.randint(0, 30)} dias\n"
+                f"Impacto no custo: R$ {rng.uniform(0, 1e5):.2f}\n\n"
+                "Solicitações de mudança:\n" + "".join(f"- SCM-{j:02d}: Mudança {j}\n" for j in range(rng.randint(0, 4))) +
+                "\nRequisitos atuais:\n" + "".join(f"- REQ-{j:02d}: Requisito {j}\n" for j in range(rng.randint(5, 12)))
+            ),
+            "riscos": (
+                f"RELATÓRIO DE STATUS DE RISCOS\n{header}"
+                "Riscos identificados:\n" +
+                "".join(f"- R{j:02d}: Risco {j}\n"
+                        f"  Probabilidade: {rng.randint(1, 5)}/5, Impacto: {rng.randint(1, 5)}/5, Nível: Alto\n"
+                        f"  Mitigação: Mitigação {j}\n  Contingência: Contingência {j}\n\n"
+                        for j in range(1, rng.randint(2, 7))) +
+                "Riscos ocorridos:\n- R01 (ocorrido em 05/04/2025)\n"
+                "  Impacto real: Atraso de 2 semanas\n  Ações tomadas: Plano de contingência\n\n"
+            )
+        }
+        for report_type, content in contents.items():
+            path = os.path.join(status_dir, f"{project_id}_{report_type}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            paths[report_type].append(path)
+    
+    return paths
+
+def files_per_second(parse, paths, repeats=3, contents=None):
+    """
+    Mede a vazão de leitura e conversão de arquivos de status.
+    
+    Args:
+        parse: Função que recebe o conteúdo de um arquivo
+        paths: Caminhos dos arquivos
+        repeats: Número de passagens; vale a mais rápida
+        contents: Conteúdos já lidos dos arquivos (opcional; mede apenas a conversão)
+        
+    Returns:
+        Arquivos por segundo
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if contents is not None:
+            for content in contents:
+                parse(content)
+        else:
+            for path in paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    parse(f.read())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(paths) / best
+
+def legacy_parse(report_type):
+    """
+    Retorna o parser anterior de um tipo de relatório (apenas cronograma e custos tinham parser).
+    
+    Args:
+        report_type: Tipo do relatório
+        
+    Returns:
+        Função que recebe o conteúdo e retorna (project_info, status), ou None
+    """
+    extract_status = {
+        "cronograma": legacy_extract_schedule_status,
+        "custos": legacy_extract_cost_status
+    }.get(report_type)
+    if extract_status is None:
+        return None
+    return lambda content: (legacy_extract_project_info(content), extract_status(content))
+
+def run_parser_benchmark(num_projects=250, repeats=5, status_dir=None, seed=42):
+    """
+    Compara a vazão (arquivos/s) do parser unificado com os parsers anteriores dos agentes,
+    incluindo a leitura dos arquivos e considerando apenas a conversão dos conteúdos.
+    
+    Também verifica se, para cronograma e custos, o parser unificado produz as
+    mesmas informações do projeto e o mesmo status que os parsers anteriores.
+    
+    Args:
+        num_projects: Número de projetos sintéticos (ignorado se status_dir for informado)
+        repeats: Número de passagens por parser
+        status_dir: Diretório com arquivos <projeto>_<tipo>.txt existentes (opcional)
+        seed: Semente do gerador aleatório
+        
+    Returns:
+        Dicionário com o relatório do benchmark
+    """
+    temp_dir = None
+    if status_dir is None:
+        temp_dir = tempfile.mkdtemp(prefix="status_parser_benchmark_")
+        paths = write_status_files(temp_dir, num_projects, seed)
+    else:
+        paths = {
+            report_type: sorted(os.path.join(status_dir, name) for name in os.listdir(status_dir)
+                                if name.endswith(f"_{report_type}.txt"))
+            for report_type in REPORT_TYPES
+        }
+    
+    try:
+        results = {}
+        for report_type in REPORT_TYPES:
+            if not paths[report_type]:
+                continue
+            
+            # A primeira leitura também aquece o cache de arquivos do sistema operacional
+            contents = []
+            for path in paths[report_type]:
+                with open(path, 'r', encoding='utf-8') as f:
+                    contents.append(f.read())
+            
+            parsers = {"unified": lambda content: parse_status_report(content, report_type)}
+            legacy = legacy_parse(report_type)
+            if legacy is not None:
+                parsers["legacy"] = legacy
+            
+            result = {"files": len(paths[report_type])}
+            for name, parse in parsers.items():
+                result[f"{name}_files_per_second"] = files_per_second(parse, paths[report_type], repeats)
+                result[f"{name}_parse_files_per_second"] = files_per_second(
+                    parse, paths[report_type], repeats, contents
+                )
+            
+            if legacy is not None:
+                result["speedup"] = result["unified_files_per_second"] / result["legacy_files_per_second"]
+                result["parse_speedup"] = (result["unified_parse_files_per_second"] /
+                                           result["legacy_parse_files_per_second"])
+                result["mismatches"] = sum(
+                    1 for content in contents
+                    if tuple(parse_status_report(content, report_type)[key] for key in ("project_info", "status"))
+                    != legacy(content)
+                )
+            
+            results[report_type] = result
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "repeats": repeats,
+        "results": results
+    }
+
+if __name__ == "__main__":
+    # Configurar argumentos de linha de comando
+    parser = argparse.ArgumentParser(description='Benchmark de vazão do parser de relatórios de status')
+    parser.add_argument('--status-dir', help='Diretório com arquivos de status (padrão: arquivos sintéticos)')
+    parser.add_argument('--projects', type=int, default=250, help='Número de projetos sintéticos')
+    parser.add_argument('--repeats', type=int, default=5, help='Passagens por parser')
+    parser.add_argument('--output', help='Arquivo JSON de saída (opcional)')
+    
+    args = parser.parse_args()
+    
+    report = run_parser_benchmark(num_projects=args.projects, repeats=args.repeats, status_dir=args.status_dir)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Resultados salvos em {args.output}")
+    
+    for report_type, result in report["results"].items():
+        line = (f"- {report_type:10s} {result['files']} arquivos, unificado "
+                f"{result['unified_files_per_second']:8.0f} arquivos/s "
+                f"(conversão {result['unified_parse_files_per_second']:8.0f})")
+        if "legacy_files_per_second" in result:
+            line += (f", anterior {result['legacy_files_per_second']:8.0f} arquivos/s "
+                     f"(conversão {result['legacy_parse_files_per_second']:8.0f}); "
+                     f"{result['speedup']:.2f}x, conversão {result['parse_speedup']:.2f}x, "
+                     f"{result['mismatches']} divergências")
+        print(line)
@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import json
+import glob
+import time
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+
+try:
+    from .rag_system_pmbok import (
+        PMBOKRAGSystem, KNOWLEDGE_DOMAINS, SHARED_DOMAIN, ALL_DOMAINS, INDEX_TYPES,
+        QUANTIZATION_TYPES, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP,
+        ARTIFACT_MANIFEST, ARTIFACT_LATEST
+    )
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from rag_system_pmbok import (
+        PMBOKRAGSystem, KNOWLEDGE_DOMAINS, SHARED_DOMAIN, ALL_DOMAINS, INDEX_TYPES,
+        QUANTIZATION_TYPES, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP,
+        ARTIFACT_MANIFEST, ARTIFACT_LATEST
+    )
+
+# Versão do formato do artefato, incrementada quando a estrutura do diretório mudar
+ARTIFACT_FORMAT_VERSION = 1
+
+_DOMAIN_FROM_FILENAME = re.compile(r"pmbok_(\w+)\.jsonl?$")
+
+def file_sha256(path):
+    """
+    Calcula o hash SHA-256 de um arquivo.
+    
+    Args:
+        path: Caminho do arquivo
+        
+    Returns:
+        Hash em hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_knowledge_file(path, default_domain=None):
+    """
+    Lê um arquivo de conhecimento JSON (lista de documentos ou {"documents": [...]})
+    ou JSONL (um documento por linha).
+    
+    O domínio de cada documento vem do campo "domain", do nome do arquivo
+    (pmbok_<domínio>.json) ou de default_domain, nessa ordem.
+    
+    Args:
+        path: Caminho do arquivo
+        default_domain: Domínio dos documentos sem domínio (opcional)
+        
+    Returns:
+        Lista de documentos
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".jsonl"):
+            documents = [json.loads(line) for line in f if line.strip()]
+        else:
+            documents = json.load(f)
+            if isinstance(documents, dict):
+                documents = documents.get("documents", [])
+    
+    match = _DOMAIN_FROM_FILENAME.search(os.path.basename(path))
+    file_domain = match.group(1) if match else default_domain
+    
+    valid_domains = KNOWLEDGE_DOMAINS + (SHARED_DOMAIN,)
+    for doc in documents:
+        missing = [field for field in ("id", "title", "content") if field not in doc]
+        if missing:
+            raise ValueError(f"Documento sem os campos {missing} em {path}")
+        doc.setdefault("domain", file_domain)
+        if doc["domain"] not in valid_domains:
+            raise ValueError(f"Domínio inválido '{doc['domain']}' no documento {doc['id']} de {path}. "
+                             f"Use um de {valid_domains} ou --domain")
+    
+    return documents
+
+def build_index_artifact(input_paths, output_dir, workers=1, default_domain=None, with_defaults=False,
+                         model_name="all-MiniLM-L6-v2", index_type="auto", hnsw_m=32, quantization=None,
+                         chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP):
+    """
+    Constrói uma versão do artefato de índice RAG a partir de arquivos de conhecimento.
+    
+    A versão é montada em um diretório temporário e publicada de uma vez,
+    atualizando o arquivo LATEST por último; os serviços a carregam com
+    load_index_artifact sem recodificar a base.
+    
+    Args:
+        input_paths: Caminhos dos arquivos de conhecimento (JSON ou JSONL)
+        output_dir: Diretório raiz dos artefatos
+        workers: Número de processos usados na codificação
+        default_domain: Domínio dos documentos sem domínio (opcional)
+        with_defaults: Se True, usa a base padrão do PMBOK nos domínios sem documentos
+        model_name: Nome do modelo de embeddings
+        index_type: Tipo do índice FAISS (flat, ivf, hnsw, ivfpq ou auto)
+        hnsw_m: Número de vizinhos por nó do grafo HNSW
+        quantization: Quantização escalar dos vetores (fp16, int8 ou None)
+        chunk_size: Número máximo de palavras por trecho
+        chunk_overlap: Número de palavras repetidas entre trechos consecutivos
+        
+    Returns:
+        Dicionário do manifesto da versão gerada
+    """
+    start = time.perf_counter()
+    
+    # Ler e validar os documentos de entrada
+    sources = []
+    documents = []
+    seen_ids = set()
+    for path in input_paths:
+        file_documents = read_knowledge_file(path, default_domain)
+        for doc in file_documents:
+            if doc["id"] in seen_ids:
+                raise ValueError(f"Documento duplicado: {doc['id']} ({path})")
+            seen_ids.add(doc["id"])
+        documents.extend(file_documents)
+        sources.append({"path": path, "sha256": file_sha256(path), "documents": len(file_documents)})
+    
+    os.makedirs(output_dir, exist_ok=True)
+    build_dir = os.path.join(output_dir, f".build-{os.getpid()}")
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    
+    try:
+        # Gravar um arquivo de conhecimento por domínio; sem --with-defaults, domínios
+        # sem documentos ficam vazios em vez de receber a base padrão
+        by_domain = {}
+        for doc in documents:
+            by_domain.setdefault(doc["domain"], []).append(doc)
+        for domain in KNOWLEDGE_DOMAINS + (SHARED_DOMAIN,):
+            if domain in by_domain or not with_defaults:
+                PMBOKRAGSystem._write_knowledge_file(
+                    os.path.join(build_dir, f"pmbok_{domain}.json"), by_domain.get(domain, [])
+                )
+        
+        # Construir e salvar o índice único, codificando em vários processos
+        index_start = time.perf_counter()
+        rag_system = PMBOKRAGSystem(
+            domain=ALL_DOMAINS, knowledge_dir=build_dir, model_name=model_name,
+            index_type=index_type, hnsw_m=hnsw_m, quantization=quantization,
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, encode_workers=workers
+        )
+        index_seconds = time.perf_counter() - index_start
+        
+        knowledge_hash = rag_system._knowledge_hash()
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{knowledge_hash[:12]}"
+        manifest = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "version": version,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "params": {
+                "model_name": rag_system.model_name,
+                "index_type": rag_system.resolved_index_type,
+                "hnsw_m": hnsw_m,
+                "quantization": quantization,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap
+            },
+            "knowledge_hash": knowledge_hash,
+            "embedding_size": rag_system.embedding_size,
+            "num_documents": len(rag_system.documents),
+            "num_chunks": len(rag_system.chunks),
+            "index": rag_system.describe_index(),
+            "sources": sources,
+            "files": {
+                name: file_sha256(os.path.join(build_dir, name))
+                for name in sorted(os.listdir(build_dir))
+            },
+            "workers": workers,
+            "index_seconds": index_seconds,
+            "build_seconds": time.perf_counter() - start
+        }
+        with open(os.path.join(build_dir, ARTIFACT_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        
+        # Publicar a versão e só então apontar LATEST para ela
+        version_dir = os.path.join(output_dir, version)
+        os.replace(build_dir, version_dir)
+        latest_file = os.path.join(output_dir, ARTIFACT_LATEST)
+        with open(latest_file + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(version + "\n")
+        os.replace(latest_file + ".tmp", latest_file)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    
+    return manifest
+
+def expand_inputs(patterns):
+    """
+    Expande os caminhos de entrada (arquivos, diretórios ou padrões glob).
+    
+    Args:
+        patterns: Lista de caminhos ou padrões
+        
+    Returns:
+        Lista ordenada de arquivos JSON/JSONL
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(glob.glob(os.path.join(pattern, "*.json")))
+            paths.extend(glob.glob(os.path.join(pattern, "*.jsonl")))
+        else:
+            paths.extend(glob.glob(pattern) or [pattern])
+    return sorted(set(paths))
+
+if __name__ == "__main__":
+    # Configurar argumentos de linha de comando
+    parser = argparse.ArgumentParser(description='Construção offline do índice RAG do PMBOK')
+    parser.add_argument('inputs', nargs='+', help='Arquivos JSON/JSONL de conhecimento, diretórios ou padrões glob')
+    parser.add_argument('--output', required=True, help='Diretório raiz dos artefatos de índice')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Número de processos usados na codificação')
+    parser.add_argument('--domain', choices=KNOWLEDGE_DOMAINS + (SHARED_DOMAIN,),
+                        help='Domínio dos documentos sem domínio no arquivo ou no nome do arquivo')
+    parser.add_argument('--with-defaults', action='store_true',
+                        help='Usar a base padrão do PMBOK nos domínios sem documentos')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help='Modelo de embeddings')
+    parser.add_argument('--index-type', choices=('auto',) + INDEX_TYPES, default='auto', help='Tipo do índice FAISS')
+    parser.add_argument('--hnsw-m', type=int, default=32, help='Vizinhos por nó do grafo HNSW')
+    parser.add_argument('--quantization', choices=tuple(QUANTIZATION_TYPES), help='Quantização escalar dos vetores')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Palavras por trecho')
+    parser.add_argument('--chunk-overlap', type=int, default=DEFAULT_CHUNK_OVERLAP,
+                        help='Palavras repetidas entre trechos consecutivos')
+    
+    args = parser.parse_args()
+    
+    manifest = build_index_artifact(
+        expand_inputs(args.inputs), args.output, workers=args.workers, default_domain=args.domain,
+        with_defaults=args.with_defaults, model_name=args.model, index_type=args.index_type,
+        hnsw_m=args.hnsw_m, quantization=args.quantization, chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap
+    )
+    
+    print(f"Artefato {manifest['version']} gerado em {os.path.join(args.output, manifest['version'])}")
+    print(f"- {manifest['num_documents']} documentos, {manifest['num_chunks']} trechos, "
+          f"índice {manifest['params']['index_type']}")
+    print(f"- Indexação: {manifest['index_seconds']:.2f} s com {manifest['workers']} processo(s); "
+          f"total {manifest['build_seconds']:.2f} s")
@@ -1,9 +1,17 @@
 import json
 import os
+import time
 from datetime import datetime
-from .rag_system_pmbok import PMBOKRAGSystem
+from .rag_system_pmbok import get_domain_rag_system
+from .status_parser import parse_status_report, STATUS_PARSER_VERSION
+from .portfolio import analyze_status_directory
+from .analysis_policy import TieredAnalysisMixin
 
-class CostAgent:
+# Versão da análise, incluída na chave do cache de resultados; incrementar quando a
+# extração ou a análise mudarem para invalidar os resultados armazenados
+ANALYSIS_VERSION = "3"
+
+class CostAgent(TieredAnalysisMixin):
     """
     Agente especializado em monitorar e controlar os custos do projeto.
     
@@ -11,15 +19,27 @@ class CostAgent:
     e recomenda ações corretivas em caso de desvios orçamentários.
     """
     
-    def __init__(self, llm_interface=None):
+    # Configuração do nível de análise (TieredAnalysisMixin)
+    analysis_domain = "custos"
+    metric_name = "CPI"
+    # A descrição da faixa de saúde indica se o custo está acima, dentro ou abaixo do orçamento
+    rag_query_template = "{metric_name} {metric:.2f}: {health} Desvio orçamentário: {desvio_orcamento}%"
+    
+    def __init__(self, llm_interface=None, result_cache=None, analysis_policy=None):
         """
         Inicializa o agente de custos.
         
         Args:
             llm_interface: Interface para comunicação com o LLM
+            result_cache: Cache persistente de resultados por conteúdo do arquivo (opcional,
+                ex.: ResultCache); arquivos inalterados não são analisados novamente
+            analysis_policy: Política de níveis de análise (opcional, ex.: AnalysisPolicy);
+                sem política, o LLM é usado sempre que houver interface LLM
         """
         self.llm_interface = llm_interface
-        self.rag_system = PMBOKRAGSystem(domain="custos")
+        self.result_cache = result_cache
+        self.analysis_policy = analysis_policy
+        self.rag_system = get_domain_rag_system("custos")
         
     def analyze_cost_file(self, file_path):
         """
@@ -42,9 +62,21 @@ class CostAgent:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # Extrair informações relevantes
-        project_info = self._extract_project_info(content)
-        cost_status = self._extract_cost_status(content)
+        # Reaproveitar a análise de um arquivo com o mesmo conteúdo
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.make_key(
+                "cost_agent", ANALYSIS_VERSION, STATUS_PARSER_VERSION, type(self.llm_interface).__name__,
+                self.analysis_policy.signature() if self.analysis_policy is not None else None, content
+            )
+            cached_results = self.result_cache.get(cache_key)
+            if cached_results is not None:
+                return cached_results
+        
+        # Extrair informações relevantes (parser único de relatórios de status)
+        report = parse_status_report(content, "custos")
+        project_info = report["project_info"]
+        cost_status = report["status"]
         
         # Calcular ou extrair CPI
         cpi = cost_status.get('cpi', None)
@@ -58,8 +90,13 @@ class CostAgent:
         # Determinar status dos custos com base no CPI
         cost_health = self._evaluate_cost_health(cpi)
         
+        # Escolher o nível de análise (regras fixas, RAG ou LLM)
+        analysis_tier = self._choose_analysis_tier(cpi, cost_health, project_info, file_path)
+        
         # Gerar recomendações
-        recommendations = self._generate_recommendations(cost_status, project_info)
+        start = time.perf_counter()
+        recommendations = self._generate_recommendations(cost_status, project_info, tier=analysis_tier["tier"])
+        analysis_tier["seconds"] = time.perf_counter() - start
         
         # Compilar resultados
         results = {
@@ -67,136 +104,35 @@ class CostAgent:
             "cost_status": cost_status,
             "cost_health": cost_health,
             "recommendations": recommendations,
+            "analysis_tier": analysis_tier,
             "analysis_date": datetime.now().isoformat(),
             "status": "success"
         }
         
+        # Resultados limitados pelo orçamento de LLM não são reaproveitados em outras execuções
+        if cache_key is not None and not analysis_tier.get("budget_limited"):
+            self.result_cache.put(cache_key, results)
+        
         return results
     
-    def _extract_project_info(self, content):
+    def analyze_directory(self, status_dir, workers=None, output_file=None, pool="process"):
         """
-        Extrai informações gerais do projeto do conteúdo do arquivo.
+        Analisa todos os arquivos de status de custos (<projeto>_custos.txt) de um diretório.
         
-        Args:
-            content: Conteúdo do arquivo de status
-            
-        Returns:
-            Dicionário com informações do projeto
-        """
-        lines = content.split('\n')
-        project_info = {}
-        
-        # Extrair informações básicas
-        for line in lines[:10]:  # Verificar apenas as primeiras linhas
-            if "Projeto:" in line:
-                parts = line.split("Projeto:")[1].strip().split("(")
-                if len(parts) > 1:
-                    project_info["nome"] = parts[0].strip()
-                    project_info["id"] = parts[1].replace(")", "").strip()
-                else:
-                    project_info["nome"] = parts[0].strip()
-            elif "Data:" in line:
-                project_info["data_relatorio"] = line.split("Data:")[1].strip()
-            elif "Gerente:" in line:
-                project_info["gerente"] = line.split("Gerente:")[1].strip()
-        
-        return project_info
-    
-    def _extract_cost_status(self, content):
-        """
-        Extrai informações de status dos custos do conteúdo do arquivo.
+        Os arquivos são distribuídos entre vários processos, cada um com o seu agente,
+        e os resultados são gerados na ordem dos arquivos. A análise só é
+        executada durante a iteração sobre os resultados.
         
         Args:
-            content: Conteúdo do arquivo de status
+            status_dir: Diretório com os arquivos de status
+            workers: Número de processos (padrão: número de CPUs; 1 analisa no próprio processo)
+            output_file: Caminho do arquivo JSONL consolidado com todos os resultados (opcional)
+            pool: "process" (padrão) ou "thread" (threads compartilham a interface LLM do agente)
             
         Returns:
-            Dicionário com status dos custos
+            Gerador de resultados de analyze_cost_file, cada um com o campo file_path
         """
-        lines = content.split('\n')
-        cost_status = {}
-        
-        # Extrair informações de status
-        for i, line in enumerate(lines):
-            if "Orçamento inicial:" in line:
-                try:
-                    orcamento = line.split("Orçamento inicial:")[1].strip()
-                    cost_status["orcamento_inicial"] = float(orcamento.replace("R$", "").strip())
-                except:
-                    pass
-            elif "Custo real atual:" in line:
-                try:
-                    custo = line.split("Custo real atual:")[1].strip()
-                    cost_status["custo_real"] = float(custo.replace("R$", "").strip())
-                except:
-                    pass
-            elif "Desvio orçamentário:" in line:
-                try:
-                    desvio = line.split("Desvio orçamentário:")[1].strip()
-                    cost_status["desvio_orcamento"] = float(desvio.replace("%", "").strip())
-                except:
-                    pass
-            elif "Índice de Desempenho de Custo (CPI):" in line:
-                try:
-                    cpi = line.split("Índice de Desempenho de Custo (CPI):")[1].strip()
-                    cost_status["cpi"] = float(cpi)
-                except:
-                    pass
-            elif "Valor Agregado (EV):" in line:
-                try:
-                    ev = line.split("Valor Agregado (EV):")[1].strip()
-                    cost_status["valor_agregado"] = float(ev.replace("R$", "").strip())
-                except:
-                    pass
-            elif "Estimativa para conclusão:" in line:
-                try:
-                    etc = line.split("Estimativa para conclusão:")[1].strip()
-                    cost_status["estimativa_conclusao"] = float(etc.replace("R$", "").strip())
-                except:
-                    pass
-            elif "Estimativa no término (EAC):" in line:
-                try:
-                    eac = line.split("Estimativa no término (EAC):")[1].strip()
-                    cost_status["estimativa_termino"] = float(eac.replace("R$", "").strip())
-                except:
-                    pass
-            elif "Variação no término (VAC):" in line:
-                try:
-                    vac = line.split("Variação no término (VAC):")[1].strip()
-                    cost_status["variacao_termino"] = float(vac.replace("R$", "").strip())
-                except:
-                    pass
-        
-        # Extrair categorias de custos
-        categorias_custos = {}
-        in_categories_section = False
-        
-        for line in lines:
-            if "Detalhamento por categoria:" in line:
-                in_categories_section = True
-                continue
-            elif line.strip() == "" or line.startswith("RELATÓRIO"):
-                in_categories_section = False
-                continue
-            
-            if in_categories_section and line.strip().startswith("-"):
-                try:
-                    parts = line.strip()[2:].split(":")
-                    if len(parts) >= 2:
-                        categoria = parts[0].strip()
-                        valor_parts = parts[1].strip().split("(")
-                        valor = float(valor_parts[0].replace("R$", "").strip())
-                        
-                        if len(valor_parts) > 1:
-                            percentual = float(valor_parts[1].replace("%)", "").strip())
-                            categorias_custos[categoria] = {"valor": valor, "percentual": percentual}
-                        else:
-                            categorias_custos[categoria] = {"valor": valor}
-                except:
-                    pass
-        
-        cost_status["categorias_custos"] = categorias_custos
-        
-        return cost_status
+        return analyze_status_directory(self, "analyze_cost_file", "custos", status_dir, workers, output_file, pool=pool)
     
     def _evaluate_cost_health(self, cpi):
         """
@@ -240,13 +176,15 @@ class CostAgent:
                 "description": f"O projeto está severamente acima do orçamento (CPI = {cpi:.2f}). Ações corretivas urgentes são necessárias."
             }
     
-    def _generate_recommendations(self, cost_status, project_info):
+    def _generate_recommendations(self, cost_status, project_info, tier="llm"):
         """
         Gera recomendações com base no status dos custos.
         
         Args:
             cost_status: Status dos custos
             project_info: Informações do projeto
+            tier: Nível de análise: static (apenas regras fixas), rag (orientações do PMBOK
+                recuperadas, sem LLM) ou llm (recomendações do LLM com prompt aumentado)
             
         Returns:
             Lista de recomendações
@@ -320,7 +258,7 @@ class CostAgent:
                 recommendations.append(f"Focar na redução de custos na categoria: {maior_categoria}")
         
         # Usar o RAG para enriquecer as recomendações com conhecimento do PMBOK
-        if self.llm_interface and cpi is not None:
+        if tier == "llm" and self.llm_interface and cpi is not None:
             # Criar contexto para consulta
             context = f"""
             Projeto: {project_info.get('nome', 'Não especificado')}
@@ -342,7 +280,8 @@ class CostAgent:
                 {knowledge}
                 
                 Considerando as melhores práticas acima e o CPI de {cpi:.2f}, forneça 3-5 recomendações específicas e acionáveis para melhorar o desempenho dos custos:
-                """
+                """,
+                template_vars={"cpi": cpi}
             )
             
             # Obter recomendações do LLM
@@ -354,6 +293,9 @@ class CostAgent:
             # Adicionar recomendações do LLM
             if llm_recommendations:
                 recommendations.extend(llm_recommendations)
+        elif tier == "rag" and cpi is not None:
+            # Orientações do PMBOK recuperadas pelo RAG, sem chamada ao LLM
+            recommendations.extend(self._knowledge_recommendations(cpi, self._evaluate_cost_health(cpi), cost_status))
         
         return recommendations
     
@@ -398,6 +340,11 @@ class CostAgent:
         cost_health = analysis_results.get('cost_health', {})
         recommendations = analysis_results.get('recommendations', [])
         
+        # Formatar os valores numéricos antes de montar o relatório
+        def format_value(key, default='Não especificado'):
+            value = cost_status.get(key)
+            return f"{value:.2f}" if value is not None else default
+        
         report = f"""
         RELATÓRIO DE ANÁLISE DE CUSTOS
         
@@ -405,10 +352,10 @@ class CostAgent:
         Data da análise: {datetime.now().strftime('%d/%m/%Y %H:%M')}
         
         RESUMO DO STATUS:
-        Orçamento inicial: R$ {cost_status.get('orcamento_inicial', 'Não especificado'):.2f if cost_status.get('orcamento_inicial') is not None else 'Não especificado'}
-        Custo real atual: R$ {cost_status.get('custo_real', 'Não especificado'):.2f if cost_status.get('custo_real') is not None else 'Não especificado'}
-        Desvio orçamentário: {cost_status.get('desvio_orcamento', 'Não especificado'):.2f if cost_status.get('desvio_orcamento') is not None else 'Não especificado'}%
-        CPI (Índice de Desempenho de Custo): {cost_status.get('cpi', 'Não calculado'):.2f if cost_status.get('cpi') is not None else 'Não calculado'}
+        Orçamento inicial: R$ {format_value('orcamento_inicial')}
+        Custo real atual: R$ {format_value('custo_real')}
+        Desvio orçamentário: {format_value('desvio_orcamento')}%
+        CPI (Índice de Desempenho de Custo): {format_value('cpi', 'Não calculado')}
         
         AVALIAÇÃO DA SAÚDE DOS CUSTOS:
         Status: {cost_health.get('status', 'Não avaliado')}
@@ -422,10 +369,10 @@ class CostAgent:
         
         report += f"""
         DETALHES ADICIONAIS:
-        Valor Agregado (EV): R$ {cost_status.get('valor_agregado', 'Não especificado'):.2f if cost_status.get('valor_agregado') is not None else 'Não especificado'}
-        Estimativa para conclusão: R$ {cost_status.get('estimativa_conclusao', 'Não especificado'):.2f if cost_status.get('estimativa_conclusao') is not None else 'Não especificado'}
-        Estimativa no término (EAC): R$ {cost_status.get('estimativa_termino', 'Não especificado'):.2f if cost_status.get('estimativa_termino') is not None else 'Não especificado'}
-        Variação no término (VAC): R$ {cost_status.get('variacao_termino', 'Não especificado'):.2f if cost_status.get('variacao_termino') is not None else 'Não especificado'}
+        Valor Agregado (EV): R$ {format_value('valor_agregado')}
+        Estimativa para conclusão: R$ {format_value('estimativa_conclusao')}
+        Estimativa no término (EAC): R$ {format_value('estimativa_termino')}
+        Variação no término (VAC): R$ {format_value('variacao_termino')}
         
         DETALHAMENTO POR CATEGORIA:
         """
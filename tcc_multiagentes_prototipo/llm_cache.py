@@ -0,0 +1,381 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import uuid
+
+# Limite padrão do armazenamento de respostas (soma do tamanho das respostas em bytes)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class SQLiteResponseStore:
+    """
+    Armazenamento persistente de respostas do LLM em SQLite, com descarte por tamanho.
+    
+    Quando a soma do tamanho das respostas passa de max_bytes, as respostas acessadas
+    há mais tempo são removidas.
+    """
+    
+    def __init__(self, path=os.path.join("cache", "llm_responses.sqlite3"), max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Inicializa o armazenamento, criando o banco de dados se necessário.
+        
+        Args:
+            path: Caminho do arquivo SQLite (":memory:" mantém as respostas apenas em memória)
+            max_bytes: Tamanho máximo total das respostas em bytes
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._open()
+    
+    def _open(self):
+        """
+        Abre a conexão com o banco de dados e cria a tabela de respostas.
+        """
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+    
+    def __getstate__(self):
+        # A conexão não é serializável; cada processo abre a sua (ex.: pool de portfólio)
+        return {"path": self.path, "max_bytes": self.max_bytes, "evictions": 0}
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+    
+    def get(self, key):
+        """
+        Busca uma resposta, atualizando o seu último acesso.
+        
+        Args:
+            key: Chave da resposta
+            
+        Returns:
+            Resposta armazenada ou None se ausente
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row[0]
+    
+    def put(self, key, response):
+        """
+        Armazena uma resposta e descarta as menos acessadas se o limite for ultrapassado.
+        
+        Args:
+            key: Chave da resposta
+            response: Texto da resposta
+        """
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time())
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, old_size in self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_access"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= old_size
+                    self.evictions += 1
+            self._conn.commit()
+    
+    def clear(self):
+        """
+        Remove todas as respostas.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+    
+    def stats(self):
+        """
+        Retorna o número de respostas, o tamanho total e os descartes.
+        
+        Returns:
+            Dicionário com entries, bytes, max_bytes e evictions
+        """
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+class FileResponseStore:
+    """
+    Armazenamento persistente de respostas do LLM em arquivos (um arquivo por resposta),
+    com descarte por tamanho.
+    
+    O horário de modificação de cada arquivo registra o seu último acesso; quando o
+    tamanho total passa de max_bytes, os arquivos acessados há mais tempo são removidos.
+    """
+    
+    def __init__(self, directory=os.path.join("cache", "llm_responses"), max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Inicializa o armazenamento, criando o diretório se necessário.
+        
+        Args:
+            directory: Diretório das respostas
+            max_bytes: Tamanho máximo total das respostas em bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def __getstate__(self):
+        return {"directory": self.directory, "max_bytes": self.max_bytes, "evictions": 0}
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def _path(self, key):
+        """
+        Retorna o caminho do arquivo de uma resposta.
+        
+        Args:
+            key: Chave da resposta
+            
+        Returns:
+            Caminho do arquivo
+        """
+        return os.path.join(self.directory, f"{key}.txt")
+    
+    def _entries(self):
+        """
+        Lista os arquivos de respostas com tamanho e último acesso.
+        
+        Returns:
+            Lista de tuplas (último acesso, tamanho, caminho)
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".txt"):
+                path = os.path.join(self.directory, name)
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+        return entries
+    
+    def get(self, key):
+        """
+        Busca uma resposta, atualizando o seu último acesso.
+        
+        Args:
+            key: Chave da resposta
+            
+        Returns:
+            Resposta armazenada ou None se ausente
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                response = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return response
+    
+    def put(self, key, response):
+        """
+        Armazena uma resposta e descarta as menos acessadas se o limite for ultrapassado.
+        
+        Args:
+            key: Chave da resposta
+            response: Texto da resposta
+        """
+        path = self._path(key)
+        # Gravação atômica: outro processo nunca lê uma resposta incompleta. O arquivo
+        # temporário é exclusivo (processo e uuid), pois threads do mesmo processo podem
+        # gravar a mesma chave ao mesmo tempo
+        temp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(response)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, old_path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if old_path == path:
+                    continue
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+    
+    def clear(self):
+        """
+        Remove todas as respostas.
+        """
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+    
+    def stats(self):
+        """
+        Retorna o número de respostas, o tamanho total e os descartes.
+        
+        Returns:
+            Dicionário com entries, bytes, max_bytes e evictions
+        """
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+class CachedLLMInterface:
+    """
+    Envolve uma interface LLM (qualquer objeto com generate_text) com um cache
+    persistente de respostas.
+    
+    A chave é o hash do prompt, do modelo, da temperatura e dos demais parâmetros da
+    chamada, de modo que prompts idênticos em execuções seguintes não chamam o LLM.
+    Pode ser usada no lugar da interface original nos agentes.
+    """
+    
+    def __init__(self, llm_interface, store=None, model=None, temperature=None):
+        """
+        Inicializa a interface com cache.
+        
+        Args:
+            llm_interface: Interface LLM original
+            store: Armazenamento das respostas (SQLiteResponseStore ou FileResponseStore;
+                padrão: SQLiteResponseStore no local padrão)
+            model: Nome do modelo (padrão: atributo model ou model_name da interface)
+            temperature: Temperatura (padrão: atributo temperature da interface)
+        """
+        self.llm_interface = llm_interface
+        self.store = store if store is not None else SQLiteResponseStore()
+        self.model = model if model is not None else getattr(
+            llm_interface, "model", getattr(llm_interface, "model_name", type(llm_interface).__name__)
+        )
+        self.temperature = temperature if temperature is not None else getattr(llm_interface, "temperature", None)
+        
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.llm_seconds = 0.0
+    
+    def __getattr__(self, name):
+        # Demais atributos e métodos são os da interface original
+        if name == "llm_interface":
+            raise AttributeError(name)
+        return getattr(self.llm_interface, name)
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def make_key(self, prompt, **kwargs):
+        """
+        Gera a chave de cache de uma chamada.
+        
+        Args:
+            prompt: Prompt enviado ao LLM
+            kwargs: Demais parâmetros da chamada
+            
+        Returns:
+            Hash SHA-256 em hexadecimal
+        """
+        payload = json.dumps(
+            {"model": str(self.model), "temperature": kwargs.pop("temperature", self.temperature),
+             "params": kwargs, "prompt": prompt},
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def generate_text(self, prompt, **kwargs):
+        """
+        Gera texto com o LLM, reaproveitando a resposta de um prompt idêntico.
+        
+        Args:
+            prompt: Prompt para geração de texto
+            kwargs: Demais parâmetros repassados à interface original
+            
+        Returns:
+            Texto gerado
+        """
+        key = self.make_key(prompt, **kwargs)
+        response = self.store.get(key)
+        if response is not None:
+            with self._lock:
+                self.hits += 1
+            return response
+        
+        start = time.perf_counter()
+        response = self.llm_interface.generate_text(prompt, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            self.llm_seconds += elapsed
+        
+        if isinstance(response, str):
+            self.store.put(key, response)
+        return response
+    
+    def stats(self):
+        """
+        Retorna as métricas do cache de respostas.
+        
+        Returns:
+            Dicionário com acertos, falhas, taxa de acerto, tempo médio das chamadas
+            ao LLM e estatísticas do armazenamento
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "avg_llm_seconds": self.llm_seconds / self.misses if self.misses else None,
+                # Estimativa do tempo economizado pelos acertos
+                "saved_seconds": self.hits * self.llm_seconds / self.misses if self.misses else None
+            }
+        stats.update(self.store.stats())
+        return stats
@@ -0,0 +1,393 @@
+import json
+import time
+import random
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Códigos HTTP que indicam falha temporária do provedor (limite de requisições ou indisponibilidade)
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
+def parse_retry_after(value):
+    """
+    Converte o valor do cabeçalho Retry-After em segundos de espera.
+    
+    O cabeçalho pode trazer um número de segundos ou uma data HTTP (RFC 9110).
+    
+    Args:
+        value: Valor do cabeçalho (texto ou número) ou None
+        
+    Returns:
+        Espera em segundos (nunca negativa) ou None se o valor for ausente ou inválido
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class LLMRequestError(Exception):
+    """
+    Erro em uma requisição ao LLM.
+    """
+    
+    def __init__(self, message, status=None, retry_after=None, retryable=None):
+        """
+        Inicializa o erro.
+        
+        Args:
+            message: Descrição do erro
+            status: Código HTTP da resposta (opcional)
+            retry_after: Espera sugerida pelo provedor em segundos (cabeçalho Retry-After)
+            retryable: Se a requisição pode ser repetida (padrão: pelo código HTTP)
+        """
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.retryable = status in RETRYABLE_STATUS if retryable is None else retryable
+
+class HTTPLLMInterface:
+    """
+    Interface LLM via HTTP: envia {"model", "prompt", "temperature"} em JSON por POST
+    e lê o texto gerado do campo "text" (ou do formato choices do OpenAI).
+    """
+    
+    def __init__(self, url, model=None, temperature=None, api_key=None, timeout=60):
+        """
+        Inicializa a interface.
+        
+        Args:
+            url: Endereço do serviço de geração de texto
+            model: Nome do modelo
+            temperature: Temperatura da geração
+            api_key: Chave de API enviada como Bearer (opcional)
+            timeout: Tempo máximo de cada requisição em segundos
+        """
+        self.url = url
+        self.model = model
+        self.temperature = temperature
+        self.api_key = api_key
+        self.timeout = timeout
+    
+    def generate_text(self, prompt, **kwargs):
+        """
+        Gera texto com base no prompt.
+        
+        Args:
+            prompt: Prompt para geração de texto
+            kwargs: Parâmetros adicionais enviados no corpo da requisição
+            
+        Returns:
+            Texto gerado
+            
+        Raises:
+            LLMRequestError: Se a requisição falhar
+        """
+        payload = {"model": self.model, "prompt": prompt, "temperature": self.temperature}
+        payload.update(kwargs)
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode('utf-8'), headers=headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get("Retry-After") if e.headers else None
+            raise LLMRequestError(
+                f"Erro HTTP {e.code} do LLM: {e.reason}", status=e.code,
+                retry_after=parse_retry_after(retry_after)
+            )
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise LLMRequestError(f"Falha de conexão com o LLM: {e}", retryable=True)
+        
+        if "text" in body:
+            return body["text"]
+        choice = body["choices"][0]
+        return choice["message"]["content"] if "message" in choice else choice["text"]
+
+class TokenBucket:
+    """
+    Limitador de taxa por balde de fichas: permite rajadas de até capacity requisições
+    e, em média, rate requisições por segundo.
+    """
+    
+    def __init__(self, rate, capacity=None):
+        """
+        Inicializa o balde cheio.
+        
+        Args:
+            rate: Fichas repostas por segundo
+            capacity: Número máximo de fichas (padrão: max(1, rate))
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """
+        Retira fichas do balde, aguardando a reposição se necessário.
+        
+        Args:
+            tokens: Número de fichas
+            
+        Returns:
+            Tempo de espera em segundos
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+class LLMDispatcher:
+    """
+    Despachante de requisições ao LLM que envolve uma interface LLM (qualquer objeto com
+    generate_text) e pode ser usado no lugar dela nos agentes.
+    
+    - Concorrência limitada: no máximo max_concurrency chamadas simultâneas ao LLM;
+    - Limite de taxa por balde de fichas (requests_per_second e burst);
+    - Novas tentativas com espera exponencial e jitter em falhas temporárias,
+      respeitando o Retry-After do provedor;
+    - Agrupamento de requisições: prompts idênticos em andamento compartilham uma
+      única chamada ao LLM.
+      
+    Com um pool de threads (ex.: analyze_directory com pool="thread"), várias análises
+    usam o mesmo despachante e o limite de taxa vale para todas. Em processos separados,
+    cada processo tem o seu despachante e o seu limite.
+    """
+    
+    def __init__(self, llm_interface, max_concurrency=4, requests_per_second=None, burst=None,
+                 max_retries=3, backoff_base=0.5, backoff_max=30.0):
+        """
+        Inicializa o despachante.
+        
+        Args:
+            llm_interface: Interface LLM original
+            max_concurrency: Número máximo de chamadas simultâneas ao LLM
+            requests_per_second: Taxa média máxima de chamadas (None desativa o limite)
+            burst: Rajada máxima de chamadas (padrão: max(1, requests_per_second))
+            max_retries: Número máximo de novas tentativas por requisição
+            backoff_base: Espera base da primeira nova tentativa em segundos
+            backoff_max: Espera máxima entre tentativas em segundos
+        """
+        self.llm_interface = llm_interface
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._setup()
+    
+    def _setup(self):
+        """
+        Cria o pool de threads, o limitador de taxa e as estruturas de controle.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-dispatcher")
+        self._bucket = TokenBucket(self.requests_per_second, self.burst) if self.requests_per_second else None
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._stats = {
+            "requests": 0,
+            "coalesced": 0,
+            "llm_calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "throttle_seconds": 0.0,
+            "backoff_seconds": 0.0
+        }
+    
+    def __getattr__(self, name):
+        # Demais atributos e métodos são os da interface original
+        if name == "llm_interface":
+            raise AttributeError(name)
+        return getattr(self.llm_interface, name)
+    
+    def __getstate__(self):
+        # Pool de threads e locks não são serializáveis; cada processo cria os seus
+        return {
+            "llm_interface": self.llm_interface,
+            "max_concurrency": self.max_concurrency,
+            "requests_per_second": self.requests_per_second,
+            "burst": self.burst,
+            "max_retries": self.max_retries,
+            "backoff_base": self.backoff_base,
+            "backoff_max": self.backoff_max
+        }
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+    
+    def _is_retryable(self, error):
+        """
+        Indica se uma falha é temporária e a requisição pode ser repetida.
+        
+        Args:
+            error: Exceção levantada pela interface LLM
+            
+        Returns:
+            True se a requisição pode ser repetida
+        """
+        retryable = getattr(error, "retryable", None)
+        if retryable is not None:
+            return retryable
+        status = getattr(error, "status", None) or getattr(error, "status_code", None)
+        if status is not None:
+            return status in RETRYABLE_STATUS
+        return isinstance(error, (TimeoutError, ConnectionError))
+    
+    def _backoff(self, attempt, error):
+        """
+        Calcula a espera antes de uma nova tentativa (exponencial com jitter completo).
+        
+        Args:
+            attempt: Número da tentativa que falhou (0 para a primeira)
+            error: Exceção da tentativa
+            
+        Returns:
+            Espera em segundos
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        retry_after = parse_retry_after(getattr(error, "retry_after", None))
+        if retry_after:
+            delay = max(delay, min(self.backoff_max, retry_after))
+        return delay
+    
+    def _call(self, prompt, kwargs):
+        """
+        Executa a chamada ao LLM no pool, com limite de taxa e novas tentativas.
+        
+        Args:
+            prompt: Prompt para geração de texto
+            kwargs: Parâmetros adicionais da chamada
+            
+        Returns:
+            Texto gerado
+        """
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                waited = self._bucket.acquire()
+                with self._lock:
+                    self._stats["throttle_seconds"] += waited
+            with self._lock:
+                self._stats["llm_calls"] += 1
+            try:
+                return self.llm_interface.generate_text(prompt, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                with self._lock:
+                    self._stats["retries"] += 1
+                    self._stats["backoff_seconds"] += delay
+                time.sleep(delay)
+                attempt += 1
+    
+    def submit(self, prompt, **kwargs):
+        """
+        Envia uma requisição ao LLM sem bloquear.
+        
+        Se um prompt idêntico (com os mesmos parâmetros) já estiver em andamento,
+        retorna o mesmo Future em vez de fazer uma nova chamada.
+        
+        Args:
+            prompt: Prompt para geração de texto
+            kwargs: Parâmetros adicionais da chamada
+            
+        Returns:
+            Future com o texto gerado
+        """
+        key = json.dumps({"prompt": prompt, "params": kwargs}, sort_keys=True, default=str)
+        with self._lock:
+            self._stats["requests"] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future
+            future = self._executor.submit(self._call, prompt, kwargs)
+            self._in_flight[key] = future
+        
+        def _done(_, key=key):
+            with self._lock:
+                self._in_flight.pop(key, None)
+        future.add_done_callback(_done)
+        return future
+    
+    def generate_text(self, prompt, **kwargs):
+        """
+        Gera texto com o LLM, aguardando o resultado (mesma assinatura da interface original).
+        
+        Args:
+            prompt: Prompt para geração de texto
+            kwargs: Parâmetros adicionais da chamada
+            
+        Returns:
+            Texto gerado
+        """
+        return self.submit(prompt, **kwargs).result()
+    
+    def generate_batch(self, prompts, **kwargs):
+        """
+        Gera textos para vários prompts em paralelo, respeitando os limites do despachante.
+        
+        Args:
+            prompts: Lista de prompts
+            kwargs: Parâmetros adicionais das chamadas
+            
+        Returns:
+            Lista de textos gerados, na ordem dos prompts
+        """
+        futures = [self.submit(prompt, **kwargs) for prompt in prompts]
+        return [future.result() for future in futures]
+    
+    def stats(self):
+        """
+        Retorna as métricas do despachante.
+        
+        Returns:
+            Dicionário com requisições, agrupadas, chamadas ao LLM, novas tentativas,
+            falhas e tempos de espera por limite de taxa e por backoff
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._in_flight)
+        return stats
+    
+    def shutdown(self, wait=True):
+        """
+        Encerra o pool de threads do despachante.
+        
+        Args:
+            wait: Se True, aguarda as chamadas em andamento
+        """
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,214 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Agente criado uma vez em cada processo do pool de análise de portfólio
+_worker_agent = None
+
+# Tipos de pool aceitos pela análise de portfólio
+POOL_TYPES = ("process", "thread")
+
+def list_status_files(status_dir, report_type):
+    """
+    Lista os arquivos de status de um tipo de relatório (<projeto>_<tipo>.txt).
+    
+    Args:
+        status_dir: Diretório com os arquivos de status
+        report_type: Tipo do relatório (cronograma, custos, escopo ou riscos)
+        
+    Returns:
+        Lista ordenada de caminhos
+    """
+    suffix = f"_{report_type}.txt"
+    return sorted(
+        os.path.join(status_dir, name) for name in os.listdir(status_dir) if name.endswith(suffix)
+    )
+
+def _result_cache_spec(result_cache):
+    """
+    Descreve o cache persistente do agente principal para reabri-lo nos processos do pool.
+    
+    Caches em memória (ou sem caminho) não são compartilháveis entre processos
+    e ficam desativados nos processos do pool.
+    
+    Args:
+        result_cache: Cache do agente principal (ex.: ResultCache) ou None
+        
+    Returns:
+        Tupla (classe do cache, caminho) ou None
+    """
+    path = getattr(result_cache, "path", None)
+    if result_cache is None or path in (None, ":memory:"):
+        return None
+    return type(result_cache), path
+
+def _init_portfolio_worker(agent_class, llm_interface, cache_spec, analysis_policy=None):
+    """
+    Cria o agente uma vez em cada processo do pool.
+    
+    Args:
+        agent_class: Classe do agente (ScheduleAgent ou CostAgent)
+        llm_interface: Interface para comunicação com o LLM
+        cache_spec: Tupla (classe do cache, caminho) gerada por _result_cache_spec ou None
+        analysis_policy: Política de níveis de análise (cópia por processo, com o orçamento
+            de LLM compartilhado pelo banco de estado) ou None
+    """
+    global _worker_agent
+    result_cache = cache_spec[0](cache_spec[1]) if cache_spec is not None else None
+    _worker_agent = agent_class(llm_interface=llm_interface, result_cache=result_cache,
+                                analysis_policy=analysis_policy)
+
+def _analyze_chunk(method_name, file_paths):
+    """
+    Analisa um grupo de arquivos no processo do pool.
+    
+    Args:
+        method_name: Nome do método de análise do agente
+        file_paths: Caminhos dos arquivos de status
+        
+    Returns:
+        Lista de resultados
+    """
+    return [_analyze_file(_worker_agent, method_name, file_path) for file_path in file_paths]
+
+def _analyze_file(agent, method_name, file_path):
+    """
+    Analisa um arquivo, convertendo exceções em resultados de erro.
+    
+    Args:
+        agent: Instância do agente
+        method_name: Nome do método de análise do agente
+        file_path: Caminho do arquivo de status
+        
+    Returns:
+        Resultado da análise com o caminho do arquivo
+    """
+    try:
+        result = getattr(agent, method_name)(file_path)
+    except Exception as e:
+        result = {"error": f"Erro ao analisar {file_path}: {e}", "status": "error"}
+    result["file_path"] = file_path
+    return result
+
+def _analyze_chunk_with(agent, method_name, file_paths):
+    """
+    Analisa um grupo de arquivos com o agente informado (pool de threads).
+    
+    Args:
+        agent: Instância do agente
+        method_name: Nome do método de análise do agente
+        file_paths: Caminhos dos arquivos de status
+        
+    Returns:
+        Lista de resultados
+    """
+    return [_analyze_file(agent, method_name, file_path) for file_path in file_paths]
+
+def analyze_status_directory(agent, method_name, report_type, status_dir, workers=None,
+                             output_file=None, chunk_size=16, pool="process"):
+    """
+    Analisa todos os arquivos de status de um tipo em um diretório, em vários processos.
+    
+    Os arquivos são distribuídos em grupos entre os processos do pool; cada processo
+    cria o seu agente uma única vez. Os resultados são gerados na ordem dos arquivos,
+    assim que o grupo de cada arquivo termina, e, se output_file for informado, gravados
+    em um arquivo JSONL consolidado, uma linha por arquivo.
+    
+    Com workers=1 a análise é feita no próprio processo, com o agente informado.
+    Com pool="thread" os grupos são analisados em threads com o próprio agente, que
+    compartilham a interface LLM (ex.: um LLMDispatcher com limite de taxa único),
+    indicado quando o tempo é dominado pelas chamadas ao LLM. Se o agente tiver uma
+    política com orçamento de LLM e estado em memória, que não pode ser compartilhado
+    entre processos, o pool de threads é usado no lugar do de processos.
+    
+    Args:
+        agent: Instância do agente (ScheduleAgent ou CostAgent)
+        method_name: Nome do método de análise do agente (ex.: analyze_schedule_file)
+        report_type: Tipo do relatório (cronograma, custos, escopo ou riscos)
+        status_dir: Diretório com os arquivos de status
+        workers: Número de processos (padrão: número de CPUs)
+        output_file: Caminho do arquivo JSONL consolidado (opcional)
+        chunk_size: Número de arquivos enviados de uma vez a cada processo
+        pool: "process" (padrão) ou "thread"
+        
+    Returns:
+        Gerador de resultados, cada um com o campo file_path
+        
+    Raises:
+        ValueError: Se pool não for "process" nem "thread"
+    """
+    if pool not in POOL_TYPES:
+        raise ValueError(f"Tipo de pool inválido: {pool!r} (use {' ou '.join(POOL_TYPES)})")
+    
+    file_paths = list_status_files(status_dir, report_type)
+    workers = workers or os.cpu_count() or 1
+    
+    # O orçamento de LLM só é compartilhado entre processos por um banco de estado em arquivo
+    policy = getattr(agent, "analysis_policy", None)
+    if (pool == "process" and workers > 1 and policy is not None
+            and policy.llm_budget is not None and policy.state_path == ":memory:"):
+        print("Política com orçamento de LLM e estado em memória: usando pool de threads "
+              "para manter um orçamento único")
+        pool = "thread"
+    return _iter_directory_results(agent, method_name, file_paths, workers, output_file, chunk_size, pool)
+
+def _iter_directory_results(agent, method_name, file_paths, workers, output_file, chunk_size, pool):
+    """
+    Gera os resultados da análise de portfólio (ver analyze_status_directory).
+    
+    Args:
+        agent: Instância do agente
+        method_name: Nome do método de análise do agente
+        file_paths: Caminhos dos arquivos de status, na ordem dos resultados
+        workers: Número de processos ou threads
+        output_file: Caminho do arquivo JSONL consolidado (opcional)
+        chunk_size: Número de arquivos enviados de uma vez a cada processo
+        pool: "process" ou "thread"
+        
+    Returns:
+        Gerador de resultados, cada um com o campo file_path
+    """
+    output = None
+    if output_file:
+        if os.path.dirname(output_file):
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        output = open(output_file, 'w', encoding='utf-8')
+    
+    try:
+        if workers == 1:
+            for file_path in file_paths:
+                result = _analyze_file(agent, method_name, file_path)
+                if output is not None:
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                yield result
+            return
+        
+        chunks = [file_paths[start:start + chunk_size] for start in range(0, len(file_paths), chunk_size)]
+        if pool == "thread":
+            executor = ThreadPoolExecutor(max_workers=workers)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_portfolio_worker,
+                                           initargs=(type(agent), agent.llm_interface,
+                                                     _result_cache_spec(agent.result_cache),
+                                                     getattr(agent, "analysis_policy", None)))
+        with executor:
+            if pool == "thread":
+                futures = [executor.submit(_analyze_chunk_with, agent, method_name, chunk) for chunk in chunks]
+            else:
+                futures = [executor.submit(_analyze_chunk, method_name, chunk) for chunk in chunks]
+            # Percorrer os grupos na ordem de envio mantém os resultados na ordem dos arquivos
+            for chunk, future in zip(chunks, futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [
+                        {"error": f"Erro ao analisar {file_path}: {e}", "status": "error", "file_path": file_path}
+                        for file_path in chunk
+                    ]
+                for result in results:
+                    if output is not None:
+                        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    yield result
+    finally:
+        if output is not None:
+            output.close()
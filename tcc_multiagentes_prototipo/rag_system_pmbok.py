@@ -1,9 +1,735 @@
 import os
 import json
+import asyncio
+import functools
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+import uuid
+import zlib
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, CrossEncoder
 import faiss
 
+try:
+    import tiktoken
+    _token_encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    # tiktoken é opcional; sem ele a contagem de tokens é aproximada
+    _token_encoding = None
+
+# Registro de modelos (embeddings e reranqueamento) compartilhado por todo o processo
+_model_registry = {}
+_model_registry_lock = threading.Lock()
+_model_load_locks = {}
+
+def _get_shared_model(model_class, model_name):
+    """
+    Retorna um modelo, carregando-o no máximo uma vez por processo.
+    
+    O carregamento é protegido por um lock por modelo, de modo que threads que
+    pedem o mesmo modelo aguardam a primeira carga em vez de duplicá-la.
+    
+    Args:
+        model_class: Classe do modelo (SentenceTransformer ou CrossEncoder)
+        model_name: Nome do modelo
+        
+    Returns:
+        Instância do modelo ou None se o modelo não puder ser carregado
+    """
+    key = (model_class.__name__, model_name)
+    if key in _model_registry:
+        return _model_registry[key]
+    
+    with _model_registry_lock:
+        load_lock = _model_load_locks.setdefault(key, threading.Lock())
+    
+    with load_lock:
+        if key not in _model_registry:
+            try:
+                _model_registry[key] = model_class(model_name)
+            except Exception as e:
+                print(f"Erro ao carregar modelo {model_name}: {e}")
+                _model_registry[key] = None
+    
+    return _model_registry[key]
+
+def get_embedding_model(model_name):
+    """
+    Retorna o modelo de embeddings compartilhado pelo processo.
+    
+    Args:
+        model_name: Nome do modelo de embeddings
+        
+    Returns:
+        Instância de SentenceTransformer ou None se o modelo não puder ser carregado
+    """
+    return _get_shared_model(SentenceTransformer, model_name)
+
+def get_reranker_model(model_name):
+    """
+    Retorna o modelo de reranqueamento (cross-encoder) compartilhado pelo processo.
+    
+    Args:
+        model_name: Nome do modelo cross-encoder
+        
+    Returns:
+        Instância de CrossEncoder ou None se o modelo não puder ser carregado
+    """
+    return _get_shared_model(CrossEncoder, model_name)
+
+# Domínios da base de conhecimento. Documentos do domínio "geral" são compartilhados
+# por todos os domínios; "todos" carrega todos os domínios em um único índice.
+KNOWLEDGE_DOMAINS = ("cronograma", "custos", "escopo", "riscos")
+SHARED_DOMAIN = "geral"
+ALL_DOMAINS = "todos"
+
+# Tipos de índice suportados e limites usados na escolha automática
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+AUTO_FLAT_MAX_DOCS = 10000
+AUTO_HNSW_MAX_DOCS = 200000
+
+# Quantização escalar dos vetores do índice (None mantém float32). Os embeddings
+# guardados para reconstrução e avaliação passam a ocupar float16.
+QUANTIZATION_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit
+}
+
+# Flags de leitura com mapeamento em memória: os vetores de índices planos e as
+# listas invertidas dos índices IVF ficam no arquivo, compartilhados entre
+# processos pelo cache de páginas do sistema operacional
+_MMAP_FLAT_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+_MMAP_IVF_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+# Modos de recuperação: densa (embeddings), lexical (BM25) ou híbrida (fusão RRF)
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+
+# Tamanho padrão dos trechos (em palavras) e sobreposição entre trechos consecutivos
+DEFAULT_CHUNK_SIZE = 128
+DEFAULT_CHUNK_OVERLAP = 24
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+")
+
+# Orçamento padrão de tokens do prompt aumentado
+DEFAULT_PROMPT_TOKEN_BUDGET = 1024
+
+def _temp_path(path):
+    """
+    Gera um caminho temporário exclusivo ao lado de path, para gravação atômica com
+    os.replace: processos ou threads que gravam o mesmo arquivo ao mesmo tempo nunca
+    compartilham o arquivo temporário.
+    
+    Args:
+        path: Caminho do arquivo final
+        
+    Returns:
+        Caminho temporário
+    """
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+def _remove_temp_files(paths):
+    """
+    Remove arquivos temporários que sobraram de uma gravação interrompida.
+    
+    Args:
+        paths: Caminhos temporários
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+# Aproximação de tokens BPE: pedaços de até 4 caracteres de palavra ou pontuação
+_TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+def count_tokens(text):
+    """
+    Conta os tokens de um texto.
+    
+    Usa o tokenizador cl100k_base do tiktoken, se instalado; caso contrário, uma
+    aproximação determinística por pedaços de palavras.
+    
+    Args:
+        text: Texto a contar
+        
+    Returns:
+        Número de tokens
+    """
+    if _token_encoding is not None:
+        return len(_token_encoding.encode(text))
+    return len(_TOKEN_PATTERN.findall(text))
+
+def chunk_text(text, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP):
+    """
+    Divide um texto em trechos de até chunk_size palavras, respeitando o fim das frases.
+    
+    Trechos consecutivos compartilham as últimas frases (até chunk_overlap palavras)
+    para não perder contexto na fronteira. Frases maiores que chunk_size são
+    divididas por palavras, também com sobreposição.
+    
+    Args:
+        text: Texto a dividir
+        chunk_size: Número máximo de palavras por trecho
+        chunk_overlap: Número de palavras repetidas entre trechos consecutivos
+        
+    Returns:
+        Lista de trechos de texto
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap deve ser menor que chunk_size")
+    
+    # Quebrar frases longas demais em pedaços de palavras
+    sentences = []
+    for sentence in _SENTENCE_SPLIT.split(text.strip()):
+        words = sentence.split()
+        if len(words) <= chunk_size:
+            if words:
+                sentences.append(words)
+            continue
+        step = chunk_size - chunk_overlap
+        for start in range(0, len(words), step):
+            sentences.append(words[start:start + chunk_size])
+            if start + chunk_size >= len(words):
+                break
+    
+    chunks = []
+    current = []
+    current_size = 0
+    for words in sentences:
+        if current and current_size + len(words) > chunk_size:
+            chunks.append(" ".join(" ".join(s) for s in current))
+            
+            # Manter as últimas frases como sobreposição
+            overlap = []
+            overlap_size = 0
+            for previous in reversed(current):
+                if overlap_size + len(previous) > chunk_overlap:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += len(previous)
+            current, current_size = overlap, overlap_size
+        
+        current.append(words)
+        current_size += len(words)
+    
+    if current:
+        chunks.append(" ".join(" ".join(s) for s in current))
+    
+    return chunks
+
+def clear_embedding_models():
+    """
+    Remove todos os modelos do registro, liberando a memória na próxima coleta.
+    """
+    with _model_registry_lock:
+        _model_registry.clear()
+        _model_load_locks.clear()
+
+# Sistemas RAG multidomínio compartilhados por todo o processo
+_shared_rag_systems = {}
+_shared_rag_lock = threading.Lock()
+
+def get_shared_rag_system(**kwargs):
+    """
+    Retorna o sistema RAG com todos os domínios, criando-o no máximo uma vez por processo.
+    
+    Args:
+        **kwargs: Argumentos repassados ao PMBOKRAGSystem (exceto domain)
+        
+    Returns:
+        Instância de PMBOKRAGSystem com domain="todos"
+    """
+    # Chave em JSON: aceita argumentos não hasheáveis (ex.: listas); objetos entram pelo repr
+    key = json.dumps(kwargs, sort_keys=True, default=repr)
+    with _shared_rag_lock:
+        if key not in _shared_rag_systems:
+            _shared_rag_systems[key] = PMBOKRAGSystem(domain=ALL_DOMAINS, **kwargs)
+        return _shared_rag_systems[key]
+
+def get_domain_rag_system(domain, **kwargs):
+    """
+    Retorna uma visão de um domínio sobre o sistema RAG compartilhado.
+    
+    Args:
+        domain: Domínio do conhecimento (cronograma, custos, escopo, riscos)
+        **kwargs: Argumentos repassados ao PMBOKRAGSystem compartilhado
+        
+    Returns:
+        Instância de DomainRAGView
+    """
+    return DomainRAGView(get_shared_rag_system(**kwargs), domain)
+
+class QueryCache:
+    """
+    Cache LRU com limite de tamanho e expiração opcional (TTL).
+    
+    Usado pelo PMBOKRAGSystem para guardar embeddings de consultas e resultados
+    de busca. Seguro para uso a partir de várias threads.
+    """
+    
+    def __init__(self, max_size=256, ttl=None):
+        """
+        Inicializa o cache.
+        
+        Args:
+            max_size: Número máximo de entradas (0 desativa o cache)
+            ttl: Tempo de vida das entradas em segundos (None para não expirar)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """
+        Busca um valor no cache.
+        
+        Args:
+            key: Chave da entrada
+            
+        Returns:
+            Valor armazenado ou None se ausente ou expirado
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key, value):
+        """
+        Armazena um valor, descartando a entrada menos usada se o cache estiver cheio.
+        
+        Args:
+            key: Chave da entrada
+            value: Valor a armazenar
+        """
+        if self.max_size <= 0:
+            return
+        
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """
+        Remove todas as entradas do cache (os contadores são mantidos).
+        """
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """
+        Retorna as estatísticas de uso do cache.
+        
+        Returns:
+            Dicionário com acertos, falhas, taxa de acerto e tamanho atual
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size
+            }
+
+# Executor dedicado à codificação e busca das consultas assíncronas, compartilhado
+# por todo o processo
+_encoder_executor = None
+_encoder_executor_lock = threading.Lock()
+
+def get_encoder_executor(max_workers=1):
+    """
+    Retorna o executor compartilhado das consultas assíncronas.
+    
+    Com uma única thread, o modelo processa um lote por vez e os lotes que chegam
+    enquanto ele está ocupado se acumulam para a próxima chamada.
+    
+    Args:
+        max_workers: Número de threads, usado apenas na criação do executor
+        
+    Returns:
+        Instância de ThreadPoolExecutor
+    """
+    global _encoder_executor
+    with _encoder_executor_lock:
+        if _encoder_executor is None:
+            _encoder_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pmbok-encoder")
+        return _encoder_executor
+
+class QueryMicroBatcher:
+    """
+    Agrupa consultas assíncronas concorrentes em lotes.
+    
+    As consultas recebidas dentro de uma janela curta (ou até completar o lote)
+    são enviadas juntas a query_batch no executor compartilhado, de modo que
+    muitas análises simultâneas resultam em poucas chamadas a model.encode.
+    """
+    
+    def __init__(self, rag_system, window_ms=5, max_batch_size=64, executor=None):
+        """
+        Inicializa o agrupador.
+        
+        Args:
+            rag_system: Instância de PMBOKRAGSystem
+            window_ms: Tempo máximo de espera por outras consultas, em ms
+            max_batch_size: Número de consultas que dispara o lote imediatamente
+            executor: Executor das buscas (opcional; por padrão o compartilhado)
+        """
+        self.rag_system = rag_system
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.executor = executor or get_encoder_executor()
+        self.pending = []
+        self.flush_handle = None
+        self.num_batches = 0
+        self.num_queries = 0
+    
+    async def query(self, query_text, top_k=3, domain=None):
+        """
+        Agenda uma consulta e aguarda o resultado do lote em que ela entrar.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de trechos a retornar
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            
+        Returns:
+            Lista de resultados, como em PMBOKRAGSystem.query_batch
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((query_text, top_k, domain, future))
+        
+        if len(self.pending) >= self.max_batch_size:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """
+        Envia as consultas pendentes ao executor, um lote por (top_k, domínio).
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        
+        groups = defaultdict(list)
+        for item in pending:
+            groups[(item[1], item[2])].append(item)
+        
+        loop = asyncio.get_running_loop()
+        for (top_k, domain), items in groups.items():
+            self.num_batches += 1
+            self.num_queries += len(items)
+            batch = loop.run_in_executor(
+                self.executor,
+                functools.partial(self.rag_system.query_batch, [item[0] for item in items], top_k=top_k, domain=domain)
+            )
+            batch.add_done_callback(functools.partial(self._resolve, items))
+    
+    @staticmethod
+    def _resolve(items, batch):
+        """
+        Entrega a cada consulta do lote o seu resultado (ou o erro do lote).
+        
+        Args:
+            items: Consultas do lote
+            batch: Future do lote concluído
+        """
+        error = None if batch.cancelled() else batch.exception()
+        for i, (_, _, _, future) in enumerate(items):
+            if future.done():
+                continue
+            if batch.cancelled():
+                future.cancel()
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(batch.result()[i])
+    
+    def stats(self):
+        """
+        Retorna as estatísticas dos lotes.
+        
+        Returns:
+            Dicionário com número de lotes, de consultas e tamanho médio dos lotes
+        """
+        return {
+            "batches": self.num_batches,
+            "queries": self.num_queries,
+            "avg_batch_size": self.num_queries / self.num_batches if self.num_batches else 0.0
+        }
+
+def tokenize(text):
+    """
+    Divide um texto em termos para a busca lexical.
+    
+    Remove acentos e converte para minúsculas, de modo que "orçamento" e
+    "orcamento" ou "SPI" e "spi" sejam o mesmo termo.
+    
+    Args:
+        text: Texto a dividir
+        
+    Returns:
+        Lista de termos
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"\w+", text)
+
+class HashingEmbedder:
+    """
+    Gerador de embeddings offline baseado em n-gramas de caracteres.
+    
+    Usado quando o modelo SentenceTransformer não pode ser carregado. Cada texto
+    vira um vetor esparso de palavras e n-gramas de caracteres, projetado em
+    embedding_size dimensões por hashing com sinal (CRC32, estável entre processos)
+    e normalizado. O resultado é determinístico e não exige download.
+    """
+    
+    name = "hashing-char-ngram"
+    
+    def __init__(self, embedding_size=384, ngram_range=(3, 5)):
+        """
+        Inicializa o gerador.
+        
+        Args:
+            embedding_size: Dimensão dos embeddings
+            ngram_range: Tamanhos mínimo e máximo dos n-gramas de caracteres
+        """
+        self.embedding_size = embedding_size
+        self.ngram_range = ngram_range
+    
+    def get_sentence_embedding_dimension(self):
+        """
+        Retorna a dimensão dos embeddings (mesma interface do SentenceTransformer).
+        
+        Returns:
+            Dimensão dos embeddings
+        """
+        return self.embedding_size
+    
+    def _features(self, text):
+        """
+        Extrai as palavras e os n-gramas de caracteres de um texto.
+        
+        Args:
+            text: Texto de entrada
+            
+        Returns:
+            Dicionário {característica: frequência}
+        """
+        features = defaultdict(int)
+        min_n, max_n = self.ngram_range
+        for word in tokenize(text):
+            features["w:" + word] += 1
+            padded = f" {word} "
+            for n in range(min_n, max_n + 1):
+                for start in range(len(padded) - n + 1):
+                    features[padded[start:start + n]] += 1
+        return features
+    
+    def encode(self, texts, batch_size=32, **kwargs):
+        """
+        Gera os embeddings de uma lista de textos.
+        
+        Args:
+            texts: Lista de textos
+            batch_size: Ignorado (mantido pela compatibilidade com SentenceTransformer)
+            
+        Returns:
+            Matriz float32 (len(texts) x embedding_size) com linhas normalizadas
+        """
+        embeddings = np.zeros((len(texts), self.embedding_size), dtype='float32')
+        for row, text in enumerate(texts):
+            for feature, frequency in self._features(text).items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                # Frequência sublinear, para que termos repetidos não dominem o vetor
+                embeddings[row, digest % self.embedding_size] += sign * (1.0 + math.log(frequency))
+            
+            norm = np.linalg.norm(embeddings[row])
+            if norm > 0:
+                embeddings[row] /= norm
+        
+        return embeddings
+
+# Modelo de embeddings de cada processo do pool de codificação paralela
+_worker_model = None
+
+def _init_encode_worker(model_name, embedding_size):
+    """
+    Carrega o modelo de embeddings uma vez em cada processo do pool.
+    
+    Args:
+        model_name: Nome do modelo de embeddings
+        embedding_size: Dimensão usada pelo fallback sem modelo
+    """
+    global _worker_model
+    if model_name == HashingEmbedder.name:
+        _worker_model = HashingEmbedder(embedding_size)
+    else:
+        _worker_model = get_embedding_model(model_name) or HashingEmbedder(embedding_size)
+
+def _encode_shard(texts):
+    """
+    Codifica uma parte dos textos no processo do pool.
+    
+    Args:
+        texts: Lista de textos
+        
+    Returns:
+        Matriz float32 com os embeddings
+    """
+    return np.ascontiguousarray(_worker_model.encode(texts, batch_size=32), dtype='float32')
+
+def encode_parallel(texts, model_name, workers, embedding_size=384, shard_size=512):
+    """
+    Codifica textos dividindo-os em partes entre vários processos.
+    
+    Cada processo carrega o modelo uma única vez; as partes são devolvidas na
+    ordem original.
+    
+    Args:
+        texts: Lista de textos
+        model_name: Nome do modelo de embeddings
+        workers: Número de processos
+        embedding_size: Dimensão usada pelo fallback sem modelo
+        shard_size: Número de textos por parte
+        
+    Returns:
+        Matriz float32 (len(texts) x dimensão do modelo)
+    """
+    shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_encode_worker,
+                             initargs=(model_name, embedding_size)) as pool:
+        return np.vstack(list(pool.map(_encode_shard, shards)))
+
+class BM25Index:
+    """
+    Índice invertido com ranqueamento BM25 para busca lexical em memória.
+    
+    Complementa a busca densa em termos exatos, como as siglas do PMBOK
+    (SPI, CPI, EAC, VAC, CPM), e funciona sem modelo de embeddings.
+    """
+    
+    def __init__(self, k1=1.5, b=0.75):
+        """
+        Inicializa o índice.
+        
+        Args:
+            k1: Saturação da frequência do termo
+            b: Peso da normalização pelo tamanho do documento
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        self.doc_terms = {}
+        self.total_length = 0
+    
+    def add(self, doc_ids, texts):
+        """
+        Adiciona documentos ao índice.
+        
+        Args:
+            doc_ids: Ids inteiros dos documentos
+            texts: Textos dos documentos, na mesma ordem
+        """
+        for doc_id, text in zip(doc_ids, texts):
+            doc_id = int(doc_id)
+            if doc_id in self.doc_lengths:
+                self.remove([doc_id])
+            
+            terms = tokenize(text)
+            frequencies = defaultdict(int)
+            for term in terms:
+                frequencies[term] += 1
+            for term, frequency in frequencies.items():
+                self.postings[term][doc_id] = frequency
+            
+            self.doc_lengths[doc_id] = len(terms)
+            self.doc_terms[doc_id] = list(frequencies)
+            self.total_length += len(terms)
+    
+    def remove(self, doc_ids):
+        """
+        Remove documentos do índice.
+        
+        Args:
+            doc_ids: Ids inteiros dos documentos
+        """
+        for doc_id in doc_ids:
+            doc_id = int(doc_id)
+            if doc_id not in self.doc_lengths:
+                continue
+            for term in self.doc_terms.pop(doc_id):
+                postings = self.postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+    
+    def search(self, query_text, top_k=3, doc_filter=None):
+        """
+        Busca os documentos com maior pontuação BM25 para a consulta.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de documentos a retornar
+            doc_filter: Função que recebe o id do documento e diz se ele pode ser
+                retornado (opcional)
+                
+        Returns:
+            Lista de tuplas (id do documento, pontuação), em ordem decrescente
+        """
+        num_docs = len(self.doc_lengths)
+        if not num_docs:
+            return []
+        
+        average_length = self.total_length / num_docs
+        scores = defaultdict(float)
+        for term in set(tokenize(query_text)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / average_length
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if doc_filter is not None:
+            ranked = [item for item in ranked if doc_filter(item[0])]
+        
+        return ranked[:top_k]
+
 class PMBOKRAGSystem:
     """
     Sistema RAG (Retrieval Augmented Generation) baseado no PMBOK.
@@ -12,17 +738,96 @@ class PMBOKRAGSystem:
     para enriquecer as análises e recomendações dos agentes.
     """
     
-    def __init__(self, domain="cronograma", model_name="all-MiniLM-L6-v2", knowledge_dir=None):
+    def __init__(self, domain="cronograma", model_name="all-MiniLM-L6-v2", knowledge_dir=None,
+                 persist_index=True, index_type="flat", nprobe=8, ef_search=64, hnsw_m=32,
+                 cache_size=256, cache_ttl=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 chunk_overlap=DEFAULT_CHUNK_OVERLAP, retrieval_mode="hybrid", rrf_k=60,
+                 quantization=None, mmap=False, reranker_model=None, rerank_candidates=20,
+                 rerank_budget_ms=100, rerank_batch_size=16,
+                 prompt_token_budget=DEFAULT_PROMPT_TOKEN_BUDGET, batch_window_ms=5,
+                 max_batch_size=64, encode_workers=1, read_only=False):
         """
         Inicializa o sistema RAG.
         
         Args:
-            domain: Domínio do conhecimento (cronograma, custos, escopo, riscos)
+            domain: Domínio do conhecimento (cronograma, custos, escopo, riscos ou
+                todos para um único índice com todos os domínios)
             model_name: Nome do modelo de embeddings
             knowledge_dir: Diretório com a base de conhecimento (opcional)
+            persist_index: Se True, salva o índice e os embeddings em disco e os
+                reutiliza enquanto os documentos e o modelo não mudarem
+            index_type: Tipo do índice FAISS (flat, ivf, hnsw, ivfpq ou auto para
+                escolher com base no número de documentos)
+            nprobe: Número de listas visitadas por busca nos índices IVF
+            ef_search: Tamanho da fila de candidatos na busca do índice HNSW
+            hnsw_m: Número de vizinhos por nó do grafo HNSW
+            cache_size: Número máximo de consultas em cache (0 desativa o cache)
+            cache_ttl: Tempo de vida das entradas do cache em segundos (opcional)
+            chunk_size: Número máximo de palavras por trecho indexado
+            chunk_overlap: Número de palavras repetidas entre trechos consecutivos
+            retrieval_mode: Modo de recuperação (dense, lexical ou hybrid)
+            rrf_k: Constante da fusão por posição recíproca (RRF) no modo híbrido
+            quantization: Quantização escalar dos vetores (fp16, int8 ou None para
+                float32). Não se aplica ao ivfpq, que já é comprimido
+            mmap: Se True, abre o índice persistido e os embeddings mapeados em
+                memória, sem copiá-los para a RAM de cada processo
+            reranker_model: Nome do modelo cross-encoder usado para reranquear os
+                candidatos (opcional; None desativa o reranqueamento)
+            rerank_candidates: Número de candidatos buscados para o reranqueamento
+            rerank_budget_ms: Tempo máximo de reranqueamento por chamada, em ms.
+                Esgotado o tempo, as consultas restantes mantêm a ordem da busca
+            rerank_batch_size: Número de pares (consulta, trecho) por lote do cross-encoder
+            prompt_token_budget: Número máximo de tokens do prompt aumentado (None
+                sem limite)
+            batch_window_ms: Janela de agrupamento das consultas assíncronas, em ms
+            max_batch_size: Número máximo de consultas assíncronas por lote
+            encode_workers: Número de processos usados para codificar a base na
+                criação do índice (1 codifica no próprio processo)
+            read_only: Se True, usa o índice persistido, mas nunca grava no diretório
+                de conhecimento (ex.: artefatos publicados). Um índice que não
+                corresponda é recriado apenas em memória, e as alterações nos
+                documentos não são salvas
         """
+        if index_type != "auto" and index_type not in INDEX_TYPES:
+            raise ValueError(f"Tipo de índice inválido: {index_type}. Use auto ou um de {INDEX_TYPES}")
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Modo de recuperação inválido: {retrieval_mode}. Use um de {RETRIEVAL_MODES}")
+        if quantization is not None and quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"Quantização inválida: {quantization}. Use None ou um de {tuple(QUANTIZATION_TYPES)}")
+        
         self.domain = domain
         self.model_name = model_name
+        self.persist_index = persist_index
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.hnsw_m = hnsw_m
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.retrieval_mode = retrieval_mode
+        self.rrf_k = rrf_k
+        self.quantization = quantization
+        self.mmap = mmap
+        self.index_mmapped = False
+        self.rerank_candidates = rerank_candidates
+        self.rerank_budget_ms = rerank_budget_ms
+        self.rerank_batch_size = rerank_batch_size
+        self.rerank_stats = {"reranked": 0, "fallbacks": 0}
+        self.prompt_token_budget = prompt_token_budget
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_size = max_batch_size
+        self._batchers = {}
+        self.encode_workers = encode_workers
+        self.read_only = read_only
+        self.index_loaded = False
+        
+        # Caches de embeddings de consultas e de resultados de busca
+        self.index_version = 0
+        self.embedding_cache = QueryCache(cache_size, cache_ttl)
+        self.result_cache = QueryCache(cache_size, cache_ttl)
+        self.embeddings = None
+        self.chunks = []
+        self._chunk_positions = {}
         
         # Definir diretório da base de conhecimento
         if knowledge_dir is None:
@@ -33,32 +838,220 @@ class PMBOKRAGSystem:
             self.knowledge_dir = knowledge_dir
         
         # Criar diretório se não existir
-        os.makedirs(self.knowledge_dir, exist_ok=True)
+        if not read_only:
+            os.makedirs(self.knowledge_dir, exist_ok=True)
         
-        # Carregar modelo de embeddings
-        try:
-            self.model = SentenceTransformer(model_name)
+        # Obter modelo de embeddings compartilhado
+        if model_name == HashingEmbedder.name:
+            self.model = HashingEmbedder(embedding_size=384)
+        else:
+            self.model = get_embedding_model(model_name)
+        if self.model:
             self.embedding_size = self.model.get_sentence_embedding_dimension()
-        except:
-            print(f"Erro ao carregar modelo {model_name}. Usando fallback.")
-            self.model = None
-            self.embedding_size = 384  # Tamanho padrão para fallback
+        else:
+            print(f"Modelo {model_name} indisponível. Usando embeddings por n-gramas de caracteres.")
+            self.model = HashingEmbedder(embedding_size=384)  # Tamanho padrão para fallback
+            self.model_name = HashingEmbedder.name
+            self.embedding_size = self.model.get_sentence_embedding_dimension()
+        
+        # Obter modelo de reranqueamento compartilhado, se configurado
+        self.reranker = get_reranker_model(reranker_model) if reranker_model else None
+        if reranker_model and self.reranker is None:
+            print(f"Modelo de reranqueamento {reranker_model} indisponível. Mantendo a ordem da busca.")
         
-        # Carregar ou criar base de conhecimento
+        # Carregar ou criar base de conhecimento e dividi-la em trechos
         self.documents = self._load_knowledge()
+        self.chunks = self._chunk_documents(self.documents)
+        self._rebuild_positions()
         
-        # Criar índice de embeddings
-        self.index = self._create_index()
+        # Índice lexical sobre os mesmos trechos
+        self.bm25 = BM25Index()
+        self.bm25.add(self._chunk_int_ids(), self._lexical_texts(self.chunks))
+        
+        # Resolver o tipo de índice a partir do tamanho da base
+        self.resolved_index_type = self._resolve_index_type(len(self.chunks))
+        
+        # Carregar índice salvo ou criar um novo
+        self.index = self._load_persisted_index()
+        self.index_loaded = self.index is not None
+        if self.index is None:
+            self.index = self._create_index()
+            self._save_index()
+            if self.mmap:
+                # Reabrir o índice recém-salvo mapeado em memória, liberando a cópia em RAM
+                mapped_index = self._load_persisted_index()
+                if mapped_index is not None:
+                    self.index = mapped_index
+    
+    def _index_paths(self):
+        """
+        Retorna os caminhos dos arquivos do índice persistido.
+        
+        Returns:
+            Tupla (arquivo do índice FAISS, arquivo de embeddings, arquivo de metadados)
+        """
+        base = os.path.join(self.knowledge_dir, f"pmbok_{self.domain}")
+        return f"{base}.index", f"{base}_embeddings.npy", f"{base}_index.json"
+    
+    def _knowledge_hash(self):
+        """
+        Calcula o hash dos documentos, do modelo de embeddings e do tipo de índice.
+        
+        Returns:
+            Hash SHA-256 em hexadecimal
+        """
+        payload = json.dumps(
+            {
+                "model_name": self.model_name,
+                "index_type": self.resolved_index_type,
+                "hnsw_m": self.hnsw_m,
+                "quantization": self.quantization,
+                "chunk_size": self.chunk_size,
+                "chunk_overlap": self.chunk_overlap,
+                "documents": self.documents
+            },
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _load_persisted_index(self):
+        """
+        Carrega o índice salvo em disco se ele corresponder aos documentos e ao modelo atuais.
+        
+        Returns:
+            Índice FAISS ou None se não houver índice válido
+        """
+        if not self.persist_index or not self.model or not self.documents:
+            return None
+        
+        index_file, embeddings_file, meta_file = self._index_paths()
+        if not all(os.path.exists(path) for path in (index_file, embeddings_file, meta_file)):
+            return None
+        
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("hash") != self._knowledge_hash():
+                return None
+            
+            if self.mmap:
+                ivf = self.resolved_index_type in ("ivf", "ivfpq")
+                index = faiss.read_index(index_file, _MMAP_IVF_FLAGS if ivf else _MMAP_FLAT_FLAGS)
+                embeddings = np.load(embeddings_file, mmap_mode="r")
+            else:
+                index = faiss.read_index(index_file)
+                embeddings = np.load(embeddings_file)
+        except Exception as e:
+            print(f"Erro ao carregar índice salvo de {index_file}: {e}. Recriando índice.")
+            return None
+        
+        if index.ntotal != len(self.chunks) or embeddings.shape[0] != len(self.chunks):
+            return None
+        
+        # Índices antigos, sem mapeamento de ids, são recriados
+        if not isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexIVF)):
+            return None
+        
+        self.embeddings = embeddings
+        self.index_mmapped = self.mmap
+        self._configure_search(index)
+        return index
+    
+    def _ensure_writable(self):
+        """
+        Substitui o índice mapeado em memória (somente leitura) por uma cópia em RAM
+        antes de uma alteração. O arquivo em disco corresponde ao índice mapeado.
+        """
+        if not self.index_mmapped:
+            return
+        
+        index_file, _, _ = self._index_paths()
+        self.index = faiss.read_index(index_file)
+        self.embeddings = np.array(self.embeddings)
+        self.index_mmapped = False
+        self._configure_search(self.index)
+    
+    def _stored_embeddings(self, embeddings):
+        """
+        Converte os embeddings para o tipo usado no armazenamento.
+        
+        Args:
+            embeddings: Matriz de embeddings
+            
+        Returns:
+            Matriz float16 se houver quantização, senão float32
+        """
+        dtype = 'float16' if self.quantization else 'float32'
+        return np.ascontiguousarray(embeddings, dtype=dtype)
+    
+    def _save_index(self):
+        """
+        Salva o índice, os embeddings e o hash da base de conhecimento em disco.
+        """
+        if not self.persist_index or self.read_only or not self.model or self.index is None:
+            return
+        
+        index_file, embeddings_file, meta_file = self._index_paths()
+        # Gravar em arquivos temporários exclusivos e substituir, para nunca deixar arquivos
+        # pela metade nem misturar gravações simultâneas de vários processos
+        index_tmp, embeddings_tmp, meta_tmp = (
+            _temp_path(index_file), _temp_path(embeddings_file), _temp_path(meta_file)
+        )
+        try:
+            faiss.write_index(self.index, index_tmp)
+            os.replace(index_tmp, index_file)
+            with open(embeddings_tmp, 'wb') as f:
+                np.save(f, self.embeddings)
+            os.replace(embeddings_tmp, embeddings_file)
+            # Metadados por último: só marcam o índice como válido após os demais arquivos
+            with open(meta_tmp, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "hash": self._knowledge_hash(),
+                    "model_name": self.model_name,
+                    "num_documents": len(self.documents),
+                    "num_chunks": len(self.chunks),
+                    "embedding_size": self.embedding_size,
+                    "index_type": self.resolved_index_type,
+                    "quantization": self.quantization,
+                    "file_format": type(self.index).__name__
+                }, f, ensure_ascii=False, indent=2)
+            os.replace(meta_tmp, meta_file)
+        except Exception as e:
+            print(f"Erro ao salvar índice em {index_file}: {e}")
+            _remove_temp_files((index_tmp, embeddings_tmp, meta_tmp))
     
     def _load_knowledge(self):
         """
         Carrega a base de conhecimento do PMBOK.
         
+        Returns:
+            Lista de documentos
+        """
+        if self.domain != ALL_DOMAINS:
+            return self._load_domain_knowledge(self.domain)
+        
+        # Índice único: cada domínio e os documentos gerais aparecem uma só vez,
+        # marcados com o domínio de origem para filtragem na consulta
+        documents = []
+        for domain in KNOWLEDGE_DOMAINS + (SHARED_DOMAIN,):
+            for doc in self._load_domain_knowledge(domain):
+                doc.setdefault("domain", domain)
+                documents.append(doc)
+        
+        return documents
+    
+    def _load_domain_knowledge(self, domain):
+        """
+        Carrega a base de conhecimento de um domínio, criando a base padrão se necessário.
+        
+        Args:
+            domain: Domínio do conhecimento
+            
         Returns:
             Lista de documentos
         """
         # Verificar se existe arquivo de conhecimento para o domínio
-        knowledge_file = os.path.join(self.knowledge_dir, f"pmbok_{self.domain}.json")
+        knowledge_file = self._knowledge_file(domain)
         
         if os.path.exists(knowledge_file):
             # Carregar conhecimento existente
@@ -66,22 +1059,79 @@ class PMBOKRAGSystem:
                 return json.load(f)
         else:
             # Criar base de conhecimento padrão
-            documents = self._create_default_knowledge()
+            documents = self._create_default_knowledge(domain)
             
             # Salvar base de conhecimento
-            with open(knowledge_file, 'w', encoding='utf-8') as f:
+            if not self.read_only:
+                self._write_knowledge_file(knowledge_file, documents)
+            
+            return documents
+    
+    def _knowledge_file(self, domain=None):
+        """
+        Retorna o caminho do arquivo JSON da base de conhecimento de um domínio.
+        
+        Args:
+            domain: Domínio do conhecimento (opcional; por padrão o do sistema)
+            
+        Returns:
+            Caminho do arquivo
+        """
+        return os.path.join(self.knowledge_dir, f"pmbok_{domain or self.domain}.json")
+    
+    def _save_knowledge(self, documents):
+        """
+        Salva a base de conhecimento em disco de forma atômica.
+        
+        No índice único, os documentos são gravados no arquivo do seu domínio.
+        
+        Args:
+            documents: Lista de documentos
+        """
+        if self.read_only:
+            return
+        
+        if self.domain != ALL_DOMAINS:
+            self._write_knowledge_file(self._knowledge_file(), documents)
+            return
+        
+        by_domain = {domain: [] for domain in KNOWLEDGE_DOMAINS + (SHARED_DOMAIN,)}
+        for doc in documents:
+            by_domain.setdefault(doc["domain"], []).append(doc)
+        for domain, domain_documents in by_domain.items():
+            self._write_knowledge_file(self._knowledge_file(domain), domain_documents)
+    
+    @staticmethod
+    def _write_knowledge_file(knowledge_file, documents):
+        """
+        Grava um arquivo JSON de conhecimento de forma atômica.
+        
+        Args:
+            knowledge_file: Caminho do arquivo
+            documents: Lista de documentos
+        """
+        # Arquivo temporário exclusivo: gravações simultâneas não se misturam antes do os.replace
+        temp_file = _temp_path(knowledge_file)
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(documents, f, ensure_ascii=False, indent=2)
-            
-            return documents
+            os.replace(temp_file, knowledge_file)
+        except BaseException:
+            _remove_temp_files((temp_file,))
+            raise
     
-    def _create_default_knowledge(self):
+    def _create_default_knowledge(self, domain=None):
         """
         Cria uma base de conhecimento padrão para o domínio.
         
+        Args:
+            domain: Domínio do conhecimento (opcional; por padrão o do sistema)
+            
         Returns:
             Lista de documentos
         """
-        if self.domain == "cronograma":
+        domain = domain or self.domain
+        if domain == "cronograma":
             return [
                 {
                     "id": "cronograma_001",
@@ -134,7 +1184,7 @@ class PMBOKRAGSystem:
                     "content": "Melhores práticas para gerenciamento eficaz do cronograma incluem: Desenvolver um cronograma realista com a participação da equipe. Incluir reservas de contingência para riscos conhecidos. Manter o cronograma atualizado com o progresso real. Comunicar regularmente o status do cronograma aos stakeholders. Analisar tendências de desempenho para identificar problemas potenciais antecipadamente. Implementar ações corretivas rapidamente quando desvios são identificados. Documentar lições aprendidas para projetos futuros."
                 }
             ]
-        elif self.domain == "custos":
+        elif domain == "custos":
             return [
                 {
                     "id": "custos_001",
@@ -187,7 +1237,7 @@ class PMBOKRAGSystem:
                     "content": "Melhores práticas para gerenciamento eficaz de custos incluem: Desenvolver estimativas realistas com a participação da equipe. Incluir reservas adequadas para riscos conhecidos. Manter o orçamento atualizado com os custos reais. Comunicar regularmente o status dos custos aos stakeholders. Analisar tendências de desempenho para identificar problemas potenciais antecipadamente. Implementar ações corretivas rapidamente quando desvios são identificados. Documentar lições aprendidas para projetos futuros."
                 }
             ]
-        elif self.domain == "escopo":
+        elif domain == "escopo":
             return [
                 {
                     "id": "escopo_001",
@@ -240,7 +1290,7 @@ class PMBOKRAGSystem:
                     "content": "Melhores práticas para gerenciamento eficaz do escopo incluem: Envolver os stakeholders na definição do escopo. Documentar claramente o escopo, incluindo o que está dentro e fora do escopo. Obter aprovação formal da declaração do escopo. Criar uma EAP detalhada e completa. Implementar um processo rigoroso de controle de mudanças. Comunicar regularmente o status do escopo aos stakeholders. Validar formalmente as entregas com os stakeholders. Documentar lições aprendidas relacionadas ao escopo para projetos futuros."
                 }
             ]
-        elif self.domain == "riscos":
+        elif domain == "riscos":
             return [
                 {
                     "id": "riscos_001",
@@ -313,83 +1363,942 @@ class PMBOKRAGSystem:
                 }
             ]
     
-    def _create_index(self):
+    def _create_index(self):
+        """
+        Cria um índice de embeddings para a base de conhecimento.
+        
+        Returns:
+            Índice FAISS
+        """
+        # Verificar se há trechos
+        if not self.chunks:
+            return None
+        
+        # Criar embeddings dos trechos, em lotes (em vários processos, se configurado)
+        texts = [chunk["content"] for chunk in self.chunks]
+        if self.encode_workers > 1 and len(texts) > 1:
+            embeddings = encode_parallel(texts, self.model_name, self.encode_workers, self.embedding_size)
+        else:
+            embeddings = self._encode(texts)
+        self.embeddings = self._stored_embeddings(embeddings)
+        
+        # Criar índice
+        return self._build_faiss_index(embeddings, self._chunk_int_ids())
+    
+    def _chunk_documents(self, documents):
+        """
+        Divide os documentos em trechos indexáveis.
+        
+        Cada trecho mantém o id e o título do documento de origem (e demais
+        metadados), além de "chunk_id" e "chunk_index".
+        
+        Args:
+            documents: Lista de documentos
+            
+        Returns:
+            Lista de trechos
+        """
+        chunks = []
+        for doc in documents:
+            for chunk_index, content in enumerate(chunk_text(doc["content"], self.chunk_size, self.chunk_overlap)):
+                chunk = dict(doc)
+                chunk["content"] = content
+                chunk["chunk_id"] = f"{doc['id']}#{chunk_index}"
+                chunk["chunk_index"] = chunk_index
+                chunks.append(chunk)
+        
+        return chunks
+    
+    @staticmethod
+    def _int_id(chunk_id):
+        """
+        Converte o id textual de um trecho no id inteiro usado pelo índice FAISS.
+        
+        O valor é derivado de um hash estável, de modo que não é preciso persistir
+        uma tabela de correspondência entre execuções.
+        
+        Args:
+            chunk_id: Id textual do trecho
+            
+        Returns:
+            Inteiro positivo de 63 bits
+        """
+        digest = hashlib.sha1(str(chunk_id).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') & 0x7FFFFFFFFFFFFFFF
+    
+    def _chunk_int_ids(self, chunks=None):
+        """
+        Retorna os ids inteiros dos trechos, na ordem da lista.
+        
+        Args:
+            chunks: Lista de trechos (opcional; por padrão self.chunks)
+            
+        Returns:
+            Array int64
+        """
+        chunks = self.chunks if chunks is None else chunks
+        return np.array([self._int_id(chunk["chunk_id"]) for chunk in chunks], dtype='int64')
+    
+    @staticmethod
+    def _lexical_texts(chunks):
+        """
+        Retorna os textos indexados pelo BM25 (título e conteúdo de cada trecho).
+        
+        Args:
+            chunks: Lista de trechos
+            
+        Returns:
+            Lista de textos
+        """
+        return [f"{chunk.get('title', '')} {chunk['content']}" for chunk in chunks]
+    
+    def _rebuild_positions(self):
+        """
+        Reconstrói o mapa de id inteiro do índice para a posição em self.chunks.
+        """
+        self._chunk_positions = {
+            self._int_id(chunk["chunk_id"]): position
+            for position, chunk in enumerate(self.chunks)
+        }
+    
+    def _resolve_index_type(self, num_vectors):
+        """
+        Determina o tipo de índice a ser usado.
+        
+        Args:
+            num_vectors: Número de vetores a indexar
+            
+        Returns:
+            Tipo de índice (flat, ivf, hnsw ou ivfpq)
+        """
+        if self.index_type != "auto":
+            return self.index_type
+        
+        # Busca exata é mais rápida e precisa em bases pequenas
+        if num_vectors <= AUTO_FLAT_MAX_DOCS:
+            return "flat"
+        elif num_vectors <= AUTO_HNSW_MAX_DOCS:
+            return "hnsw"
+        else:
+            return "ivfpq"
+    
+    def _ivf_nlist(self, num_vectors):
+        """
+        Calcula o número de listas invertidas para os índices IVF.
+        
+        Args:
+            num_vectors: Número de vetores de treinamento
+            
+        Returns:
+            Número de listas (centróides)
+        """
+        # Regra usual de 4*sqrt(n), limitada para ter ~39 pontos de treino por centróide
+        nlist = int(4 * math.sqrt(num_vectors))
+        return max(1, min(nlist, num_vectors // 39))
+    
+    def _pq_params(self, num_vectors):
+        """
+        Escolhe os parâmetros da quantização por produto (PQ).
+        
+        Args:
+            num_vectors: Número de vetores de treinamento
+            
+        Returns:
+            Tupla (número de subquantizadores, bits por código)
+        """
+        # Subvetores de ~8 dimensões; m precisa dividir a dimensão do embedding
+        m = max(1, self.embedding_size // 8)
+        while self.embedding_size % m != 0:
+            m -= 1
+        
+        # Cada subquantizador tem 2^nbits centróides, que precisam de pontos de treino
+        nbits = max(1, min(8, int(math.log2(max(2, num_vectors)))))
+        return m, nbits
+    
+    def _build_faiss_index(self, embeddings, ids):
+        """
+        Cria, treina e popula o índice FAISS do tipo configurado.
+        
+        Os vetores são adicionados com os ids inteiros dos documentos, o que permite
+        adicionar e remover documentos sem reconstruir o índice.
+        
+        Args:
+            embeddings: Matriz com os embeddings dos documentos
+            ids: Array int64 com os ids inteiros dos documentos
+            
+        Returns:
+            Índice FAISS
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+        num_vectors = embeddings.shape[0]
+        index_type = self.resolved_index_type
+        d = self.embedding_size
+        qtype = QUANTIZATION_TYPES.get(self.quantization)
+        
+        if index_type == "hnsw" and qtype is not None:
+            index = faiss.IndexHNSWSQ(d, qtype, self.hnsw_m)
+        elif index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(d, self.hnsw_m)
+        elif index_type == "ivf" and qtype is not None:
+            quantizer = faiss.IndexFlatL2(d)
+            index = faiss.IndexIVFScalarQuantizer(quantizer, d, self._ivf_nlist(num_vectors), qtype)
+        elif index_type == "ivf":
+            quantizer = faiss.IndexFlatL2(d)
+            index = faiss.IndexIVFFlat(quantizer, d, self._ivf_nlist(num_vectors))
+        elif index_type == "ivfpq":
+            m, nbits = self._pq_params(num_vectors)
+            quantizer = faiss.IndexFlatL2(d)
+            index = faiss.IndexIVFPQ(quantizer, d, self._ivf_nlist(num_vectors), m, nbits)
+        elif qtype is not None:
+            index = faiss.IndexScalarQuantizer(d, qtype)
+        else:
+            index = faiss.IndexFlatL2(d)
+        
+        # Índices IVF/PQ e a quantização int8 precisam ser treinados no próprio corpus
+        if not index.is_trained:
+            index.train(embeddings)
+        
+        # Índices IVF aceitam ids nativamente; os demais são envolvidos em um IndexIDMap2
+        if not isinstance(index, faiss.IndexIVF):
+            index = faiss.IndexIDMap2(index)
+        
+        index.add_with_ids(embeddings, ids)
+        self._configure_search(index)
+        
+        return index
+    
+    @staticmethod
+    def _base_index(index):
+        """
+        Retorna o índice interno de um IndexIDMap (ou o próprio índice).
+        
+        Args:
+            index: Índice FAISS
+            
+        Returns:
+            Índice FAISS sem o mapeamento de ids
+        """
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            return faiss.downcast_index(index.index)
+        return index
+    
+    def _configure_search(self, index):
+        """
+        Aplica os parâmetros de busca (nprobe, efSearch) ao índice.
+        
+        Args:
+            index: Índice FAISS
+        """
+        index = self._base_index(index)
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = max(1, min(self.nprobe, index.nlist))
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.ef_search
+    
+    def set_search_params(self, nprobe=None, ef_search=None):
+        """
+        Ajusta os parâmetros de busca sem reconstruir o índice.
+        
+        Args:
+            nprobe: Número de listas visitadas nos índices IVF (opcional)
+            ef_search: Tamanho da fila de candidatos no índice HNSW (opcional)
+        """
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if self.index is not None:
+            self._configure_search(self.index)
+            self._invalidate_results()
+    
+    def _invalidate_results(self):
+        """
+        Incrementa a versão do índice e descarta os resultados de busca em cache.
+        
+        Deve ser chamado sempre que o conteúdo ou os parâmetros do índice mudarem.
+        Os embeddings das consultas continuam válidos e são mantidos.
+        """
+        self.index_version += 1
+        self.result_cache.clear()
+    
+    def cache_stats(self):
+        """
+        Retorna as estatísticas dos caches de consulta.
+        
+        Returns:
+            Dicionário com as estatísticas dos caches de embeddings e de resultados
+        """
+        return {
+            "index_version": self.index_version,
+            "embeddings": self.embedding_cache.stats(),
+            "results": self.result_cache.stats(),
+            "rerank": dict(self.rerank_stats)
+        }
+    
+    @staticmethod
+    def _normalize_query(query_text):
+        """
+        Normaliza o texto da consulta para uso como chave de cache.
+        
+        Args:
+            query_text: Texto da consulta
+            
+        Returns:
+            Texto em minúsculas com espaços colapsados
+        """
+        return re.sub(r"\s+", " ", query_text).strip().lower()
+    
+    def _encode_queries(self, query_texts, batch_size=32):
+        """
+        Gera os embeddings das consultas, reaproveitando os que estão em cache.
+        
+        Args:
+            query_texts: Lista de textos de consulta
+            batch_size: Tamanho do lote usado pelo modelo
+            
+        Returns:
+            Matriz float32 com um embedding por consulta
+        """
+        keys = [self._normalize_query(text) for text in query_texts]
+        embeddings = [self.embedding_cache.get(key) for key in keys]
+        
+        # Codificar apenas as consultas ausentes do cache, em um único lote
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self._encode([query_texts[i] for i in missing], batch_size=batch_size)
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                self.embedding_cache.put(keys[i], embedding)
+        
+        return np.ascontiguousarray(np.vstack(embeddings), dtype='float32')
+    
+    def describe_index(self):
+        """
+        Descreve o índice em uso.
+        
+        Returns:
+            Dicionário com tipo, formato de arquivo e parâmetros do índice
+        """
+        if self.index is None:
+            return {"index_type": self.resolved_index_type, "ntotal": 0}
+        
+        base_index = self._base_index(self.index)
+        description = {
+            "index_type": self.resolved_index_type,
+            "file_format": type(self.index).__name__,
+            "base_index": type(base_index).__name__,
+            "ntotal": self.index.ntotal,
+            "is_trained": self.index.is_trained,
+            "embedding_size": self.embedding_size,
+            "quantization": self.quantization,
+            "mmap": self.index_mmapped,
+            "embeddings_bytes": self.embeddings.nbytes if self.embeddings is not None else 0
+        }
+        index_file, _, _ = self._index_paths()
+        if self.persist_index and os.path.exists(index_file):
+            description["index_file_bytes"] = os.path.getsize(index_file)
+        if isinstance(base_index, faiss.IndexIVF):
+            description["nlist"] = base_index.nlist
+            description["nprobe"] = base_index.nprobe
+        if isinstance(base_index, faiss.IndexIVFPQ):
+            description["pq_m"] = base_index.pq.M
+            description["pq_nbits"] = base_index.pq.nbits
+        if isinstance(base_index, faiss.IndexHNSW):
+            description["hnsw_m"] = self.hnsw_m
+            description["ef_search"] = base_index.hnsw.efSearch
+        
+        return description
+    
+    def evaluate_recall(self, query_texts=None, top_k=3, max_queries=100):
+        """
+        Mede o recall do índice em uso contra a busca exata (IndexFlatL2) sobre os
+        embeddings float32.
+        
+        Com quantização, os embeddings armazenados são float16; a referência é então
+        construída recodificando os trechos em float32, de modo que o recall inclua a
+        perda da quantização em relação ao índice plano float32.
+        
+        Args:
+            query_texts: Consultas de avaliação (opcional; por padrão usa os
+                próprios documentos como consultas)
+            top_k: Número de vizinhos comparados
+            max_queries: Número máximo de consultas quando query_texts é None
+            
+        Returns:
+            Dicionário com recall@k e latência média por consulta (ms) do índice
+            avaliado e da busca exata
+        """
+        if self.index is None or self.embeddings is None:
+            return {"recall": None, "num_queries": 0}
+        
+        if self.quantization:
+            reference = self._encode([chunk["content"] for chunk in self.chunks])
+        else:
+            reference = np.ascontiguousarray(self.embeddings, dtype='float32')
+        
+        if query_texts:
+            queries = self._encode(list(query_texts))
+        else:
+            queries = np.ascontiguousarray(reference[:max_queries])
+        
+        top_k = min(top_k, len(self.chunks))
+        exact = faiss.IndexFlatL2(self.embedding_size)
+        exact.add(reference)
+        
+        start = time.perf_counter()
+        _, exact_positions = exact.search(queries, top_k)
+        exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        exact_ids = self._chunk_int_ids()[exact_positions]
+        
+        start = time.perf_counter()
+        _, approx_ids = self.index.search(queries, top_k)
+        approx_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        
+        hits = sum(
+            len(set(exact_row) & set(approx_row[approx_row >= 0]))
+            for exact_row, approx_row in zip(exact_ids, approx_ids)
+        )
+        
+        return {
+            "index_type": self.resolved_index_type,
+            "file_format": type(self.index).__name__,
+            "quantization": self.quantization,
+            "mmap": self.index_mmapped,
+            "top_k": top_k,
+            "num_queries": len(queries),
+            "recall": hits / (len(queries) * top_k),
+            "latency_ms": approx_ms,
+            "exact_latency_ms": exact_ms
+        }
+    
+    def _encode(self, texts, batch_size=32):
+        """
+        Gera os embeddings de uma lista de textos em uma única chamada ao modelo.
+        
+        Args:
+            texts: Lista de textos
+            batch_size: Tamanho do lote usado pelo modelo
+            
+        Returns:
+            Matriz float32 contígua (len(texts) x embedding_size)
+        """
+        embeddings = self.model.encode(texts, batch_size=batch_size)
+        
+        return np.ascontiguousarray(embeddings, dtype='float32')
+    
+    def query(self, query_text, top_k=3, domain=None):
+        """
+        Busca documentos relevantes para a consulta.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de documentos a retornar
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            
+        Returns:
+            Lista de trechos relevantes (com "id", "title" e "content" do trecho)
+        """
+        results = self.query_batch([query_text], top_k=top_k, domain=domain)
+        if not results:
+            return []
+        
+        # Retornar documentos relevantes
+        return [result["document"] for result in results[0]]
+    
+    def query_batch(self, query_texts, top_k=3, batch_size=32, domain=None):
+        """
+        Busca documentos relevantes para várias consultas de uma só vez.
+        
+        Todas as consultas são codificadas em uma chamada ao modelo e pesquisadas
+        com uma única busca matricial no índice. Com um cross-encoder configurado,
+        são buscados rerank_candidates candidatos por consulta e reranqueados
+        dentro de rerank_budget_ms.
+        
+        Args:
+            query_texts: Lista de textos de consulta
+            top_k: Número de documentos a retornar por consulta
+            batch_size: Tamanho do lote usado pelo modelo
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            
+        Returns:
+            Lista (uma por consulta) de listas de dicionários com "document" (o trecho
+            encontrado), "distance" (distância L2 da busca densa, ou None se o trecho
+            veio apenas da busca lexical) e "score" (pontuação usada na ordenação,
+            que é a do cross-encoder quando a consulta foi reranqueada)
+        """
+        # Verificar se há índice
+        if self.index is None or not self.chunks:
+            return [[] for _ in query_texts]
+        
+        if not query_texts:
+            return []
+        
+        query_texts = list(query_texts)
+        top_k = min(top_k, len(self.chunks))
+        
+        # Consultar o cache de resultados (chave: consulta normalizada, top_k, domínio,
+        # modo de recuperação e versão do índice)
+        keys = [
+            (self._normalize_query(text), top_k, domain, self.retrieval_mode, self.index_version)
+            for text in query_texts
+        ]
+        hits = [self.result_cache.get(key) for key in keys]
+        missing = [i for i, hit in enumerate(hits) if hit is None]
+        
+        if missing:
+            # Buscar apenas as consultas ausentes do cache
+            missing_texts = [query_texts[i] for i in missing]
+            if self.reranker is None:
+                results = self._retrieve(missing_texts, top_k, domain, batch_size)
+                for i, hit in zip(missing, results):
+                    hits[i] = hit
+                    self.result_cache.put(keys[i], hit)
+            else:
+                # Buscar mais candidatos e reranqueá-los dentro do orçamento de tempo
+                num_candidates = min(max(top_k, self.rerank_candidates), len(self.chunks))
+                candidates = self._retrieve(missing_texts, num_candidates, domain, batch_size)
+                deadline = time.perf_counter() + self.rerank_budget_ms / 1000
+                for i, text, candidate in zip(missing, missing_texts, candidates):
+                    reranked = self._rerank(text, candidate, deadline)
+                    if reranked is None:
+                        # Orçamento esgotado: manter a ordem da busca e não guardar em cache
+                        self.rerank_stats["fallbacks"] += 1
+                        hits[i] = candidate[:top_k]
+                    else:
+                        self.rerank_stats["reranked"] += 1
+                        hits[i] = reranked[:top_k]
+                        self.result_cache.put(keys[i], hits[i])
+        
+        return [
+            [
+                {"document": self.chunks[self._chunk_positions[chunk_id]], "distance": distance, "score": score}
+                for chunk_id, distance, score in hit
+            ]
+            for hit in hits
+        ]
+    
+    def _retrieve(self, query_texts, top_k, domain=None, batch_size=32):
+        """
+        Executa a busca no modo de recuperação configurado.
+        
+        Args:
+            query_texts: Lista de textos de consulta
+            top_k: Número de trechos por consulta
+            domain: Domínio a manter, além dos documentos gerais (opcional)
+            batch_size: Tamanho do lote usado pelo modelo
+            
+        Returns:
+            Lista (uma por consulta) de listas de tuplas (id do trecho, distância ou None, pontuação)
+        """
+        if self.retrieval_mode == "lexical":
+            return [
+                [(chunk_id, None, score) for chunk_id, score in self._lexical_search(text, top_k, domain)]
+                for text in query_texts
+            ]
+        elif self.retrieval_mode == "dense":
+            query_embeddings = self._encode_queries(query_texts, batch_size=batch_size)
+            return [
+                [(chunk_id, distance, -distance) for chunk_id, distance in hit]
+                for hit in self._search(query_embeddings, top_k, domain)
+            ]
+        else:
+            return self._hybrid_search(query_texts, top_k, domain, batch_size)
+    
+    def _rerank(self, query_text, candidates, deadline):
+        """
+        Reordena os candidatos de uma consulta pela pontuação do cross-encoder.
+        
+        Os pares (consulta, trecho) são pontuados em lotes; o prazo é verificado
+        antes de cada lote.
+        
+        Args:
+            query_text: Texto da consulta
+            candidates: Lista de tuplas (id do trecho, distância, pontuação)
+            deadline: Instante limite (time.perf_counter) para o reranqueamento
+            
+        Returns:
+            Lista de tuplas (id do trecho, distância, pontuação do cross-encoder)
+            ordenada, ou None se o prazo se esgotar antes do fim
+        """
+        pairs = [
+            (query_text, self.chunks[self._chunk_positions[chunk_id]]["content"])
+            for chunk_id, _, _ in candidates
+        ]
+        
+        scores = []
+        for start in range(0, len(pairs), self.rerank_batch_size):
+            if time.perf_counter() >= deadline:
+                return None
+            batch = pairs[start:start + self.rerank_batch_size]
+            scores.extend(float(score) for score in self.reranker.predict(batch, batch_size=len(batch)))
+        
+        reranked = [
+            (chunk_id, distance, score)
+            for (chunk_id, distance, _), score in zip(candidates, scores)
+        ]
+        reranked.sort(key=lambda item: item[2], reverse=True)
+        return reranked
+    
+    def _get_batcher(self):
+        """
+        Retorna o agrupador de consultas do event loop em execução.
+        
+        Returns:
+            Instância de QueryMicroBatcher
+        """
+        loop = asyncio.get_running_loop()
+        batcher = self._batchers.get(loop)
+        if batcher is None:
+            # Descartar agrupadores de event loops já encerrados
+            self._batchers = {key: value for key, value in self._batchers.items() if not key.is_closed()}
+            batcher = QueryMicroBatcher(self, self.batch_window_ms, self.max_batch_size)
+            self._batchers[loop] = batcher
+        return batcher
+    
+    async def aquery_results(self, query_text, top_k=3, domain=None):
+        """
+        Versão assíncrona de query_batch para uma consulta.
+        
+        Consultas concorrentes são agrupadas em um único lote no executor do
+        codificador, sem bloquear o event loop.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de trechos a retornar
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            
+        Returns:
+            Lista de dicionários com "document", "distance" e "score"
+        """
+        return await self._get_batcher().query(query_text, top_k, domain)
+    
+    async def aquery(self, query_text, top_k=3, domain=None):
+        """
+        Versão assíncrona de query.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de documentos a retornar
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            
+        Returns:
+            Lista de trechos relevantes
+        """
+        results = await self.aquery_results(query_text, top_k, domain)
+        return [result["document"] for result in results]
+    
+    def _allowed_domains(self, domain):
+        """
+        Retorna os domínios aceitos por um filtro de domínio.
+        
+        Args:
+            domain: Domínio do filtro (ou None para não filtrar)
+            
+        Returns:
+            Conjunto de domínios aceitos ou None se não houver filtro
+        """
+        if domain is None or domain == ALL_DOMAINS:
+            return None
+        return {domain, SHARED_DOMAIN}
+    
+    def _lexical_search(self, query_text, top_k, domain=None):
+        """
+        Busca os trechos com maior pontuação BM25, opcionalmente filtrando por domínio.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de trechos
+            domain: Domínio a manter, além dos documentos gerais (opcional)
+            
+        Returns:
+            Lista de tuplas (id inteiro do trecho, pontuação BM25)
+        """
+        allowed = self._allowed_domains(domain)
+        doc_filter = None
+        if allowed is not None:
+            doc_filter = lambda chunk_id: self.chunks[self._chunk_positions[chunk_id]].get("domain", self.domain) in allowed
+        
+        return self.bm25.search(query_text, top_k, doc_filter)
+    
+    def _hybrid_search(self, query_texts, top_k, domain=None, batch_size=32):
         """
-        Cria um índice de embeddings para a base de conhecimento.
+        Combina as buscas densa e lexical por fusão de posição recíproca (RRF).
         
+        Cada lista contribui com 1 / (rrf_k + posição) para a pontuação do trecho.
+        
+        Args:
+            query_texts: Lista de textos de consulta
+            top_k: Número de trechos por consulta
+            domain: Domínio a manter, além dos documentos gerais (opcional)
+            batch_size: Tamanho do lote usado pelo modelo
+            
         Returns:
-            Índice FAISS
+            Lista (uma por consulta) de listas de tuplas (id do trecho, distância ou None, pontuação RRF)
         """
-        # Verificar se há documentos
-        if not self.documents:
-            return None
+        # Aprofundar as duas listas para que a fusão tenha candidatos suficientes
+        depth = min(max(top_k * 4, 20), len(self.chunks))
+        query_embeddings = self._encode_queries(query_texts, batch_size=batch_size)
+        dense_results = self._search(query_embeddings, depth, domain)
         
-        # Extrair conteúdo dos documentos
-        texts = [doc["content"] for doc in self.documents]
+        results = []
+        for query_text, dense_hit in zip(query_texts, dense_results):
+            scores = defaultdict(float)
+            distances = {}
+            for rank, (chunk_id, distance) in enumerate(dense_hit, 1):
+                scores[chunk_id] += 1 / (self.rrf_k + rank)
+                distances[chunk_id] = distance
+            for rank, (chunk_id, _) in enumerate(self._lexical_search(query_text, depth, domain), 1):
+                scores[chunk_id] += 1 / (self.rrf_k + rank)
+            
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            results.append([(chunk_id, distances.get(chunk_id), score) for chunk_id, score in ranked])
         
-        # Criar embeddings
-        if self.model:
-            embeddings = self.model.encode(texts)
-        else:
-            # Fallback para quando o modelo não está disponível
-            embeddings = np.random.rand(len(texts), self.embedding_size).astype('float32')
+        return results
+    
+    def _search(self, query_embeddings, top_k, domain=None):
+        """
+        Busca os trechos mais próximos, opcionalmente filtrando por domínio.
         
-        # Criar índice
-        index = faiss.IndexFlatL2(self.embedding_size)
-        index.add(embeddings.astype('float32'))
+        Com filtro, a busca é feita com k ampliado e repetida com k maior para as
+        consultas que ainda não tiverem top_k trechos do domínio.
         
-        return index
+        Args:
+            query_embeddings: Matriz float32 com os embeddings das consultas
+            top_k: Número de trechos por consulta
+            domain: Domínio a manter, além dos documentos gerais (opcional)
+            
+        Returns:
+            Lista (uma por consulta) de listas de tuplas (id inteiro do trecho, distância)
+        """
+        allowed = self._allowed_domains(domain)
+        
+        results = [None] * len(query_embeddings)
+        pending = list(range(len(query_embeddings)))
+        fetch_k = top_k if allowed is None else top_k * (len(KNOWLEDGE_DOMAINS) + 1)
+        
+        while pending:
+            fetch_k = min(fetch_k, len(self.chunks))
+            distances, indices = self.index.search(query_embeddings[pending], fetch_k)
+            
+            still_pending = []
+            for i, row_distances, row_ids in zip(pending, distances, indices):
+                hit = []
+                for distance, chunk_id in zip(row_distances, row_ids):
+                    if chunk_id < 0:
+                        continue
+                    chunk = self.chunks[self._chunk_positions[int(chunk_id)]]
+                    if allowed is None or chunk.get("domain", self.domain) in allowed:
+                        hit.append((int(chunk_id), float(distance)))
+                    if len(hit) == top_k:
+                        break
+                results[i] = hit
+                if len(hit) < top_k and fetch_k < len(self.chunks):
+                    still_pending.append(i)
+            
+            pending = still_pending
+            fetch_k *= 2
+        
+        return results
     
-    def query(self, query_text, top_k=3):
+    def add_documents(self, documents):
         """
-        Busca documentos relevantes para a consulta.
+        Adiciona documentos à base de conhecimento, codificando apenas os trechos novos.
         
         Args:
-            query_text: Texto da consulta
-            top_k: Número de documentos a retornar
+            documents: Lista de documentos com "id", "title" e "content"
             
         Returns:
-            Lista de documentos relevantes
+            Número de documentos adicionados
         """
-        # Verificar se há índice
-        if self.index is None or not self.documents:
-            return []
+        documents = list(documents)
+        if not documents:
+            return 0
         
-        # Criar embedding da consulta
-        if self.model:
-            query_embedding = self.model.encode([query_text])
-        else:
-            # Fallback para quando o modelo não está disponível
-            query_embedding = np.random.rand(1, self.embedding_size).astype('float32')
+        self._validate_documents(documents)
+        prepared = self._prepare_documents(documents)
         
-        # Buscar documentos similares
-        top_k = min(top_k, len(self.documents))
-        distances, indices = self.index.search(query_embedding.astype('float32'), top_k)
+        self._ensure_writable()
+        self._add_prepared(documents, *prepared)
         
-        # Retornar documentos relevantes
-        relevant_docs = [self.documents[idx] for idx in indices[0]]
+        self._commit_changes()
+        return len(documents)
+    
+    def remove_documents(self, doc_ids):
+        """
+        Remove documentos da base de conhecimento sem recodificar os demais.
         
-        return relevant_docs
+        Args:
+            doc_ids: Lista de ids textuais dos documentos
+            
+        Returns:
+            Número de documentos removidos
+        """
+        removed_ids = set(doc_ids)
+        if not any(doc["id"] in removed_ids for doc in self.documents):
+            return 0
+        
+        self._ensure_writable()
+        num_removed = self._remove_from_memory(removed_ids)
+        
+        self._commit_changes()
+        return num_removed
     
-    def augment_prompt(self, query, template=None):
+    def update_document(self, document):
         """
-        Aumenta o prompt com conhecimento relevante do PMBOK.
+        Substitui um documento existente (ou adiciona, se não existir), codificando apenas ele.
+        
+        O novo documento é validado e codificado antes de qualquer alteração: se falhar,
+        o documento anterior permanece em memória e em disco.
         
         Args:
-            query: Consulta para buscar conhecimento relevante
-            template: Template para o prompt aumentado (opcional)
+            document: Documento com "id", "title" e "content"
+        """
+        self._validate_documents([document], replaced_ids={document["id"]})
+        prepared = self._prepare_documents([document])
+        
+        self._ensure_writable()
+        self._remove_from_memory({document["id"]})
+        self._add_prepared([document], *prepared)
+        
+        self._commit_changes()
+    
+    def _validate_documents(self, documents, replaced_ids=()):
+        """
+        Verifica se os documentos podem ser adicionados à base de conhecimento.
+        
+        Args:
+            documents: Lista de documentos
+            replaced_ids: Ids de documentos existentes que serão substituídos
+            
+        Raises:
+            ValueError: Se faltar o domínio no índice único, o domínio for desconhecido
+                ou um id já existir ou estiver duplicado
+        """
+        if self.domain == ALL_DOMAINS:
+            if any("domain" not in doc for doc in documents):
+                raise ValueError("Documentos do índice único precisam do campo 'domain'")
+            # Documentos de outros domínios seriam gravados em arquivos que _load_knowledge não lê
+            valid_domains = KNOWLEDGE_DOMAINS + (SHARED_DOMAIN,)
+            invalid = [doc["id"] for doc in documents if doc["domain"] not in valid_domains]
+            if invalid:
+                raise ValueError(f"Documentos com domínio inválido: {invalid}. Use um de {valid_domains}")
+        
+        new_ids = [doc["id"] for doc in documents]
+        current_ids = {doc["id"] for doc in self.documents} - set(replaced_ids)
+        existing = [doc_id for doc_id in new_ids if doc_id in current_ids]
+        if existing or len(set(new_ids)) != len(new_ids):
+            raise ValueError(f"Documentos já existentes ou duplicados: {existing or new_ids}")
+    
+    def _prepare_documents(self, documents):
+        """
+        Divide e codifica documentos sem alterar o sistema.
+        
+        Args:
+            documents: Lista de documentos
             
         Returns:
-            Prompt aumentado
+            Tupla (trechos, embeddings, ids inteiros dos trechos)
+        """
+        new_chunks = self._chunk_documents(documents)
+        embeddings = self._encode([chunk["content"] for chunk in new_chunks])
+        return new_chunks, embeddings, self._chunk_int_ids(new_chunks)
+    
+    def _add_prepared(self, documents, new_chunks, embeddings, ids):
+        """
+        Adiciona ao sistema, em memória, documentos já codificados por _prepare_documents.
+        
+        Args:
+            documents: Lista de documentos
+            new_chunks: Trechos dos documentos
+            embeddings: Embeddings dos trechos
+            ids: Ids inteiros dos trechos
+        """
+        if self.index is None:
+            self.embeddings = self._stored_embeddings(embeddings)
+            self.index = self._build_faiss_index(embeddings, ids)
+        else:
+            self.index.add_with_ids(embeddings, ids)
+            self.embeddings = self._stored_embeddings(np.vstack([self.embeddings, embeddings]))
+        self.bm25.add(ids, self._lexical_texts(new_chunks))
+        
+        self.documents.extend(documents)
+        self.chunks.extend(new_chunks)
+    
+    def _remove_from_memory(self, removed_ids):
+        """
+        Remove do sistema, em memória, os documentos e todos os seus trechos.
+        
+        Args:
+            removed_ids: Conjunto de ids textuais dos documentos
+            
+        Returns:
+            Número de documentos removidos
+        """
+        num_documents = len(self.documents)
+        self.documents = [doc for doc in self.documents if doc["id"] not in removed_ids]
+        num_removed = num_documents - len(self.documents)
+        if not num_removed:
+            return 0
+        
+        keep = np.array([chunk["id"] not in removed_ids for chunk in self.chunks], dtype=bool)
+        removed_chunks = [chunk for chunk, kept in zip(self.chunks, keep) if not kept]
+        self.chunks = [chunk for chunk, kept in zip(self.chunks, keep) if kept]
+        self.embeddings = np.ascontiguousarray(self.embeddings[keep])
+        self.bm25.remove(self._chunk_int_ids(removed_chunks))
+        
+        if not self.chunks:
+            self.index = None
+        else:
+            try:
+                self.index.remove_ids(self._chunk_int_ids(removed_chunks))
+            except RuntimeError:
+                # Índices HNSW não suportam remoção: reconstruir com os embeddings já calculados
+                self.index = self._build_faiss_index(self.embeddings, self._chunk_int_ids())
+        
+        return num_removed
+    
+    def _commit_changes(self):
+        """
+        Atualiza o estado derivado após uma mudança nos documentos e persiste a base
+        de conhecimento e o índice, mantendo ambos consistentes em disco.
+        """
+        self._rebuild_positions()
+        self._invalidate_results()
+        self._save_knowledge(self.documents)
+        self._save_index()
+    
+    def _format_knowledge(self, entries):
         """
-        # Buscar documentos relevantes
-        relevant_docs = self.query(query)
+        Formata os trechos selecionados como texto para o prompt.
         
-        # Extrair conhecimento relevante
+        Args:
+            entries: Lista de tuplas (título, lista de frases)
+            
+        Returns:
+            Texto com o conhecimento relevante
+        """
         knowledge = ""
-        for doc in relevant_docs:
-            knowledge += f"- {doc['title']}: {doc['content']}\n\n"
+        for title, sentences in entries:
+            knowledge += f"- {title}: {' '.join(sentences)}\n\n"
         
+        return knowledge
+    
+    def _fill_template(self, query, knowledge, template=None, domain=None, template_vars=None):
+        """
+        Preenche o template do prompt aumentado.
+        
+        Args:
+            query: Consulta original
+            knowledge: Conhecimento relevante formatado
+            template: Template para o prompt aumentado (opcional)
+            domain: Domínio usado no template (opcional; por padrão o do sistema)
+            template_vars: Variáveis adicionais do template, como {"spi": 0.85} (opcional).
+                As chaves domain, query e knowledge são ignoradas: esses campos vêm
+                sempre dos argumentos correspondentes
+            
+        Returns:
+            Prompt aumentado
+        """
         # Usar template padrão se não for fornecido
         if template is None:
             template = """
@@ -403,14 +2312,372 @@ class PMBOKRAGSystem:
             Considerando as melhores práticas acima, forneça uma análise detalhada e recomendações:
             """
         
-        # Substituir placeholders no template
-        augmented_prompt = template.format(
-            domain=self.domain,
-            query=query,
-            knowledge=knowledge
+        # Substituir placeholders no template; domain, query e knowledge têm precedência
+        # sobre template_vars (o orçamento de tokens depende do conhecimento inserido)
+        fields = dict(template_vars or {})
+        fields.update(domain=domain or self.domain, query=query, knowledge=knowledge)
+        return template.format(**fields)
+    
+    def _assemble_prompt(self, query, documents, template=None, domain=None, max_tokens=None,
+                         template_vars=None):
+        """
+        Monta o prompt aumentado respeitando o orçamento de tokens.
+        
+        Os trechos entram em ordem de relevância, divididos em frases. Frases
+        repetidas (como a sobreposição entre trechos consecutivos) entram uma única
+        vez, e trechos do mesmo documento são agrupados. Quando uma frase não cabe
+        no orçamento, o trecho é cortado nela e o próximo trecho é tentado.
+        
+        Args:
+            query: Consulta original
+            documents: Trechos recuperados, em ordem de relevância
+            template: Template para o prompt aumentado (opcional)
+            domain: Domínio usado no template (opcional)
+            max_tokens: Orçamento de tokens do prompt inteiro (opcional; por padrão
+                prompt_token_budget; None sem limite)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Dicionário com o prompt, os tokens usados e os documentos incluídos
+        """
+        budget = self.prompt_token_budget if max_tokens is None else max_tokens
+        
+        # Tokens disponíveis para o conhecimento, descontado o restante do prompt
+        available = None
+        if budget is not None:
+            available = budget - count_tokens(self._fill_template(query, "", template, domain, template_vars))
+        
+        entries = OrderedDict()
+        seen_sentences = set()
+        knowledge_tokens = 0
+        truncated = False
+        for doc in documents:
+            header_tokens = count_tokens(f"- {doc['title']}: ")
+            for sentence in _SENTENCE_SPLIT.split(doc["content"].strip()):
+                sentence_key = self._normalize_query(sentence)
+                if not sentence_key or sentence_key in seen_sentences:
+                    continue
+                
+                cost = count_tokens(sentence) + (0 if doc["id"] in entries else header_tokens)
+                if available is not None and knowledge_tokens + cost > available:
+                    truncated = True
+                    break
+                
+                seen_sentences.add(sentence_key)
+                entries.setdefault(doc["id"], (doc["title"], []))[1].append(sentence)
+                knowledge_tokens += cost
+        
+        prompt = self._fill_template(
+            query, self._format_knowledge(entries.values()), template, domain, template_vars
+        )
+        
+        return {
+            "prompt": prompt,
+            "tokens": count_tokens(prompt),
+            "knowledge_tokens": knowledge_tokens,
+            "budget": budget,
+            "documents": list(entries),
+            "truncated": truncated
+        }
+    
+    def build_prompt(self, query, template=None, domain=None, top_k=3, max_tokens=None,
+                     template_vars=None):
+        """
+        Monta o prompt aumentado e informa quantos tokens ele usa.
+        
+        Args:
+            query: Consulta para buscar conhecimento relevante
+            template: Template para o prompt aumentado (opcional)
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            top_k: Número de trechos recuperados
+            max_tokens: Orçamento de tokens do prompt (opcional; por padrão prompt_token_budget)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Dicionário com "prompt", "tokens" (total do prompt), "knowledge_tokens",
+            "budget", "documents" (ids incluídos, em ordem de relevância) e "truncated"
+        """
+        return self.build_prompt_batch([query], template, domain, top_k, max_tokens, template_vars)[0]
+    
+    def build_prompt_batch(self, queries, template=None, domain=None, top_k=3, max_tokens=None,
+                           template_vars=None):
+        """
+        Monta vários prompts aumentados usando uma única busca em lote.
+        
+        Args:
+            queries: Lista de consultas
+            template: Template para os prompts aumentados (opcional)
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            top_k: Número de trechos recuperados por consulta
+            max_tokens: Orçamento de tokens de cada prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Lista de dicionários como os de build_prompt, na mesma ordem das consultas
+        """
+        results = self.query_batch(queries, top_k=top_k, domain=domain)
+        
+        return [
+            self._assemble_prompt(
+                query,
+                [result["document"] for result in query_results],
+                template,
+                domain,
+                max_tokens,
+                template_vars
+            )
+            for query, query_results in zip(queries, results)
+        ]
+    
+    def augment_prompt(self, query, template=None, domain=None, max_tokens=None, template_vars=None):
+        """
+        Aumenta o prompt com conhecimento relevante do PMBOK.
+        
+        Args:
+            query: Consulta para buscar conhecimento relevante
+            template: Template para o prompt aumentado (opcional)
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            max_tokens: Orçamento de tokens do prompt (opcional; por padrão prompt_token_budget)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Prompt aumentado
+        """
+        return self.build_prompt(
+            query, template, domain, max_tokens=max_tokens, template_vars=template_vars
+        )["prompt"]
+    
+    async def abuild_prompt(self, query, template=None, domain=None, top_k=3, max_tokens=None,
+                            template_vars=None):
+        """
+        Versão assíncrona de build_prompt.
+        
+        Args:
+            query: Consulta para buscar conhecimento relevante
+            template: Template para o prompt aumentado (opcional)
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            top_k: Número de trechos recuperados
+            max_tokens: Orçamento de tokens do prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Dicionário com o prompt e os tokens usados, como em build_prompt
+        """
+        documents = await self.aquery(query, top_k, domain)
+        return self._assemble_prompt(query, documents, template, domain, max_tokens, template_vars)
+    
+    async def aaugment_prompt(self, query, template=None, domain=None, max_tokens=None, template_vars=None):
+        """
+        Versão assíncrona de augment_prompt.
+        
+        Args:
+            query: Consulta para buscar conhecimento relevante
+            template: Template para o prompt aumentado (opcional)
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            max_tokens: Orçamento de tokens do prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Prompt aumentado
+        """
+        result = await self.abuild_prompt(
+            query, template, domain, max_tokens=max_tokens, template_vars=template_vars
+        )
+        return result["prompt"]
+    
+    def augment_prompt_batch(self, queries, template=None, top_k=3, domain=None, max_tokens=None,
+                             template_vars=None):
+        """
+        Aumenta vários prompts com conhecimento do PMBOK usando uma única busca em lote.
+        
+        Args:
+            queries: Lista de consultas
+            template: Template para os prompts aumentados (opcional)
+            top_k: Número de documentos por consulta
+            domain: Restringe a busca a um domínio e aos documentos gerais (opcional)
+            max_tokens: Orçamento de tokens de cada prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Lista de prompts aumentados, na mesma ordem das consultas
+        """
+        return [
+            result["prompt"]
+            for result in self.build_prompt_batch(queries, template, domain, top_k, max_tokens, template_vars)
+        ]
+
+# Nome do manifesto e do ponteiro para a versão mais recente dos artefatos de índice
+ARTIFACT_MANIFEST = "manifest.json"
+ARTIFACT_LATEST = "LATEST"
+
+def load_index_artifact(artifact_dir, **kwargs):
+    """
+    Carrega um artefato de índice gerado por build_rag_index.py, sem recodificar a base.
+    
+    O artefato é aberto somente para leitura: uma versão publicada nunca é alterada,
+    mesmo que o índice não corresponda ao modelo ou aos parâmetros atuais (nesse caso
+    o índice é recriado apenas em memória).
+    
+    Args:
+        artifact_dir: Diretório de uma versão do artefato ou diretório raiz com o
+            arquivo LATEST (usa a versão mais recente)
+        **kwargs: Parâmetros adicionais de PMBOKRAGSystem que não alteram o índice
+            (por exemplo mmap=True ou cache_size)
+            
+    Returns:
+        Instância de PMBOKRAGSystem com todos os domínios
+    """
+    latest_file = os.path.join(artifact_dir, ARTIFACT_LATEST)
+    if not os.path.exists(os.path.join(artifact_dir, ARTIFACT_MANIFEST)) and os.path.exists(latest_file):
+        with open(latest_file, 'r', encoding='utf-8') as f:
+            artifact_dir = os.path.join(artifact_dir, f.read().strip())
+    
+    with open(os.path.join(artifact_dir, ARTIFACT_MANIFEST), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    
+    params = dict(manifest["params"])
+    params.update(kwargs)
+    params["read_only"] = True
+    rag_system = PMBOKRAGSystem(domain=ALL_DOMAINS, knowledge_dir=artifact_dir, **params)
+    
+    if not rag_system.index_loaded:
+        print(f"Aviso: o índice do artefato {manifest['version']} não corresponde ao modelo ou "
+              f"aos parâmetros atuais e foi recriado em memória (o artefato não foi alterado).")
+    
+    return rag_system
+
+class DomainRAGView:
+    """
+    Visão de um domínio sobre um PMBOKRAGSystem com todos os domínios.
+    
+    Permite que os agentes de cada domínio usem o mesmo índice (e a mesma memória)
+    com a mesma interface de um sistema RAG dedicado ao domínio.
+    """
+    
+    def __init__(self, rag_system, domain):
+        """
+        Inicializa a visão do domínio.
+        
+        Args:
+            rag_system: Instância de PMBOKRAGSystem com domain="todos"
+            domain: Domínio do conhecimento (cronograma, custos, escopo, riscos)
+        """
+        self.rag_system = rag_system
+        self.domain = domain
+    
+    def query(self, query_text, top_k=3):
+        """
+        Busca trechos relevantes do domínio para a consulta.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de trechos a retornar
+            
+        Returns:
+            Lista de trechos relevantes
+        """
+        return self.rag_system.query(query_text, top_k=top_k, domain=self.domain)
+    
+    def query_batch(self, query_texts, top_k=3, batch_size=32):
+        """
+        Busca trechos relevantes do domínio para várias consultas de uma só vez.
+        
+        Args:
+            query_texts: Lista de textos de consulta
+            top_k: Número de trechos por consulta
+            batch_size: Tamanho do lote usado pelo modelo
+            
+        Returns:
+            Lista (uma por consulta) de listas de dicionários com "document" e "distance"
+        """
+        return self.rag_system.query_batch(query_texts, top_k=top_k, batch_size=batch_size, domain=self.domain)
+    
+    def build_prompt(self, query, template=None, top_k=3, max_tokens=None, template_vars=None):
+        """
+        Monta o prompt aumentado do domínio e informa quantos tokens ele usa.
+        
+        Args:
+            query: Consulta para buscar conhecimento relevante
+            template: Template para o prompt aumentado (opcional)
+            top_k: Número de trechos recuperados
+            max_tokens: Orçamento de tokens do prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Dicionário com o prompt e os tokens usados
+        """
+        return self.rag_system.build_prompt(
+            query, template=template, domain=self.domain, top_k=top_k,
+            max_tokens=max_tokens, template_vars=template_vars
+        )
+    
+    def augment_prompt(self, query, template=None, max_tokens=None, template_vars=None):
+        """
+        Aumenta o prompt com conhecimento do domínio.
+        
+        Args:
+            query: Consulta para buscar conhecimento relevante
+            template: Template para o prompt aumentado (opcional)
+            max_tokens: Orçamento de tokens do prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Prompt aumentado
+        """
+        return self.rag_system.augment_prompt(
+            query, template=template, domain=self.domain, max_tokens=max_tokens,
+            template_vars=template_vars
+        )
+    
+    async def aquery(self, query_text, top_k=3):
+        """
+        Versão assíncrona de query.
+        
+        Args:
+            query_text: Texto da consulta
+            top_k: Número de trechos a retornar
+            
+        Returns:
+            Lista de trechos relevantes
+        """
+        return await self.rag_system.aquery(query_text, top_k=top_k, domain=self.domain)
+    
+    async def aaugment_prompt(self, query, template=None, max_tokens=None, template_vars=None):
+        """
+        Versão assíncrona de augment_prompt.
+        
+        Args:
+            query: Consulta para buscar conhecimento relevante
+            template: Template para o prompt aumentado (opcional)
+            max_tokens: Orçamento de tokens do prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Prompt aumentado
+        """
+        return await self.rag_system.aaugment_prompt(
+            query, template=template, domain=self.domain, max_tokens=max_tokens,
+            template_vars=template_vars
         )
+    
+    def augment_prompt_batch(self, queries, template=None, top_k=3, max_tokens=None, template_vars=None):
+        """
+        Aumenta vários prompts com conhecimento do domínio usando uma única busca em lote.
         
-        return augmented_prompt
+        Args:
+            queries: Lista de consultas
+            template: Template para os prompts aumentados (opcional)
+            top_k: Número de trechos por consulta
+            max_tokens: Orçamento de tokens de cada prompt (opcional)
+            template_vars: Variáveis adicionais do template (opcional)
+            
+        Returns:
+            Lista de prompts aumentados
+        """
+        return self.rag_system.augment_prompt_batch(
+            queries, template=template, top_k=top_k, domain=self.domain,
+            max_tokens=max_tokens, template_vars=template_vars
+        )
 
 # Exemplo de uso
 if __name__ == "__main__":
@@ -427,8 +2694,27 @@ if __name__ == "__main__":
     for doc in relevant_docs:
         print(f"- {doc['title']}")
     
-    # Gerar prompt aumentado
-    augmented_prompt = rag_system.augment_prompt(query)
+    # Gerar prompt aumentado dentro do orçamento de tokens
+    prompt_result = rag_system.build_prompt(query)
+    
+    print(f"\nPrompt aumentado ({prompt_result['tokens']} de {prompt_result['budget']} tokens):")
+    print(prompt_result["prompt"])
+    
+    # Comparar os tipos de índice disponíveis
+    print("\nComparação dos tipos de índice:")
+    for index_type in INDEX_TYPES:
+        backend = PMBOKRAGSystem(domain="cronograma", index_type=index_type, persist_index=False)
+        report = backend.evaluate_recall([query])
+        print(f"- {index_type}: formato={report['file_format']}, recall@{report['top_k']}={report['recall']:.2f}, "
+              f"latência={report['latency_ms']:.3f} ms")
     
-    print("\nPrompt aumentado:")
-    print(augmented_prompt)
+    # Comparar a quantização e o mapeamento em memória com o índice plano float32
+    print("\nQuantização e mapeamento em memória (referência: flat float32):")
+    for quantization in (None,) + tuple(QUANTIZATION_TYPES):
+        for mmap in (False, True):
+            backend = PMBOKRAGSystem(domain="cronograma", quantization=quantization, mmap=mmap)
+            report = backend.evaluate_recall([query])
+            description = backend.describe_index()
+            print(f"- {quantization or 'float32'} (mmap={description['mmap']}): "
+                  f"recall@{report['top_k']}={report['recall']:.2f}, latência={report['latency_ms']:.3f} ms "
+                  f"(exata {report['exact_latency_ms']:.3f} ms), arquivo={description.get('index_file_bytes', 0)} bytes")
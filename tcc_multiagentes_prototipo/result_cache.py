@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Local padrão do cache persistente de resultados de análise
+DEFAULT_RESULT_CACHE_PATH = os.path.join("cache", "status_results.sqlite3")
+
+class ResultCache:
+    """
+    Cache persistente (SQLite) de resultados de processamento de arquivos de status.
+    
+    As chaves são hashes do conteúdo do arquivo e da versão do processamento, de modo
+    que arquivos inalterados são recuperados sem nova análise em execuções seguintes e
+    qualquer mudança no conteúdo ou no processamento gera uma chave nova.
+    Os valores são armazenados como JSON.
+    """
+    
+    def __init__(self, path=DEFAULT_RESULT_CACHE_PATH):
+        """
+        Inicializa o cache, criando o banco de dados se necessário.
+        
+        Args:
+            path: Caminho do arquivo SQLite (":memory:" mantém o cache apenas em memória)
+        """
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(*parts):
+        """
+        Gera a chave do cache a partir do conteúdo e dos identificadores do processamento.
+        
+        Args:
+            parts: Partes da chave (ex.: nome do processamento, versão e conteúdo do arquivo)
+            
+        Returns:
+            Hash SHA-256 em hexadecimal
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode('utf-8')
+            # Prefixar o tamanho evita colisões entre divisões diferentes das partes
+            digest.update(len(data).to_bytes(8, 'little'))
+            digest.update(data)
+        return digest.hexdigest()
+    
+    def get(self, key):
+        """
+        Busca um resultado no cache.
+        
+        Args:
+            key: Chave gerada por make_key
+            
+        Returns:
+            Resultado armazenado ou None se ausente
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+    
+    def put(self, key, value):
+        """
+        Armazena um resultado no cache.
+        
+        Args:
+            key: Chave gerada por make_key
+            value: Resultado serializável em JSON
+        """
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+                (key, data, time.time())
+            )
+            self._conn.commit()
+    
+    def clear(self):
+        """
+        Remove todos os resultados do cache (os contadores são mantidos).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+    
+    def stats(self):
+        """
+        Retorna as estatísticas de uso do cache.
+        
+        Returns:
+            Dicionário com entradas, acertos, falhas e taxa de acerto
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+    
+    def close(self):
+        """
+        Fecha a conexão com o banco de dados.
+        """
+        with self._lock:
+            self._conn.close()
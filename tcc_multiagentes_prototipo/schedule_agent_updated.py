@@ -1,9 +1,17 @@
 import json
 import os
+import time
 from datetime import datetime
-from .rag_system_pmbok import PMBOKRAGSystem
+from .rag_system_pmbok import get_domain_rag_system
+from .status_parser import parse_status_report, STATUS_PARSER_VERSION
+from .portfolio import analyze_status_directory
+from .analysis_policy import TieredAnalysisMixin
 
-class ScheduleAgent:
+# Versão da análise, incluída na chave do cache de resultados; incrementar quando a
+# extração ou a análise mudarem para invalidar os resultados armazenados
+ANALYSIS_VERSION = "2"
+
+class ScheduleAgent(TieredAnalysisMixin):
     """
     Agente especializado em monitorar e controlar o cronograma do projeto.
     
@@ -11,15 +19,26 @@ class ScheduleAgent:
     e recomenda ações corretivas em caso de desvios.
     """
     
-    def __init__(self, llm_interface=None):
+    # Configuração do nível de análise (TieredAnalysisMixin)
+    analysis_domain = "cronograma"
+    metric_name = "SPI"
+    rag_query_template = "{metric_name} {metric:.2f} {status} {motivo_atraso}"
+    
+    def __init__(self, llm_interface=None, result_cache=None, analysis_policy=None):
         """
         Inicializa o agente de cronograma.
         
         Args:
             llm_interface: Interface para comunicação com o LLM
+            result_cache: Cache persistente de resultados por conteúdo do arquivo (opcional,
+                ex.: ResultCache); arquivos inalterados não são analisados novamente
+            analysis_policy: Política de níveis de análise (opcional, ex.: AnalysisPolicy);
+                sem política, o LLM é usado sempre que houver interface LLM
         """
         self.llm_interface = llm_interface
-        self.rag_system = PMBOKRAGSystem(domain="cronograma")
+        self.result_cache = result_cache
+        self.analysis_policy = analysis_policy
+        self.rag_system = get_domain_rag_system("cronograma")
         
     def analyze_schedule_file(self, file_path):
         """
@@ -42,9 +61,21 @@ class ScheduleAgent:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # Extrair informações relevantes
-        project_info = self._extract_project_info(content)
-        schedule_status = self._extract_schedule_status(content)
+        # Reaproveitar a análise de um arquivo com o mesmo conteúdo
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.make_key(
+                "schedule_agent", ANALYSIS_VERSION, STATUS_PARSER_VERSION, type(self.llm_interface).__name__,
+                self.analysis_policy.signature() if self.analysis_policy is not None else None, content
+            )
+            cached_results = self.result_cache.get(cache_key)
+            if cached_results is not None:
+                return cached_results
+        
+        # Extrair informações relevantes (parser único de relatórios de status)
+        report = parse_status_report(content, "cronograma")
+        project_info = report["project_info"]
+        schedule_status = report["status"]
         
         # Calcular ou extrair SPI
         spi = schedule_status.get('spi', None)
@@ -58,8 +89,13 @@ class ScheduleAgent:
         # Determinar status do cronograma com base no SPI
         schedule_health = self._evaluate_schedule_health(spi)
         
+        # Escolher o nível de análise (regras fixas, RAG ou LLM)
+        analysis_tier = self._choose_analysis_tier(spi, schedule_health, project_info, file_path)
+        
         # Gerar recomendações
-        recommendations = self._generate_recommendations(schedule_status, project_info)
+        start = time.perf_counter()
+        recommendations = self._generate_recommendations(schedule_status, project_info, tier=analysis_tier["tier"])
+        analysis_tier["seconds"] = time.perf_counter() - start
         
         # Compilar resultados
         results = {
@@ -67,127 +103,35 @@ class ScheduleAgent:
             "schedule_status": schedule_status,
             "schedule_health": schedule_health,
             "recommendations": recommendations,
+            "analysis_tier": analysis_tier,
             "analysis_date": datetime.now().isoformat(),
             "status": "success"
         }
         
+        # Resultados limitados pelo orçamento de LLM não são reaproveitados em outras execuções
+        if cache_key is not None and not analysis_tier.get("budget_limited"):
+            self.result_cache.put(cache_key, results)
+        
         return results
     
-    def _extract_project_info(self, content):
+    def analyze_directory(self, status_dir, workers=None, output_file=None, pool="process"):
         """
-        Extrai informações gerais do projeto do conteúdo do arquivo.
+        Analisa todos os arquivos de status de cronograma (<projeto>_cronograma.txt) de um diretório.
         
-        Args:
-            content: Conteúdo do arquivo de status
-            
-        Returns:
-            Dicionário com informações do projeto
-        """
-        lines = content.split('\n')
-        project_info = {}
-        
-        # Extrair informações básicas
-        for line in lines[:10]:  # Verificar apenas as primeiras linhas
-            if "Projeto:" in line:
-                parts = line.split("Projeto:")[1].strip().split("(")
-                if len(parts) > 1:
-                    project_info["nome"] = parts[0].strip()
-                    project_info["id"] = parts[1].replace(")", "").strip()
-                else:
-                    project_info["nome"] = parts[0].strip()
-            elif "Data:" in line:
-                project_info["data_relatorio"] = line.split("Data:")[1].strip()
-            elif "Gerente:" in line:
-                project_info["gerente"] = line.split("Gerente:")[1].strip()
-        
-        return project_info
-    
-    def _extract_schedule_status(self, content):
-        """
-        Extrai informações de status do cronograma do conteúdo do arquivo.
+        Os arquivos são distribuídos entre vários processos, cada um com o seu agente,
+        e os resultados são gerados na ordem dos arquivos. A análise só é
+        executada durante a iteração sobre os resultados.
         
         Args:
-            content: Conteúdo do arquivo de status
+            status_dir: Diretório com os arquivos de status
+            workers: Número de processos (padrão: número de CPUs; 1 analisa no próprio processo)
+            output_file: Caminho do arquivo JSONL consolidado com todos os resultados (opcional)
+            pool: "process" (padrão) ou "thread" (threads compartilham a interface LLM do agente)
             
         Returns:
-            Dicionário com status do cronograma
+            Gerador de resultados de analyze_schedule_file, cada um com o campo file_path
         """
-        lines = content.split('\n')
-        schedule_status = {}
-        
-        # Extrair informações de status
-        for i, line in enumerate(lines):
-            if "Status atual:" in line:
-                schedule_status["status"] = line.split("Status atual:")[1].strip()
-            elif "Percentual de conclusão:" in line:
-                try:
-                    percentual = line.split("Percentual de conclusão:")[1].strip()
-                    schedule_status["percentual_conclusao"] = float(percentual.replace("%", ""))
-                except:
-                    pass
-            elif "Data de início:" in line:
-                schedule_status["data_inicio"] = line.split("Data de início:")[1].strip()
-            elif "Data de término planejada:" in line:
-                schedule_status["data_termino_planejada"] = line.split("Data de término planejada:")[1].strip()
-            elif "Data de término real/prevista:" in line:
-                schedule_status["data_termino_real"] = line.split("Data de término real/prevista:")[1].strip()
-            elif "Atraso atual:" in line:
-                try:
-                    atraso = line.split("Atraso atual:")[1].strip()
-                    schedule_status["atraso_dias"] = int(atraso.split(" dias")[0])
-                except:
-                    pass
-            elif "Motivo do atraso:" in line:
-                schedule_status["motivo_atraso"] = line.split("Motivo do atraso:")[1].strip()
-            elif "Índice de Desempenho de Cronograma (SPI):" in line:
-                try:
-                    spi = line.split("Índice de Desempenho de Cronograma (SPI):")[1].strip()
-                    schedule_status["spi"] = float(spi)
-                except:
-                    pass
-            elif "Valor Planejado (PV):" in line:
-                try:
-                    pv = line.split("Valor Planejado (PV):")[1].strip()
-                    schedule_status["valor_planejado"] = float(pv.replace("R$", "").strip())
-                except:
-                    pass
-            elif "Valor Agregado (EV):" in line:
-                try:
-                    ev = line.split("Valor Agregado (EV):")[1].strip()
-                    schedule_status["valor_agregado"] = float(ev.replace("R$", "").strip())
-                except:
-                    pass
-        
-        # Extrair tarefas críticas e atrasadas
-        tarefas_criticas = []
-        tarefas_atrasadas = []
-        
-        in_critical_section = False
-        in_delayed_section = False
-        
-        for line in lines:
-            if "Tarefas críticas:" in line:
-                in_critical_section = True
-                in_delayed_section = False
-                continue
-            elif "Tarefas atrasadas:" in line:
-                in_critical_section = False
-                in_delayed_section = True
-                continue
-            elif line.strip() == "" or line.startswith("RELATÓRIO"):
-                in_critical_section = False
-                in_delayed_section = False
-                continue
-            
-            if in_critical_section and line.strip().startswith("-"):
-                tarefas_criticas.append(line.strip()[2:].strip())
-            elif in_delayed_section and line.strip().startswith("-"):
-                tarefas_atrasadas.append(line.strip()[2:].strip())
-        
-        schedule_status["tarefas_criticas"] = tarefas_criticas
-        schedule_status["tarefas_atrasadas"] = tarefas_atrasadas
-        
-        return schedule_status
+        return analyze_status_directory(self, "analyze_schedule_file", "cronograma", status_dir, workers, output_file, pool=pool)
     
     def _evaluate_schedule_health(self, spi):
         """
@@ -231,13 +175,15 @@ class ScheduleAgent:
                 "description": f"O projeto está severamente atrasado (SPI = {spi:.2f}). Ações corretivas urgentes são necessárias."
             }
     
-    def _generate_recommendations(self, schedule_status, project_info):
+    def _generate_recommendations(self, schedule_status, project_info, tier="llm"):
         """
         Gera recomendações com base no status do cronograma.
         
         Args:
             schedule_status: Status do cronograma
             project_info: Informações do projeto
+            tier: Nível de análise: static (apenas regras fixas), rag (orientações do PMBOK
+                recuperadas, sem LLM) ou llm (recomendações do LLM com prompt aumentado)
             
         Returns:
             Lista de recomendações
@@ -295,7 +241,7 @@ class ScheduleAgent:
             recommendations.append(f"Focar nas tarefas atrasadas: {', '.join(schedule_status['tarefas_atrasadas'])}")
         
         # Usar o RAG para enriquecer as recomendações com conhecimento do PMBOK
-        if self.llm_interface and spi is not None:
+        if tier == "llm" and self.llm_interface and spi is not None:
             # Criar contexto para consulta
             context = f"""
             Projeto: {project_info.get('nome', 'Não especificado')}
@@ -318,7 +264,8 @@ class ScheduleAgent:
                 {knowledge}
                 
                 Considerando as melhores práticas acima e o SPI de {spi:.2f}, forneça 3-5 recomendações específicas e acionáveis para melhorar o desempenho do cronograma:
-                """
+                """,
+                template_vars={"spi": spi}
             )
             
             # Obter recomendações do LLM
@@ -330,6 +277,9 @@ class ScheduleAgent:
             # Adicionar recomendações do LLM
             if llm_recommendations:
                 recommendations.extend(llm_recommendations)
+        elif tier == "rag" and spi is not None:
+            # Orientações do PMBOK recuperadas pelo RAG, sem chamada ao LLM
+            recommendations.extend(self._knowledge_recommendations(spi, self._evaluate_schedule_health(spi), schedule_status))
         
         return recommendations
     
@@ -374,6 +324,10 @@ class ScheduleAgent:
         schedule_health = analysis_results.get('schedule_health', {})
         recommendations = analysis_results.get('recommendations', [])
         
+        # Formatar o SPI antes de montar o relatório
+        spi = schedule_status.get('spi')
+        spi_text = f"{spi:.2f}" if spi is not None else 'Não calculado'
+        
         report = f"""
         RELATÓRIO DE ANÁLISE DE CRONOGRAMA
         
@@ -383,7 +337,7 @@ class ScheduleAgent:
         RESUMO DO STATUS:
         Status atual: {schedule_status.get('status', 'Não especificado')}
         Percentual de conclusão: {schedule_status.get('percentual_conclusao', 'Não especificado')}%
-        SPI (Índice de Desempenho de Cronograma): {schedule_status.get('spi', 'Não calculado'):.2f if schedule_status.get('spi') is not None else 'Não calculado'}
+        SPI (Índice de Desempenho de Cronograma): {spi_text}
         
         AVALIAÇÃO DA SAÚDE DO CRONOGRAMA:
         Status: {schedule_health.get('status', 'Não avaliado')}
@@ -0,0 +1,291 @@
+import re
+
+# Tipos de relatório de status, identificados pelo cabeçalho "RELATÓRIO DE STATUS DE <TIPO>"
+REPORT_TYPES = ("cronograma", "custos", "escopo", "riscos")
+REPORT_HEADER = "RELATÓRIO DE STATUS DE "
+
+# Versão do parser; incrementar quando a estrutura do registro mudar
+STATUS_PARSER_VERSION = "1"
+
+def _text(value):
+    """
+    Mantém o valor de um campo de texto.
+    
+    Args:
+        value: Valor do campo
+        
+    Returns:
+        O próprio valor
+    """
+    return value
+
+def _money(value):
+    """
+    Converte um valor monetário ("R$ 1500.00") em número.
+    
+    Args:
+        value: Valor do campo
+        
+    Returns:
+        Valor em reais
+    """
+    return float(value.replace("R$", "").strip())
+
+def _percent(value):
+    """
+    Converte um percentual ("12.5%") em número.
+    
+    Args:
+        value: Valor do campo
+        
+    Returns:
+        Percentual
+    """
+    return float(value.replace("%", "").strip())
+
+def _days(value):
+    """
+    Converte um número de dias ("15 dias") em inteiro.
+    
+    Args:
+        value: Valor do campo
+        
+    Returns:
+        Número de dias
+    """
+    return int(value.split(" dias")[0])
+
+# Campos do cabeçalho (informações do projeto): rótulo -> chave
+PROJECT_FIELDS = {
+    "Data": "data_relatorio",
+    "Gerente": "gerente"
+}
+
+# Campos de status de todos os tipos de relatório: rótulo -> (chave, conversão)
+STATUS_FIELDS = {
+    # Cronograma
+    "Status atual": ("status", _text),
+    "Percentual de conclusão": ("percentual_conclusao", _percent),
+    "Data de início": ("data_inicio", _text),
+    "Data de término planejada": ("data_termino_planejada", _text),
+    "Data de término real/prevista": ("data_termino_real", _text),
+    "Atraso atual": ("atraso_dias", _days),
+    "Motivo do atraso": ("motivo_atraso", _text),
+    "Índice de Desempenho de Cronograma (SPI)": ("spi", float),
+    "Valor Planejado (PV)": ("valor_planejado", _money),
+    "Valor Agregado (EV)": ("valor_agregado", _money),
+    # Custos
+    "Orçamento inicial": ("orcamento_inicial", _money),
+    "Custo real atual": ("custo_real", _money),
+    "Desvio orçamentário": ("desvio_orcamento", _percent),
+    "Índice de Desempenho de Custo (CPI)": ("cpi", float),
+    "Estimativa para conclusão": ("estimativa_conclusao", _money),
+    "Estimativa no término (EAC)": ("estimativa_termino", _money),
+    "Variação no término (VAC)": ("variacao_termino", _money),
+    # Escopo
+    "Escopo original": ("escopo_original", _text),
+    "Houve mudança de escopo": ("mudanca_escopo", _text),
+    "Descrição das mudanças": ("descricao_mudancas", _text),
+    "Impacto no cronograma": ("impacto_cronograma", _days),
+    "Impacto no custo": ("impacto_custo", _money)
+}
+
+_CATEGORY_VALUE = re.compile(r"R\$\s*(-?[\d.]+)\s*(?:\((-?[\d.]+)%\))?")
+_RISK_ITEM = re.compile(r"(\w+)(?::\s*(.*)|\s*\(ocorrido em ([^)]*)\))")
+_RISK_RATING = re.compile(r"Probabilidade:\s*(\d+)/\d+,\s*Impacto:\s*(\d+)/\d+,\s*Nível:\s*(.+)")
+
+# Detalhes dos itens de risco (linhas recuadas): rótulo -> chave
+RISK_DETAIL_FIELDS = {
+    "Mitigação": "mitigacao",
+    "Contingência": "contingencia",
+    "Impacto real": "impacto_real",
+    "Ações tomadas": "acoes_tomadas"
+}
+
+def _add_list_item(container, item):
+    """
+    Adiciona um item de texto a uma seção em lista.
+    
+    Args:
+        container: Lista da seção
+        item: Texto do item, sem o marcador "- "
+    """
+    container.append(item)
+
+def _add_category(container, item):
+    """
+    Adiciona uma categoria de custo ("Categoria: R$ valor (percentual%)") à seção.
+    
+    Itens sem valor monetário são ignorados.
+    
+    Args:
+        container: Dicionário da seção (categoria -> valor e percentual)
+        item: Texto do item, sem o marcador "- "
+    """
+    categoria, _, valor = item.partition(":")
+    match = _CATEGORY_VALUE.search(valor)
+    if match:
+        container[categoria.strip()] = {"valor": float(match.group(1))}
+        if match.group(2) is not None:
+            container[categoria.strip()]["percentual"] = float(match.group(2))
+
+def _add_risk(container, item):
+    """
+    Adiciona um risco ("R1: descrição" ou "R1 (ocorrido em data)") à seção.
+    
+    Itens fora desse formato são ignorados.
+    
+    Args:
+        container: Lista de riscos da seção
+        item: Texto do item, sem o marcador "- "
+    """
+    match = _RISK_ITEM.match(item)
+    if match:
+        risk = {"id": match.group(1)}
+        if match.group(3) is not None:
+            risk["data"] = match.group(3).strip()
+        else:
+            risk["descricao"] = match.group(2).strip()
+        container.append(risk)
+
+def _add_risk_detail(container, line):
+    """
+    Adiciona um detalhe recuado (classificação, mitigação, contingência etc.) ao
+    último risco da seção.
+    
+    Args:
+        container: Lista de riscos da seção
+        line: Linha do detalhe, sem o recuo
+    """
+    # Detalhes recuados pertencem ao último risco da seção
+    if not container:
+        return
+    risk = container[-1]
+    rating = _RISK_RATING.match(line)
+    if rating:
+        risk["probabilidade"] = int(rating.group(1))
+        risk["impacto"] = int(rating.group(2))
+        risk["nivel"] = rating.group(3).strip()
+        return
+    label, _, value = line.partition(":")
+    key = RISK_DETAIL_FIELDS.get(label)
+    if key:
+        risk[key] = value.strip()
+
+# Seções com itens "- ...": rótulo do cabeçalho -> (chave, contêiner, adição de item,
+# adição de detalhe recuado, se a seção termina em linha em branco)
+SECTIONS = {
+    "Tarefas críticas": ("tarefas_criticas", list, _add_list_item, None, True),
+    "Tarefas atrasadas": ("tarefas_atrasadas", list, _add_list_item, None, True),
+    "Detalhamento por categoria": ("categorias_custos", dict, _add_category, None, True),
+    "Solicitações de mudança": ("solicitacoes_mudanca", list, _add_list_item, None, True),
+    "Requisitos atuais": ("requisitos", list, _add_list_item, None, True),
+    # Os riscos são separados por linhas em branco; a seção só termina na próxima seção
+    "Riscos identificados": ("riscos", list, _add_risk, _add_risk_detail, False),
+    "Riscos ocorridos": ("riscos_ocorridos", list, _add_risk, _add_risk_detail, False)
+}
+
+# Seções sempre presentes no registro de cada tipo de relatório, mesmo vazias
+REPORT_SECTIONS = {
+    "cronograma": ("Tarefas críticas", "Tarefas atrasadas"),
+    "custos": ("Detalhamento por categoria",),
+    "escopo": ("Solicitações de mudança", "Requisitos atuais"),
+    "riscos": ("Riscos identificados", "Riscos ocorridos")
+}
+
+def parse_status_report(content, report_type=None):
+    """
+    Converte um relatório de status (cronograma, custos, escopo ou riscos) em um registro.
+    
+    O texto é percorrido uma única vez, linha a linha; cada linha é classificada pelo
+    primeiro caractere (item, detalhe recuado ou rótulo) e por consulta às tabelas de
+    campos e seções (rótulo antes de ":"), e os valores são
+    convertidos para o tipo do campo (texto, número, dias, valor monetário ou lista).
+    Valores que não puderem ser convertidos são ignorados.
+    
+    Args:
+        content: Conteúdo do arquivo de status
+        report_type: Tipo esperado do relatório (opcional; por padrão, o tipo do cabeçalho)
+        
+    Returns:
+        Dicionário com report_type, project_info e status
+    """
+    project_info = {}
+    status = {}
+    
+    section = None
+    items = None
+    
+    for line in content.split('\n'):
+        first = line[:1]
+        
+        # Itens e detalhes recuados da seção atual
+        if first == "-":
+            if section is not None:
+                section[2](items, line[1:].strip())
+            continue
+        if not first or first.isspace():
+            stripped = line.strip()
+            if not stripped:
+                if section is not None and section[4]:
+                    section = None
+            elif section is not None:
+                if stripped.startswith("-"):
+                    section[2](items, stripped[1:].strip())
+                elif section[3] is not None:
+                    section[3](items, stripped)
+            continue
+        
+        # Linhas "Rótulo: valor", cabeçalhos de seção ("Rótulo:") e cabeçalho do relatório
+        label, separator, value = line.partition(":")
+        if not separator:
+            if line.startswith(REPORT_HEADER):
+                if report_type is None:
+                    report_type = line[len(REPORT_HEADER):].strip().lower()
+                section = None
+            continue
+        
+        field = STATUS_FIELDS.get(label)
+        if field is not None:
+            try:
+                status[field[0]] = field[1](value.strip())
+            except ValueError:
+                pass
+            continue
+        
+        value = value.strip()
+        if not value and label in SECTIONS:
+            section = SECTIONS[label]
+            items = status.setdefault(section[0], section[1]())
+        elif label == "Projeto":
+            parts = value.split("(")
+            project_info["nome"] = parts[0].strip()
+            if len(parts) > 1:
+                project_info["id"] = parts[1].replace(")", "").strip()
+        elif label in PROJECT_FIELDS:
+            project_info[PROJECT_FIELDS[label]] = value
+    
+    # Garantir as seções do tipo de relatório, mesmo sem itens no arquivo
+    for label in REPORT_SECTIONS.get(report_type, ()):
+        key, container = SECTIONS[label][:2]
+        status.setdefault(key, container())
+    
+    return {
+        "report_type": report_type,
+        "project_info": project_info,
+        "status": status
+    }
+
+def parse_status_file(file_path, report_type=None):
+    """
+    Lê e converte um arquivo de status em um registro.
+    
+    Args:
+        file_path: Caminho do arquivo de status
+        report_type: Tipo esperado do relatório (opcional)
+        
+    Returns:
+        Dicionário com report_type, project_info e status
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_status_report(f.read(), report_type)
@@ -1,18 +1,28 @@
 import os
 import sys
 import json
+import time
 import random
+import threading
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Adicionar diretório pai ao path para importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Importar módulos do sistema
 try:
-    from agentes.rag_system_pmbok import PMBOKRAGSystem
+    from agentes.rag_system_pmbok import PMBOKRAGSystem, load_index_artifact
     from agentes.schedule_agent_updated import ScheduleAgent
     from agentes.cost_agent_updated import CostAgent
     from agentes.pmbok_guard_rails import PMBOKGuardRails
+    from agentes.benchmark_rag import run_benchmark
+    from agentes.build_rag_index import build_index_artifact, file_sha256
+    from agentes.result_cache import ResultCache
+    from agentes.llm_cache import CachedLLMInterface, SQLiteResponseStore, FileResponseStore
+    from agentes.llm_dispatcher import LLMDispatcher, HTTPLLMInterface, parse_retry_after
+    from agentes.analysis_policy import AnalysisPolicy, summarize_tiers
+    from agentes.benchmark_status_parser import write_status_files
 except ImportError:
     print("Erro ao importar módulos. Verificando diretório atual...")
     print(f"Diretório atual: {os.getcwd()}")
@@ -21,10 +31,17 @@ except ImportError:
     
     # Tentar importar de forma alternativa
     sys.path.append(os.path.abspath('.'))
-    from rag_system_pmbok import PMBOKRAGSystem
+    from rag_system_pmbok import PMBOKRAGSystem, load_index_artifact
     from schedule_agent_updated import ScheduleAgent
     from cost_agent_updated import CostAgent
     from pmbok_guard_rails import PMBOKGuardRails
+    from benchmark_rag import run_benchmark
+    from build_rag_index import build_index_artifact, file_sha256
+    from result_cache import ResultCache
+    from llm_cache import CachedLLMInterface, SQLiteResponseStore, FileResponseStore
+    from llm_dispatcher import LLMDispatcher, HTTPLLMInterface, parse_retry_after
+    from analysis_policy import AnalysisPolicy, summarize_tiers
+    from benchmark_status_parser import write_status_files
 
 # Classe para simular interface LLM para testes
 class MockLLMInterface:
@@ -71,6 +88,77 @@ class MockLLMInterface:
         # Retornar uma resposta aleatória para o domínio
         return random.choice(self.responses[domain])
 
+# Servidor HTTP local que simula um provedor de LLM para testes
+class MockLLMServer:
+    """
+    Servidor LLM simulado: responde com a MockLLMInterface após uma latência fixa e
+    recusa uma a cada fail_every requisições com HTTP 429 (limite de requisições).
+    """
+    
+    def __init__(self, latency=0.05, fail_every=5, retry_after="0"):
+        """
+        Inicia o servidor em uma porta livre, em uma thread separada.
+        
+        Args:
+            latency: Latência simulada de cada resposta em segundos
+            fail_every: Recusar uma a cada fail_every requisições com HTTP 429 (0 desativa)
+            retry_after: Valor do cabeçalho Retry-After das recusas
+        """
+        self.latency = latency
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.llm = MockLLMInterface()
+        self.requests = 0
+        self.rejected = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])).decode('utf-8'))
+                with server._lock:
+                    server.requests += 1
+                    reject = server.fail_every and server.requests % server.fail_every == 0
+                    if reject:
+                        server.rejected += 1
+                    else:
+                        server.active += 1
+                        server.max_active = max(server.max_active, server.active)
+                
+                if reject:
+                    self.send_response(429)
+                    self.send_header("Retry-After", server.retry_after)
+                    self.end_headers()
+                    return
+                
+                time.sleep(server.latency)
+                body = json.dumps({"text": server.llm.generate_text(payload["prompt"])}).encode('utf-8')
+                with server._lock:
+                    server.active -= 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/generate"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """
+        Encerra o servidor.
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
 # Função para criar arquivos de status de teste
 def create_test_status_files(base_dir):
     """
@@ -268,6 +356,87 @@ def test_rag_system(base_dir):
         for doc in relevant_docs:
             print(f"- {doc['id']}: {doc['title']}")
     
+    # Medir recall@k, MRR e latência no conjunto rotulado com o índice padrão
+    benchmark = run_benchmark(index_types=("flat",), cache_sizes=(0,), retrieval_modes=("hybrid",),
+                              quantizations=(None, "int8"), mmap_modes=(False, True))
+    benchmark_file = os.path.join(results_dir, "rag_benchmark.json")
+    with open(benchmark_file, 'w', encoding='utf-8') as f:
+        json.dump(benchmark, f, ensure_ascii=False, indent=2)
+    
+    # Uma execução por combinação de quantização e mmap, com a memória do processo medida
+    assert len(benchmark["results"]) == 4, benchmark["results"]
+    assert [result["mmap"] for result in benchmark["results"]] == [False, True, False, True]
+    for result in benchmark["results"]:
+        assert result["memory"]["rss_delta_bytes"] is not None, result["memory"]
+        assert result["recall@3"] > 0, result
+    
+    summary = benchmark["results"][0]
+    results["benchmark"] = {
+        "recall@3": summary["recall@3"],
+        "mrr": summary["mrr"],
+        "latency_ms": summary["latency_ms"]
+    }
+    print(f"\nBenchmark: recall@3={summary['recall@3']:.2f}, MRR={summary['mrr']:.2f}, "
+          f"p95={summary['latency_ms']['p95']:.2f} ms (detalhes em {benchmark_file})")
+    
+    # Substituição de documento: uma substituição inválida não pode apagar o documento anterior
+    update_dir = os.path.join(base_dir, "rag_update_knowledge")
+    rag_system = PMBOKRAGSystem(domain="todos", knowledge_dir=update_dir, cache_size=0)
+    schedule_file = os.path.join(update_dir, "pmbok_cronograma.json")
+    num_documents = len(rag_system.documents)
+    try:
+        rag_system.update_document({"id": "cronograma_001", "title": "Sem domínio", "content": "Texto novo."})
+        raise AssertionError("Substituição sem domínio aceita no índice único")
+    except ValueError:
+        pass
+    with open(schedule_file, 'r', encoding='utf-8') as f:
+        stored = {doc["id"]: doc for doc in json.load(f)}
+    assert "cronograma_001" in stored, "Documento removido do disco após substituição inválida"
+    assert [doc["id"] for doc in rag_system.documents].count("cronograma_001") == 1
+    assert len(rag_system.documents) == num_documents
+    
+    rag_system.update_document({
+        "id": "cronograma_001", "title": "Cronograma revisado", "domain": "cronograma",
+        "content": "O cronograma revisado prioriza o caminho crítico e a compressão por paralelismo."
+    })
+    with open(schedule_file, 'r', encoding='utf-8') as f:
+        stored = {doc["id"]: doc for doc in json.load(f)}
+    assert stored["cronograma_001"]["title"] == "Cronograma revisado", stored["cronograma_001"]
+    assert len(rag_system.documents) == num_documents
+    assert any(doc["id"] == "cronograma_001" for doc in rag_system.query("compressão por paralelismo", top_k=3))
+    
+    # Domínios desconhecidos seriam gravados em arquivos que não são lidos de volta
+    try:
+        rag_system.add_documents([{"id": "qualidade_001", "title": "Qualidade", "domain": "qualidade",
+                                   "content": "Controle da qualidade das entregas."}])
+        raise AssertionError("Documento com domínio desconhecido aceito no índice único")
+    except ValueError:
+        pass
+    assert not os.path.exists(os.path.join(update_dir, "pmbok_qualidade.json"))
+    assert len(rag_system.documents) == num_documents
+    print("Substituição de documentos: documento anterior preservado após falha de validação")
+    
+    # Variáveis do template com os mesmos nomes dos campos do sistema não os substituem
+    prompt = rag_system.augment_prompt(
+        "Como recuperar o atraso?", template="{domain}|{query}|SPI {spi}|{knowledge}", domain="cronograma",
+        template_vars={"spi": 0.85, "query": "outra consulta", "domain": "custos", "knowledge": ""}
+    )
+    assert prompt.startswith("cronograma|Como recuperar o atraso?|SPI 0.85|"), prompt[:80]
+    assert len(prompt) > len("cronograma|Como recuperar o atraso?|SPI 0.85|"), "O conhecimento recuperado foi substituído"
+    
+    # Artefato publicado: abrir com parâmetros diferentes não pode alterar a versão
+    artifact_root = os.path.join(base_dir, "rag_artifacts")
+    manifest = build_index_artifact([], artifact_root, with_defaults=True)
+    version_dir = os.path.join(artifact_root, manifest["version"])
+    assert load_index_artifact(artifact_root).index_loaded, "O índice do artefato deveria ser reutilizado"
+    mismatched = load_index_artifact(artifact_root, chunk_size=manifest["params"]["chunk_size"] // 2)
+    assert not mismatched.index_loaded
+    mismatched.add_documents([{"id": "geral_teste", "title": "Teste", "domain": "geral", "content": "Nota."}])
+    assert sorted(os.listdir(version_dir)) == sorted(list(manifest["files"]) + ["manifest.json"]), os.listdir(version_dir)
+    for name, digest in manifest["files"].items():
+        assert file_sha256(os.path.join(version_dir, name)) == digest, f"Arquivo {name} do artefato alterado"
+    print(f"Artefato {manifest['version']}: arquivos inalterados após abertura com parâmetros diferentes")
+    
     # Salvar resultados em arquivo JSON
     results_file = os.path.join(results_dir, "rag_test_results.json")
     with open(results_file, 'w', encoding='utf-8') as f:
@@ -316,6 +485,118 @@ def test_agents(base_dir):
     cost_results = cost_agent.analyze_cost_file(cost_file)
     cost_report = cost_agent.generate_report(cost_results)
     
+    # Testar o cache de resultados: a segunda análise do mesmo arquivo vem do cache
+    print("\nTestando cache de resultados")
+    result_cache = ResultCache(os.path.join(results_dir, "result_cache.sqlite3"))
+    result_cache.clear()
+    cached_agent = ScheduleAgent(llm_interface=llm, result_cache=result_cache)
+    first_results = cached_agent.analyze_schedule_file(schedule_file)
+    second_results = cached_agent.analyze_schedule_file(schedule_file)
+    cache_stats = result_cache.stats()
+    result_cache.close()
+    print(f"Resultados iguais: {first_results == second_results}, acertos: {cache_stats['hits']}, "
+          f"falhas: {cache_stats['misses']}")
+    assert first_results == second_results, "A análise em cache difere da análise original"
+    assert cache_stats['misses'] == 1, f"Esperada 1 falha no cache, obtidas {cache_stats['misses']}"
+    assert cache_stats['hits'] == 1, f"Esperado 1 acerto no cache, obtidos {cache_stats['hits']}"
+    
+    # Testar o cache de respostas do LLM: o mesmo prompt não chama o LLM novamente
+    print("\nTestando cache de respostas do LLM")
+    llm_store = SQLiteResponseStore(os.path.join(results_dir, "llm_responses.sqlite3"))
+    llm_store.clear()
+    cached_llm = CachedLLMInterface(llm, llm_store)
+    llm_agent = ScheduleAgent(llm_interface=cached_llm)
+    llm_agent.analyze_schedule_file(schedule_file)
+    llm_agent.analyze_schedule_file(schedule_file)
+    llm_cache_stats = cached_llm.stats()
+    print(f"Acertos: {llm_cache_stats['hits']}, falhas: {llm_cache_stats['misses']}, "
+          f"taxa de acerto: {llm_cache_stats['hit_rate']:.2f}")
+    assert llm_cache_stats['misses'] >= 1, "O primeiro prompt deveria chamar o LLM"
+    assert llm_cache_stats['hits'] >= 1, "O prompt repetido deveria vir do cache de respostas"
+    
+    # Várias threads gravando a mesma chave no armazenamento em arquivos (como em pool="thread")
+    file_store = FileResponseStore(os.path.join(results_dir, "llm_responses_files"))
+    file_store.clear()
+    put_errors = []
+    def put_same_key(worker):
+        try:
+            for i in range(20):
+                file_store.put("mesma_chave", f"resposta {worker}-{i}")
+        except Exception as e:
+            put_errors.append(e)
+    threads = [threading.Thread(target=put_same_key, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not put_errors, f"Falhas ao gravar a mesma chave em paralelo: {put_errors[:3]}"
+    assert file_store.get("mesma_chave").startswith("resposta ")
+    assert not [name for name in os.listdir(file_store.directory) if name.endswith(".tmp")]
+    
+    # Testar a análise do diretório de status em vários processos
+    print("\nTestando análise de portfólio")
+    portfolio_dir = os.path.join(base_dir, "portfolio_status_files")
+    portfolio_paths = write_status_files(portfolio_dir, num_projects=40, seed=7)["cronograma"]
+    portfolio_file = os.path.join(results_dir, "portfolio_cronograma.jsonl")
+    portfolio_results = list(schedule_agent.analyze_directory(portfolio_dir, workers=2, output_file=portfolio_file))
+    print(f"Arquivos analisados: {len(portfolio_results)} (resultados em {portfolio_file})")
+    portfolio_order = [result["file_path"] for result in portfolio_results]
+    assert len(portfolio_results) == len(portfolio_paths), (
+        f"Esperado um resultado por arquivo ({len(portfolio_paths)}), obtidos {len(portfolio_results)}"
+    )
+    assert portfolio_order == sorted(portfolio_paths), "Os resultados do portfólio não estão na ordem dos arquivos"
+    with open(portfolio_file, 'r', encoding='utf-8') as f:
+        assert [json.loads(line)["file_path"] for line in f] == portfolio_order
+    try:
+        schedule_agent.analyze_directory(portfolio_dir, pool="fiber")
+        raise AssertionError("Tipo de pool inválido deveria ser rejeitado")
+    except ValueError:
+        pass
+    
+    # Testar a política de níveis de análise: o LLM só é chamado para projetos em risco
+    print("\nTestando política de níveis de análise")
+    # Estado em memória: sem execução anterior, o nível depende só da faixa de saúde e do orçamento
+    policy = AnalysisPolicy(llm_budget=5)
+    policy_agent = ScheduleAgent(llm_interface=llm, analysis_policy=policy)
+    policy_results = list(policy_agent.analyze_directory(portfolio_dir, workers=1))
+    policy_stats = policy.stats()
+    policy.close()
+    tier_summary = summarize_tiers(policy_results)
+    print(f"Projetos por nível: " + ", ".join(
+        f"{tier}={tier_summary[tier]['projects']}" for tier in ("static", "rag", "llm")
+    ) + f"; chamadas ao LLM evitadas: {tier_summary['llm_calls_avoided']}")
+    
+    healthy_results = [r for r in policy_results if r["schedule_health"]["status"] in ("excellent", "good")]
+    assert healthy_results, "O portfólio de teste deveria ter projetos saudáveis"
+    assert all(r["analysis_tier"]["tier"] == "static" for r in healthy_results), (
+        "Projetos saudáveis deveriam usar apenas regras fixas"
+    )
+    llm_band = [r for r in policy_results if r["analysis_tier"]["base_tier"] == "llm"]
+    assert len(llm_band) > 5, "O portfólio de teste deveria ter mais projetos em risco que o orçamento de LLM"
+    assert tier_summary["llm"]["projects"] == 5 and policy_stats["llm_calls_used"] == 5, (
+        f"Orçamento de 5 chamadas ao LLM não respeitado: {tier_summary['llm']['projects']} análises com LLM"
+    )
+    assert sum(1 for r in llm_band if r["analysis_tier"]["budget_limited"]) == len(llm_band) - 5
+    
+    # Pool de processos: as cópias da política compartilham o orçamento pelo banco de estado
+    policy_state = os.path.join(results_dir, "analysis_policy.sqlite3")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(policy_state + suffix):
+            os.remove(policy_state + suffix)
+    for state_path in (policy_state, ":memory:"):
+        budget_policy = AnalysisPolicy(llm_budget=5, state_path=state_path)
+        budget_agent = ScheduleAgent(llm_interface=llm, analysis_policy=budget_policy)
+        budget_results = list(budget_agent.analyze_directory(portfolio_dir, workers=2, pool="process"))
+        budget_calls = budget_policy.stats()["llm_calls_used"]
+        budget_policy.close()
+        llm_projects = sum(1 for r in budget_results if r["analysis_tier"]["tier"] == "llm")
+        print(f"Pool de processos (estado {state_path}): {llm_projects} análises com LLM, "
+              f"{budget_calls} chamadas registradas")
+        assert len(budget_results) == len(portfolio_paths)
+        assert llm_projects == 5 and budget_calls == 5, (
+            f"Orçamento de 5 chamadas ao LLM não respeitado no pool de processos: {llm_projects} análises com LLM"
+        )
+    
     # Salvar resultados
     results = {
         "schedule_agent": {
@@ -325,7 +606,14 @@ def test_agents(base_dir):
         "cost_agent": {
             "analysis_results": cost_results,
             "report": cost_report
-        }
+        },
+        "result_cache": cache_stats,
+        "llm_cache": llm_cache_stats,
+        "portfolio": {
+            "files": len(portfolio_results),
+            "errors": sum(1 for result in portfolio_results if result["status"] != "success")
+        },
+        "analysis_policy": tier_summary
     }
     
     # Salvar resultados em arquivo JSON
@@ -467,6 +755,185 @@ def test_guard_rails(base_dir):
     
     return results
 
+# Função para testar o despachante de requisições ao LLM
+def test_llm_dispatcher(base_dir):
+    """
+    Testa o despachante de requisições ao LLM contra um servidor LLM local simulado.
+    
+    Args:
+        base_dir: Diretório base para os testes
+        
+    Returns:
+        Resultados dos testes
+    """
+    print("\n=== Testando Despachante de Requisições ao LLM ===")
+    
+    # Criar diretório de resultados
+    results_dir = os.path.join(base_dir, "test_results")
+    os.makedirs(results_dir, exist_ok=True)
+    
+    # Prompts de teste, com repetições que devem ser agrupadas
+    prompts = [f"Recomendações para o cronograma do projeto P{i:03d} com SPI 0.8" for i in range(16)]
+    prompts += prompts[:4]
+    
+    server = MockLLMServer(latency=0.05, fail_every=5)
+    try:
+        # Chamadas sequenciais sem o despachante (sem novas tentativas: falhas são contadas)
+        llm_interface = HTTPLLMInterface(server.url, model="mock")
+        sequential_failures = 0
+        start = time.perf_counter()
+        for prompt in prompts:
+            try:
+                llm_interface.generate_text(prompt)
+            except Exception:
+                sequential_failures += 1
+        sequential_seconds = time.perf_counter() - start
+        
+        # Chamadas concorrentes pelo despachante
+        server.requests = server.rejected = server.max_active = 0
+        dispatcher = LLMDispatcher(llm_interface, max_concurrency=4, requests_per_second=100,
+                                   max_retries=5, backoff_base=0.01)
+        start = time.perf_counter()
+        responses = dispatcher.generate_batch(prompts)
+        dispatcher_seconds = time.perf_counter() - start
+        stats = dispatcher.stats()
+        dispatcher.shutdown()
+    finally:
+        server.stop()
+    
+    results = {
+        "prompts": len(prompts),
+        "responses": sum(1 for response in responses if response),
+        "sequential_seconds": sequential_seconds,
+        "sequential_failures": sequential_failures,
+        "dispatcher_seconds": dispatcher_seconds,
+        "server_requests": server.requests,
+        "server_rejected": server.rejected,
+        "max_concurrent_requests": server.max_active,
+        "dispatcher": stats
+    }
+    
+    print(f"Prompts: {results['prompts']}, respostas: {results['responses']}")
+    print(f"Sequencial: {sequential_seconds:.2f}s ({sequential_failures} falhas)")
+    print(f"Despachante: {dispatcher_seconds:.2f}s, {stats['llm_calls']} chamadas ao LLM, "
+          f"{stats['coalesced']} agrupadas, {stats['retries']} novas tentativas, {stats['failures']} falhas")
+    print(f"Máximo de requisições simultâneas no servidor: {server.max_active}")
+    
+    assert stats["failures"] == 0, f"Falhas no despachante: {stats['failures']}"
+    assert len(responses) == len(prompts) and all(responses), "Todos os prompts deveriam ter resposta"
+    assert server.max_active <= dispatcher.max_concurrency, (
+        f"{server.max_active} requisições simultâneas com limite de {dispatcher.max_concurrency}"
+    )
+    assert stats["coalesced"] == 4, f"Esperados 4 prompts agrupados, obtidos {stats['coalesced']}"
+    assert responses[-4:] == responses[:4], "Prompts repetidos deveriam receber a mesma resposta"
+    assert server.rejected >= 1 and stats["retries"] == server.rejected, (
+        f"Cada recusa 429 deveria gerar uma nova tentativa ({server.rejected} recusas, {stats['retries']} tentativas)"
+    )
+    
+    # Recusa 429 com Retry-After: a nova tentativa espera o tempo indicado pelo servidor
+    retry_server = MockLLMServer(latency=0.0, fail_every=2, retry_after="1")
+    try:
+        retry_dispatcher = LLMDispatcher(HTTPLLMInterface(retry_server.url, model="mock"), max_concurrency=1,
+                                         max_retries=2, backoff_base=0.001, backoff_max=5)
+        retry_dispatcher.generate_text("Primeiro prompt")
+        start = time.perf_counter()
+        retried_response = retry_dispatcher.generate_text("Segundo prompt, recusado uma vez")
+        retry_seconds = time.perf_counter() - start
+        retry_stats = retry_dispatcher.stats()
+        retry_dispatcher.shutdown()
+    finally:
+        retry_server.stop()
+    print(f"Retry-After: {retry_stats['retries']} nova tentativa após {retry_seconds:.2f}s")
+    assert retried_response, "O prompt recusado deveria ser respondido na nova tentativa"
+    assert retry_server.requests == 3 and retry_server.rejected == 1, (retry_server.requests, retry_server.rejected)
+    assert retry_stats["retries"] == 1 and retry_stats["failures"] == 0, retry_stats
+    assert retry_seconds >= 0.95, f"A nova tentativa não esperou o Retry-After de 1s ({retry_seconds:.2f}s)"
+    assert parse_retry_after("2") == 2.0 and parse_retry_after("data inválida") is None
+    assert parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
+    
+    results["retry_after"] = {"retries": retry_stats["retries"], "seconds": retry_seconds}
+    
+    # Salvar resultados em arquivo JSON
+    results_file = os.path.join(results_dir, "llm_dispatcher_test_results.json")
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    print(f"\nResultados do teste do despachante salvos em {results_file}")
+    
+    return results
+
+# Função para testar o processamento em lote de relatórios de status
+def test_nlp_processor(base_dir):
+    """
+    Verifica se o processamento em lote (nlp.pipe com os componentes desnecessários
+    desativados) extrai as mesmas entidades que o pipeline completo, documento a documento.
+    
+    O teste é ignorado se o spaCy ou o modelo pt_core_news_sm não estiverem instalados.
+    
+    Args:
+        base_dir: Diretório base para os testes
+        
+    Returns:
+        Resultados dos testes
+    """
+    print("\n=== Testando Processamento de Relatórios de Status ===")
+    
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Agentes"))
+    from nlp_processor import StatusTextProcessor, get_nlp, DEFAULT_SPACY_MODEL
+    from benchmark_nlp_processor import generate_status_texts
+    
+    nlp = get_nlp(DEFAULT_SPACY_MODEL)
+    if nlp is None:
+        print(f"Modelo {DEFAULT_SPACY_MODEL} indisponível: teste ignorado")
+        return {"skipped": True}
+    
+    # Criar diretório de resultados e relatórios de status
+    results_dir = os.path.join(base_dir, "test_results")
+    status_dir = os.path.join(base_dir, "nlp_status_files")
+    os.makedirs(results_dir, exist_ok=True)
+    os.makedirs(status_dir, exist_ok=True)
+    
+    texts = generate_status_texts(20, seed=11)
+    paths = []
+    for i, text in enumerate(texts):
+        path = os.path.join(status_dir, f"PROJ-{i:03d}_status.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        paths.append(path)
+    
+    # Lotes menores que o número de arquivos, para cobrir mais de um lote
+    processor = StatusTextProcessor()
+    batch_results = list(processor.process_status_files(paths, batch_size=8))
+    assert len(batch_results) == len(paths), len(batch_results)
+    
+    mismatches = 0
+    for path, text, result in zip(paths, texts, batch_results):
+        assert result["status"] == "success", result
+        assert result["project_info"]["file_path"] == path, result["project_info"]["file_path"]
+        expected = processor._extract_entities(nlp(text))
+        if result["project_info"]["entities"] != expected:
+            mismatches += 1
+            print(f"Entidades diferentes em {path}: {result['project_info']['entities']} != {expected}")
+    assert mismatches == 0, f"{mismatches} documentos com entidades diferentes"
+    
+    results = {
+        "skipped": False,
+        "documents": len(paths),
+        "disabled_components": processor._unused_components(nlp),
+        "entity_mismatches": mismatches
+    }
+    print(f"Documentos: {len(paths)}, componentes desativados: {results['disabled_components']}")
+    print("Entidades idênticas às do pipeline completo")
+    
+    # Salvar resultados em arquivo JSON
+    results_file = os.path.join(results_dir, "nlp_processor_test_results.json")
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    print(f"\nResultados do teste de processamento salvos em {results_file}")
+    
+    return results
+
 # Função principal
 def main():
     """
@@ -492,11 +959,19 @@ def main():
     # Testar guard rails
     guard_rails_results = test_guard_rails(base_dir)
     
+    # Testar despachante de requisições ao LLM
+    llm_dispatcher_results = test_llm_dispatcher(base_dir)
+    
+    # Testar processamento em lote dos relatórios de status
+    nlp_processor_results = test_nlp_processor(base_dir)
+    
     # Compilar resultados
     results = {
         "rag_system": rag_results,
         "agents": agent_results,
         "guard_rails": guard_rails_results,
+        "llm_dispatcher": llm_dispatcher_results,
+        "nlp_processor": nlp_processor_results,
         "test_date": datetime.now().isoformat()
     }
     